@@ -0,0 +1,93 @@
+"""Admin profiles for /auth/me without a database round trip
+
+Tokens minted by auth_login carry id, email, name and role, so a token
+is normally answered from its own claims. Profiles that do need a read
+(old tokens without a name, ?fresh=1, or a user changed since the token
+was issued) are cached for ADMIN_PROFILE_CACHE_SECONDS.
+
+Committed AdminUser changes drop the cached profile and record the change
+time, so tokens issued before the change stop being trusted for the
+profile in this process. Other instances catch up when their cache
+expires and the user logs in again (or asks for ?fresh=1).
+"""
+import threading
+import time
+from sqlalchemy import event
+from config import settings
+from models import SessionLocal, AdminUser
+
+PROFILE_FIELDS = ("id", "email", "name", "role")
+
+_profiles = {}
+_changed_at = {}
+_lock = threading.Lock()
+
+
+def _from_user(user: AdminUser) -> dict:
+    return {field: getattr(user, field) for field in PROFILE_FIELDS}
+
+
+def _from_claims(claims: dict):
+    """Profile from token claims if they're complete and no change has been seen since issue"""
+    profile = {"id": claims.get("sub"), **{field: claims.get(field) for field in PROFILE_FIELDS[1:]}}
+    if not all(profile.values()):
+        return None
+    with _lock:
+        changed_at = _changed_at.get(profile["id"])
+    if changed_at is not None and claims.get("iat", 0) <= changed_at:
+        return None
+    return profile
+
+
+def get_profile(claims: dict, fresh: bool = False):
+    """Profile for the token's user, or None if the user no longer exists"""
+    user_id = claims.get("sub")
+
+    if not fresh:
+        profile = _from_claims(claims)
+        if profile:
+            return profile
+        with _lock:
+            cached = _profiles.get(user_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+    db = SessionLocal()
+    try:
+        user = db.query(AdminUser).filter(AdminUser.id == user_id).first()
+        profile = _from_user(user) if user else None
+    finally:
+        db.close()
+
+    if profile:
+        with _lock:
+            _profiles[user_id] = (profile, time.monotonic() + settings.ADMIN_PROFILE_CACHE_SECONDS)
+    return profile
+
+
+def invalidate(user_id: str):
+    with _lock:
+        _profiles.pop(user_id, None)
+        # Compared with the token's (fractional) iat
+        _changed_at[user_id] = time.time()
+
+
+def _collect_changes(session, flush_context):
+    changed = session.info.setdefault("admin_users_changed", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, AdminUser):
+            changed.add(obj.id)
+
+
+def _apply_changes(session):
+    for user_id in session.info.pop("admin_users_changed", ()):
+        invalidate(user_id)
+
+
+def _discard_changes(session, previous_transaction):
+    session.info.pop("admin_users_changed", None)
+
+
+event.listen(SessionLocal, "after_flush", _collect_changes)
+event.listen(SessionLocal, "after_commit", _apply_changes)
+event.listen(SessionLocal, "after_soft_rollback", _discard_changes)
@@ -1,98 +1,77 @@
 import azure.functions as func
 import json
-import uuid
-from models import SessionLocal, AdminUser
-from utils import verify_password, create_access_token, get_password_hash, create_response, create_error_response, get_current_user
-from config import settings
+from models import AdminUser
+from utils import create_access_token, create_response
+from passwords import check_password, hash_password, needs_rehash, PasswordHashingBusy
+from pipeline import http_function, RequestContext
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+@http_function(methods=("POST",))
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
     """Admin login endpoint"""
     try:
         req_body = req.get_json()
-        email = req_body.get('email')
-        password = req_body.get('password')
-        
-        if not email or not password:
-            response, status = create_error_response(
-                "VALIDATION_ERROR",
-                "Email and password are required",
-                400
-            )
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=status,
-                mimetype="application/json"
-            )
-        
-        db = SessionLocal()
+    except ValueError:
+        return ctx.error("VALIDATION_ERROR", "Invalid JSON body", 400)
+    
+    email = req_body.get('email')
+    password = req_body.get('password')
+    
+    if not email or not password:
+        return ctx.error("VALIDATION_ERROR", "Email and password are required", 400)
+    
+    user = ctx.db.query(AdminUser).filter(AdminUser.email == email).first()
+    # Hand the connection back before hashing: a login storm would otherwise
+    # hold the whole pool while bcrypt runs and stall every other endpoint
+    ctx.close()
+    
+    try:
+        valid = bool(user) and check_password(password, user.password_hash)
+    except PasswordHashingBusy:
+        return ctx.error(
+            "RATE_LIMITED",
+            "Too many login attempts, please try again shortly",
+            429,
+            headers={"Retry-After": "1"}
+        )
+    
+    if not valid:
+        return ctx.error("UNAUTHORIZED", "Invalid email or password", 401)
+    
+    # Upgrade hashes made with a different cost while we have the password
+    if needs_rehash(user.password_hash):
         try:
-            user = db.query(AdminUser).filter(AdminUser.email == email).first()
-            
-            if not user or not verify_password(password, user.password_hash):
-                response, status = create_error_response(
-                    "UNAUTHORIZED",
-                    "Invalid email or password",
-                    401
-                )
-                return func.HttpResponse(
-                    json.dumps(response),
-                    status_code=status,
-                    mimetype="application/json"
-                )
-            
-            # Create JWT token
-            token_data = {
-                "sub": user.id,
+            password_hash = hash_password(password)
+        except PasswordHashingBusy:
+            password_hash = None
+        if password_hash:
+            db = ctx.db
+            db.query(AdminUser).filter(AdminUser.id == user.id).update({"password_hash": password_hash})
+            db.commit()
+    
+    # Create JWT token
+    token_data = {
+        "sub": user.id,
+        "email": user.email,
+        "name": user.name,
+        "role": user.role
+    }
+    access_token = create_access_token(token_data)
+    
+    response = create_response(
+        data={
+            "token": access_token,
+            "user": {
+                "id": user.id,
                 "email": user.email,
+                "name": user.name,
                 "role": user.role
             }
-            access_token = create_access_token(token_data)
-            
-            response = create_response(
-                data={
-                    "token": access_token,
-                    "user": {
-                        "id": user.id,
-                        "email": user.email,
-                        "name": user.name,
-                        "role": user.role
-                    }
-                }
-            )
-            
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=200,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "POST, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization"
-                }
-            )
-            
-        finally:
-            db.close()
-            
-    except ValueError:
-        response, status = create_error_response(
-            "VALIDATION_ERROR",
-            "Invalid JSON body",
-            400
-        )
-        return func.HttpResponse(
-            json.dumps(response),
-            status_code=status,
-            mimetype="application/json"
-        )
-    except Exception as e:
-        response, status = create_error_response(
-            "INTERNAL_ERROR",
-            str(e),
-            500
-        )
-        return func.HttpResponse(
-            json.dumps(response),
-            status_code=status,
-            mimetype="application/json"
-        )
+        }
+    )
+    
+    return func.HttpResponse(
+        json.dumps(response),
+        status_code=200,
+        mimetype="application/json",
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
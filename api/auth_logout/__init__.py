@@ -0,0 +1,26 @@
+import azure.functions as func
+import json
+from datetime import datetime
+from utils import create_response
+from revocations import revoke
+from pipeline import http_function, RequestContext
+
+@http_function(methods=("POST",), auth=True)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    """Logout: revoke the caller's token"""
+    db = ctx.db
+    if ctx.user.get('jti'):
+        revoke(db, jti=ctx.user['jti'], expires_at=datetime.utcfromtimestamp(ctx.user['exp']))
+    else:
+        # Tokens minted before jti existed can only be revoked per user
+        revoke(db, user_id=ctx.user.get('sub'))
+    db.commit()
+    
+    response = create_response(message="Logged out successfully")
+    
+    return func.HttpResponse(
+        json.dumps(response),
+        status_code=200,
+        mimetype="application/json",
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
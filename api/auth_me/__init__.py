@@ -1,73 +1,23 @@
 import azure.functions as func
 import json
-from utils import get_current_user, create_response, create_error_response
-from models import SessionLocal, AdminUser
+from utils import create_response
+from pagination import parse_bool
+from admin_profiles import get_profile
+from pipeline import http_function, RequestContext
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+@http_function(methods=("GET",), auth=True)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
     """Get current authenticated user"""
-    try:
-        authorization = req.headers.get('Authorization', '')
-        user_payload = get_current_user(authorization)
-        
-        if not user_payload:
-            response, status = create_error_response(
-                "UNAUTHORIZED",
-                "Invalid or missing token",
-                401
-            )
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=status,
-                mimetype="application/json"
-            )
-        
-        db = SessionLocal()
-        try:
-            user = db.query(AdminUser).filter(AdminUser.id == user_payload.get('sub')).first()
-            
-            if not user:
-                response, status = create_error_response(
-                    "NOT_FOUND",
-                    "User not found",
-                    404
-                )
-                return func.HttpResponse(
-                    json.dumps(response),
-                    status_code=status,
-                    mimetype="application/json"
-                )
-            
-            response = create_response(
-                data={
-                    "id": user.id,
-                    "email": user.email,
-                    "name": user.name,
-                    "role": user.role
-                }
-            )
-            
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=200,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Methods": "GET, OPTIONS",
-                    "Access-Control-Allow-Headers": "Content-Type, Authorization"
-                }
-            )
-            
-        finally:
-            db.close()
-            
-    except Exception as e:
-        response, status = create_error_response(
-            "INTERNAL_ERROR",
-            str(e),
-            500
-        )
-        return func.HttpResponse(
-            json.dumps(response),
-            status_code=status,
-            mimetype="application/json"
-        )
+    profile = get_profile(ctx.user, fresh=parse_bool(req.params.get('fresh')))
+    
+    if not profile:
+        return ctx.error("NOT_FOUND", "User not found", 404)
+    
+    response = create_response(data=profile)
+    
+    return func.HttpResponse(
+        json.dumps(response),
+        status_code=200,
+        mimetype="application/json",
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
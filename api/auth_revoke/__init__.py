@@ -0,0 +1,41 @@
+import azure.functions as func
+import json
+from datetime import datetime, timedelta
+from utils import create_response
+from config import settings
+from revocations import revoke
+from pipeline import http_function, RequestContext
+
+@http_function(methods=("POST",), auth=True)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    """Revoke a token by jti, or every token issued to a user (Admin only)"""
+    if ctx.user.get('role') != 'admin':
+        return ctx.error("UNAUTHORIZED", "Admin authentication required", 401)
+    
+    try:
+        req_body = req.get_json()
+    except ValueError:
+        return ctx.error("VALIDATION_ERROR", "Invalid JSON body", 400)
+    
+    jti = req_body.get('jti') if isinstance(req_body, dict) else None
+    user_id = req_body.get('userId') if isinstance(req_body, dict) else None
+    
+    if bool(jti) == bool(user_id):
+        return ctx.error("VALIDATION_ERROR", "Provide either jti or userId", 400)
+    
+    db = ctx.db
+    if jti:
+        # The token itself isn't at hand; keep the row for the longest possible lifetime
+        revoke(db, jti=jti, expires_at=datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS))
+    else:
+        revoke(db, user_id=user_id)
+    db.commit()
+    
+    response = create_response(message="Token revoked" if jti else "All tokens for user revoked")
+    
+    return func.HttpResponse(
+        json.dumps(response),
+        status_code=200,
+        mimetype="application/json",
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
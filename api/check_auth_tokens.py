@@ -0,0 +1,151 @@
+"""Check the verified-claims cache and token revocation, and time get_current_user
+
+Runs against DATABASE_URL (from .env) for the revocation mirror's sync;
+revocations are made in a session that is rolled back, so nothing is
+written.
+
+    python check_auth_tokens.py
+"""
+import logging
+import time
+import timeit
+from unittest import mock
+from config import settings
+from models import SessionLocal
+from utils import create_access_token, decode_access_token, get_current_user
+import revocations
+import utils
+
+CALLS = 20000
+
+
+def bearer(claims: dict) -> str:
+    return "Bearer " + create_access_token(claims)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def check_claims_cache():
+    user = {"sub": "check-cache", "email": "check@localhost", "role": "admin", "name": "Check"}
+    header = bearer(user)
+    decodes = []
+
+    def counting_decode(token):
+        decodes.append(token)
+        return decode_access_token(token)
+
+    handler = RecordingHandler()
+    root = logging.getLogger()
+    level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.DEBUG)
+    try:
+        with mock.patch("utils.decode_access_token", counting_decode):
+            first = get_current_user(header)
+            second = get_current_user(header)
+            assert first == second and len(decodes) == 1, f"❌ {len(decodes)} decodes for a repeated token"
+            second["role"] = "changed"
+            assert get_current_user(header)["role"] == "admin", "❌ Callers can change the cached claims"
+            print("✅ A repeated token is verified once and served from the cache")
+
+            with mock.patch("utils.time.time", return_value=first["exp"] + 1):
+                get_current_user(header)
+            assert len(decodes) == 2, "❌ Cached claims outlived the token's exp"
+            print("✅ Cached claims expire at the token's exp")
+
+        tampered = header[:-2] + ("A" if header[-2] != "A" else "B") + header[-1]
+        assert get_current_user(tampered) is None, "❌ Tampered token accepted"
+        assert get_current_user("Bearer not.a.token") is None and get_current_user("Basic abc") is None, \
+            "❌ Malformed header accepted"
+
+        with mock.patch.object(settings, "JWT_CACHE_SIZE", 5):
+            for n in range(20):
+                get_current_user(bearer({**user, "sub": f"check-cache-{n}"}))
+            assert len(utils._token_cache) <= 5, f"❌ Cache grew to {len(utils._token_cache)} entries"
+        print("✅ Bad tokens rejected, cache stays within JWT_CACHE_SIZE")
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+    token = header[7:]
+    for record in handler.records:
+        message = record.getMessage()
+        assert settings.JWT_SECRET_KEY not in message and token not in message, \
+            f"❌ Secret or token logged: {message}"
+    info = [record.getMessage() for record in handler.records
+            if record.levelno >= logging.INFO and record.pathname == utils.__file__]
+    assert not info, f"❌ get_current_user logs at INFO or above: {info}"
+    print(f"✅ Nothing secret logged ({len(handler.records)} debug records checked)")
+
+
+def check_revocation():
+    db = SessionLocal()
+    try:
+        user = {"sub": "check-user", "email": "check@localhost", "role": "admin", "name": "Check"}
+        other = {**user, "sub": "check-other"}
+
+        before = bearer(user)
+        unrelated = bearer(other)
+        single = bearer(user)
+        assert get_current_user(single), "❌ Fresh token rejected"
+
+        revocations.revoke(db, jti=get_current_user(single)["jti"], expires_at=None)
+        assert get_current_user(single) is None, "❌ Token still accepted after its jti was revoked"
+        assert get_current_user(before), "❌ Revoking one jti revoked another token"
+        print("✅ Revoking a jti rejects only that token")
+
+        # Log out everywhere, then log straight back in: usually the same second
+        revocations.revoke(db, user_id=user["sub"])
+        after = bearer(user)
+        assert get_current_user(before) is None, "❌ Token issued before revoke-all still accepted"
+        assert get_current_user(after), "❌ Token issued right after revoke-all was rejected"
+        assert get_current_user(unrelated), "❌ Revoke-all affected another user"
+        print("✅ Revoke-all rejects earlier tokens and accepts one issued right after")
+
+        # The same-second edge, pinned: revocation at .5 of a second
+        revoked_at = int(time.time()) + 0.5
+        revocations._revoked_users["check-edge"] = revoked_at
+        assert revocations.is_revoked({"sub": "check-edge", "iat": revoked_at - 0.3}), \
+            "❌ Token from earlier in the revocation's second accepted"
+        assert not revocations.is_revoked({"sub": "check-edge", "iat": revoked_at + 0.2}), \
+            "❌ Token from later in the revocation's second rejected"
+        assert revocations.is_revoked({"sub": "check-edge", "iat": int(revoked_at)}), \
+            "❌ Whole-second token from the revocation's second accepted"
+        print("✅ Same-second tokens are judged by their fractional iat")
+    finally:
+        db.rollback()
+        db.close()
+        revocations._revoked_users.pop("check-user", None)
+        revocations._revoked_users.pop("check-edge", None)
+
+
+def per_call_us(statement) -> float:
+    return min(timeit.repeat(statement, number=CALLS, repeat=3)) / CALLS * 1e6
+
+
+def benchmark():
+    header = bearer({"sub": "check-bench", "email": "check@localhost", "role": "admin", "name": "Check"})
+    token = header[7:]
+    claims = decode_access_token(token)
+    get_current_user(header)
+
+    decode = per_call_us(lambda: decode_access_token(token))
+    revoked = per_call_us(lambda: revocations.is_revoked(claims))
+    current_user = per_call_us(lambda: get_current_user(header))
+    print(f"jwt.decode on every call (before the cache) {decode:8.1f} µs/call")
+    print(f"is_revoked                                  {revoked:8.2f} µs/call")
+    print(f"get_current_user, cached claims             {current_user:8.1f} µs/call")
+    assert revoked < decode / 10, "❌ Revocation check costs more than a tenth of a decode"
+
+
+if __name__ == "__main__":
+    check_claims_cache()
+    check_revocation()
+    benchmark()
@@ -0,0 +1,167 @@
+"""Check that catalog and enquiry list queries use indexes at scale
+
+Seeds generated properties and enquiries into DATABASE_URL (from .env),
+calls GET /properties and GET /enquiries with the common filter and sort
+combinations, and runs EXPLAIN on every statement they send. Any
+sequential scan of properties or enquiries fails the check. The seeded
+rows are deleted afterwards.
+
+Unfiltered requests ask for includeTotal=false: counting a whole table
+has to read all of it, which is why totals are optional.
+
+    python upgrade_db.py                # creates the indexes, including pg_trgm ones
+    python check_catalog_indexes.py [properties]
+"""
+import json
+import sys
+import azure.functions as func
+from sqlalchemy import event, text
+from models import engine, SessionLocal, AdminUser
+from utils import create_access_token
+from sql_profiler import normalize_sql
+import properties
+import enquiries
+
+SEED_PREFIX = "chkidx-"
+CHECKED_TABLES = {"properties", "enquiries"}
+
+PROPERTY_REQUESTS = [
+    {"includeTotal": "false"},
+    {"page": "1", "includeTotal": "false"},
+    {"status": "available"},
+    {"status": "available", "type": "commercial"},
+    {"type": "agricultural"},
+    {"featured": "true"},
+    {"sort": "price_asc", "minPrice": "5000000", "maxPrice": "5200000"},
+    {"sort": "price_desc"},
+    {"sort": "price_per_sqft", "page": "1", "includeTotal": "false"},
+    {"minArea": "9000", "maxArea": "9050"},
+    {"search": "garden"},
+]
+
+ENQUIRY_REQUESTS = [
+    {"includeTotal": "false"},
+    {"page": "1", "includeTotal": "false"},
+    {"status": "pending"},
+    {"status": "pending", "type": "callback"},
+    {"type": "general"},
+    {"start_date": "2025-01-01T00:00:00", "end_date": "2025-01-08T00:00:00"},
+]
+
+
+def seed(count):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO properties (id, title, slug, description, price, price_per_sqft, area, area_in_sqft,
+                                    location, type, status, featured, images, created_at, updated_at)
+            SELECT :prefix || n, 'Plot ' || n || (CASE WHEN n % 500 = 0 THEN ' garden view' ELSE '' END),
+                   :prefix || n, 'Generated listing ' || n, 100000 + (n * 7919) % 10000000,
+                   CASE WHEN n % 4 = 0 THEN NULL ELSE 1000 + (n * 31) % 9000 END,
+                   ((n * 13) % 20000) || ' sqft', (n * 13) % 20000, 'Town ' || (n % 200),
+                   (ARRAY['RESIDENTIAL', 'AGRICULTURAL', 'COMMERCIAL'])[1 + n % 3]::propertytype,
+                   (ARRAY['SOLD', 'SOLD', 'SOLD', 'SOLD', 'SOLD', 'SOLD', 'SOLD', 'AVAILABLE', 'AVAILABLE', 'UPCOMING'])[1 + n % 10]::propertystatus,
+                   n % 100 = 0, '[]', now() - n * interval '10 minutes', now()
+            FROM generate_series(1, :count) AS n
+        """), {"prefix": SEED_PREFIX, "count": count})
+        conn.execute(text("""
+            INSERT INTO enquiries (id, type, name, phone, status, created_at, updated_at)
+            SELECT :prefix || n, (ARRAY['CALLBACK', 'PROPERTY_ENQUIRY', 'GENERAL'])[1 + n % 3]::enquirytype,
+                   'Check ' || n, (9000000000 + n)::text,
+                   (CASE WHEN n % 20 = 0 THEN 'PENDING' WHEN n % 3 = 0 THEN 'CONTACTED' ELSE 'CLOSED' END)::enquirystatus,
+                   now() - n * interval '5 minutes', now()
+            FROM generate_series(1, :count) AS n
+        """), {"prefix": SEED_PREFIX, "count": count * 2})
+    # Plan against the steady state autovacuum keeps: fresh statistics and visibility map
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE properties"))
+        conn.execute(text("VACUUM ANALYZE enquiries"))
+
+
+def unseed():
+    # Vacuum the deleted enquiries first: each property delete looks them up
+    # for ON DELETE SET NULL, and dead rows would make that a long scan
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM enquiries WHERE id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE enquiries"))
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM properties WHERE id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE properties"))
+
+
+def capture_statements(module, params, headers=None):
+    """Call a handler and return the (statement, parameters) it ran"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    request = func.HttpRequest(method="GET", url="http://localhost/api/v1", headers=headers or {},
+                               params=params, body=b"")
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        response = module.main(request)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    assert response.status_code == 200, f"❌ {params}: {response.status_code} {response.get_body()[:200]}"
+    return statements
+
+
+def seq_scans(plan):
+    """Relations read with a sequential scan anywhere in an EXPLAIN plan"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+def check_requests(label, module, requests, headers=None):
+    failures = 0
+    with engine.connect() as conn:
+        for params in requests:
+            scanned = []
+            for statement, parameters in capture_statements(module, params, headers):
+                if not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                if set(seq_scans(plan[0]["Plan"])) & CHECKED_TABLES:
+                    scanned.append(normalize_sql(statement))
+            if scanned:
+                failures += 1
+                print(f"❌ {label} {params}: sequential scan in")
+                for statement in scanned:
+                    print(f"   {statement}")
+            else:
+                print(f"✅ {label} {params}")
+    return failures
+
+
+def admin_headers():
+    db = SessionLocal()
+    try:
+        admin = db.query(AdminUser).first()
+    finally:
+        db.close()
+    token = create_access_token({
+        "sub": admin.id if admin else "check", "email": "check@localhost", "role": "admin", "name": "Check"
+    })
+    return {"Authorization": f"Bearer {token}"}
+
+
+def check_catalog_indexes(count=100000):
+    seed(count)
+    try:
+        failures = check_requests("GET /properties", properties, PROPERTY_REQUESTS)
+        failures += check_requests("GET /enquiries", enquiries, ENQUIRY_REQUESTS, admin_headers())
+    finally:
+        unseed()
+    assert not failures, f"❌ {failures} queries fell back to a sequential scan"
+    print(f"✅ No sequential scans with {count} properties and {count * 2} enquiries")
+
+
+if __name__ == "__main__":
+    check_catalog_indexes(*[int(arg) for arg in sys.argv[1:2]])
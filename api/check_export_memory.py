@@ -0,0 +1,113 @@
+"""Check that /export memory doesn't grow with the number of rows
+
+Seeds generated transactions dated 2090 into DATABASE_URL (from .env),
+exports that year through the export function at a tenth of the rows and
+at all of them, and compares peak traced Python memory. The response body
+has to be held in full (the Functions HTTP binding can't stream), so the
+check measures what the export needs on top of its body and fails if that
+grows with the row count. The seeded rows are deleted afterwards.
+
+    python check_export_memory.py [rows]
+"""
+import sys
+import time
+import tracemalloc
+import azure.functions as func
+from sqlalchemy import text
+from models import engine, SessionLocal, AdminUser
+from utils import create_access_token
+import export
+
+SEED_PREFIX = "chkexp-"
+# Working memory allowed on top of the body, whatever the export size
+MAX_OVERHEAD_MB = 32
+# How much more the full export may need than the 10% one
+MAX_OVERHEAD_GROWTH_MB = 4
+
+CASES = [
+    ("csv", {"Accept-Encoding": "gzip"}),
+    ("ndjson", {"Accept-Encoding": "gzip"}),
+    ("csv", {}),
+]
+
+
+def seed(count):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO transactions (id, type, category, amount, description, payment_method, reference_number,
+                                      customer_name, customer_phone, transaction_date, created_at, updated_at)
+            SELECT :prefix || n,
+                   (CASE WHEN n % 3 = 0 THEN 'EXPENSE' ELSE 'INCOME' END)::transactiontype,
+                   (CASE WHEN n % 3 = 0 THEN 'MARKETING' ELSE 'PROPERTY_SALE' END)::transactioncategory,
+                   1000 + n % 100000, 'Generated transaction ' || n, 'UPI'::paymentmethod, 'REF' || n,
+                   'Customer ' || n, (9000000000 + n)::text,
+                   timestamp '2090-01-01' + n * (interval '1 year' / :count), now(), now()
+            FROM generate_series(1, :count) AS n
+        """), {"prefix": SEED_PREFIX, "count": count})
+
+
+def unseed():
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM transactions WHERE id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+
+
+def admin_headers():
+    db = SessionLocal()
+    try:
+        admin = db.query(AdminUser).first()
+    finally:
+        db.close()
+    token = create_access_token({
+        "sub": admin.id if admin else "check", "email": "check@localhost", "role": "admin", "name": "Check"
+    })
+    return {"Authorization": f"Bearer {token}"}
+
+
+def measure(export_format, headers, end_date):
+    """(rows' body bytes, peak traced bytes beyond the body, seconds) for one export"""
+    request = func.HttpRequest(
+        method="GET", url="http://localhost/api/v1/export/transactions", headers=headers,
+        params={"format": export_format, "start_date": "2090-01-01T00:00:00", "end_date": end_date},
+        route_params={"entity": "transactions"}, body=b""
+    )
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = export.main(request)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert response.status_code == 200, f"❌ {response.status_code} {response.get_body()[:200]}"
+    body_size = len(response.get_body())
+    return body_size, peak - body_size, seconds
+
+
+def check_export_memory(count=1000000):
+    seed(count)
+    try:
+        headers = admin_headers()
+        failures = 0
+        for export_format, extra_headers in CASES:
+            label = export_format + (" (gzip)" if extra_headers else "")
+            results = []
+            # Same year, so the 10% export ends in early February
+            for end_date in ("2090-02-06T12:00:00", "2090-12-31T23:59:59"):
+                results.append(measure(export_format, {**headers, **extra_headers}, end_date))
+
+            (small_body, small_overhead, _), (body, overhead, seconds) = results
+            mb = 1024 * 1024
+            print(f"{label}: body {small_body / mb:.1f} -> {body / mb:.1f} MB, "
+                  f"working memory {small_overhead / mb:.1f} -> {overhead / mb:.1f} MB, {seconds:.1f}s")
+            if overhead > MAX_OVERHEAD_MB * mb or overhead - small_overhead > MAX_OVERHEAD_GROWTH_MB * mb:
+                failures += 1
+                print(f"❌ {label} working memory grows with the export size")
+            else:
+                print(f"✅ {label} working memory bounded")
+    finally:
+        unseed()
+    assert not failures, f"❌ {failures} export formats use memory proportional to their rows"
+    print(f"✅ Exports of {count} rows hold only their body plus bounded working memory")
+
+
+if __name__ == "__main__":
+    check_export_memory(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,108 @@
+"""Check ETag / Last-Modified handling and 304s on the public property endpoints
+
+The validator checks need no database. The request checks create a
+property in DATABASE_URL (from .env), revalidate GET /properties and
+GET /properties/{id} against it before and after an edit, and delete it
+afterwards.
+
+    python check_http_cache.py
+"""
+import uuid
+from datetime import datetime, timedelta
+import azure.functions as func
+from models import SessionLocal, Property, PropertyType
+from http_cache import make_etag, http_date, is_not_modified, cache_headers
+from sql_profiler import profile
+import properties
+import property_detail
+
+
+def request(headers=None, **kwargs):
+    return func.HttpRequest(method="GET", url="http://localhost/api/v1", headers=headers or {},
+                            body=b"", **kwargs)
+
+
+def check_validators():
+    etag = make_etag("property", "abc", datetime(2026, 5, 1, 10, 30))
+    assert etag.startswith('"') and etag.endswith('"'), "❌ ETag is not a quoted strong tag"
+    assert etag == make_etag("property", "abc", datetime(2026, 5, 1, 10, 30)), "❌ ETag is not stable"
+    assert etag != make_etag("property", "abc", datetime(2026, 5, 1, 10, 31)), "❌ ETag ignores updated_at"
+    print("✅ ETags are strong, stable and change with their parts")
+
+    modified = datetime(2026, 5, 1, 10, 30, 15, 500000)
+    assert http_date(modified) == "Fri, 01 May 2026 10:30:15 GMT", f"❌ HTTP date {http_date(modified)}"
+    headers = cache_headers(etag, modified)
+    assert {"ETag", "Last-Modified", "Cache-Control"} <= headers.keys(), "❌ Missing caching headers"
+    assert "must-revalidate" in headers["Cache-Control"], "❌ Browsers are not told to revalidate"
+
+    other = make_etag("other")
+    cases = [
+        ({"If-None-Match": etag}, True),
+        ({"If-None-Match": f"{other}, {etag}"}, True),
+        ({"If-None-Match": f"W/{etag}"}, True),
+        ({"If-None-Match": "*"}, True),
+        ({"If-None-Match": other}, False),
+        ({"If-Modified-Since": http_date(modified)}, True),
+        ({"If-Modified-Since": http_date(modified + timedelta(hours=1))}, True),
+        ({"If-Modified-Since": http_date(modified - timedelta(seconds=1))}, False),
+        ({"If-Modified-Since": "not a date"}, False),
+        # If-None-Match wins over a matching date
+        ({"If-None-Match": other, "If-Modified-Since": http_date(modified)}, False),
+        ({}, False),
+    ]
+    for headers, expected in cases:
+        assert is_not_modified(request(headers), etag, modified) == expected, \
+            f"❌ {headers}: expected not-modified={expected}"
+    print(f"✅ If-None-Match / If-Modified-Since: {len(cases)} cases")
+
+
+def get(module, headers=None, route_params=None):
+    with profile() as queries:
+        response = module.main(request(headers, params={}, route_params=route_params or {}))
+    return response, queries.count
+
+
+def check_conditional_gets():
+    db = SessionLocal()
+    property_id = "chkcache-" + uuid.uuid4().hex[:8]
+    route = {"id": property_id}
+    try:
+        db.add(Property(id=property_id, title="Cache check plot", slug=property_id, price=100000,
+                        area="1200 sqft", location="Check", type=PropertyType.RESIDENTIAL))
+        db.commit()
+
+        detail, _ = get(property_detail, route_params=route)
+        listing, _ = get(properties)
+        assert detail.status_code == 200 and listing.status_code == 200, "❌ Uncached GETs failed"
+        detail_etag, listing_etag = detail.headers["ETag"], listing.headers["ETag"]
+
+        response, queries = get(property_detail, {"If-None-Match": detail_etag}, route)
+        assert response.status_code == 304, f"❌ Detail revalidation got {response.status_code}"
+        assert response.headers["ETag"] == detail_etag and not response.get_body(), "❌ 304 carries a body"
+        assert queries == 1, f"❌ Detail 304 ran {queries} queries, expected only the version read"
+        response, queries = get(property_detail, {"If-Modified-Since": detail.headers["Last-Modified"]}, route)
+        assert response.status_code == 304, "❌ Detail If-Modified-Since revalidation"
+        response, queries = get(properties, {"If-None-Match": listing_etag})
+        assert response.status_code == 304, f"❌ Listing revalidation got {response.status_code}"
+        assert queries == 1, f"❌ Listing 304 ran {queries} queries, expected only the version read"
+        print("✅ Unchanged listing and property answer 304 after one version query")
+
+        db.query(Property).filter(Property.id == property_id).one().title = "Cache check plot, edited"
+        db.commit()
+
+        response, _ = get(property_detail, {"If-None-Match": detail_etag}, route)
+        assert response.status_code == 200 and response.headers["ETag"] != detail_etag, \
+            "❌ Edited property still answered 304"
+        response, _ = get(properties, {"If-None-Match": listing_etag})
+        assert response.status_code == 200 and response.headers["ETag"] != listing_etag, \
+            "❌ Listing still answered 304 after a property edit"
+        print("✅ Editing a property changes both ETags")
+    finally:
+        db.query(Property).filter(Property.id == property_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    check_validators()
+    check_conditional_gets()
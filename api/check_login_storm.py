@@ -0,0 +1,153 @@
+"""Load test: other endpoints' latency during a login storm
+
+Creates a throwaway admin in DATABASE_URL (from .env) and models one
+worker: a fixed pool of request threads serving wrong-password logins
+arriving at a steady rate, the way a credential-stuffing burst lands,
+plus a GET /properties probe every PROBE_INTERVAL. The storm runs twice:
+through the bounded bcrypt pool (passwords.py) and with bcrypt.checkpw
+called directly on the request thread, as auth_login used to. Also
+checks the rehash on login when the stored cost differs from
+BCRYPT_ROUNDS. The admin is deleted afterwards.
+
+    python check_login_storm.py [request threads] [seconds] [logins per second]
+"""
+import json
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import azure.functions as func
+import bcrypt
+from config import settings
+from models import SessionLocal, AdminUser
+from passwords import hash_password, needs_rehash
+import auth_login
+import properties
+
+PASSWORD = "storm-check-password"
+PROBE_INTERVAL = 0.05
+
+
+def post_login(email, password):
+    request = func.HttpRequest(method="POST", url="http://localhost/api/v1/auth/login", headers={},
+                               params={}, body=json.dumps({"email": email, "password": password}).encode())
+    return auth_login.main(request)
+
+
+def probe_once() -> int:
+    request = func.HttpRequest(method="GET", url="http://localhost/api/v1/properties", headers={},
+                               params={"limit": "12", "includeTotal": "false"}, body=b"")
+    return properties.main(request).status_code
+
+
+def storm(email, threads, seconds, rate):
+    """
+    Offer `rate` logins a second for `seconds` to a pool of `threads` request
+    threads, with a probe GET /properties every PROBE_INTERVAL. Returns
+    (login statuses, probe latencies in ms from arrival to response).
+
+    Probes still queued when the storm ends count with the time they had
+    waited so far, so a stalled worker can't look fast by never answering.
+    """
+    executor = ThreadPoolExecutor(max_workers=threads)
+    logins, probes = [], []
+    started = time.perf_counter()
+    next_login = next_probe = started
+    while time.perf_counter() - started < seconds:
+        now = time.perf_counter()
+        if now >= next_login:
+            logins.append(executor.submit(post_login, email, "wrong-" + uuid.uuid4().hex[:6]))
+            next_login += 1 / rate
+        if now >= next_probe:
+            probes.append((now, executor.submit(timed, probe_once)))
+            next_probe += PROBE_INTERVAL
+        time.sleep(max(0, min(next_login, next_probe) - time.perf_counter()))
+
+    ended = time.perf_counter()
+    executor.shutdown(wait=True, cancel_futures=True)
+    statuses = Counter(future.result().status_code for future in logins if not future.cancelled())
+    statuses["not answered"] = sum(future.cancelled() for future in logins)
+    latencies = []
+    for arrived, future in probes:
+        if future.cancelled():
+            latencies.append((ended - arrived) * 1000)
+        else:
+            status, finished = future.result()
+            assert status == 200, f"❌ Probe failed with {status}"
+            latencies.append((finished - arrived) * 1000)
+    return statuses, latencies
+
+
+def timed(fn):
+    return fn(), time.perf_counter()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def report(label, probe_ms, statuses=None):
+    line = f"{label:30} probe p50 {statistics.median(probe_ms):8.1f} ms  p95 {percentile(probe_ms, 0.95):8.1f} ms"
+    if statuses:
+        line += f"   logins {dict(sorted((str(key), count) for key, count in statuses.items() if count))}"
+    print(line)
+
+
+def check_rehash(db, user):
+    assert needs_rehash(bcrypt.hashpw(b"x", bcrypt.gensalt(rounds=4)).decode()) == (settings.BCRYPT_ROUNDS != 4)
+    assert needs_rehash("not a bcrypt hash"), "❌ Unparseable hash not flagged for rehash"
+    assert not needs_rehash(hash_password("x")), "❌ hash_password ignored BCRYPT_ROUNDS"
+
+    low_cost = 4 if settings.BCRYPT_ROUNDS != 4 else 5
+    user.password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=low_cost)).decode()
+    db.commit()
+    assert post_login(user.email, PASSWORD).status_code == 200, "❌ Login with a low-cost hash failed"
+    db.refresh(user)
+    assert not needs_rehash(user.password_hash), "❌ Hash not upgraded on login"
+    assert bcrypt.checkpw(PASSWORD.encode(), user.password_hash.encode()), "❌ Upgraded hash doesn't verify"
+    print(f"✅ A cost-{low_cost} hash is rehashed at cost {settings.BCRYPT_ROUNDS} on login")
+
+
+def check_login_storm(threads=16, seconds=10, rate=40):
+    db = SessionLocal()
+    user = AdminUser(id=str(uuid.uuid4()), email=f"storm-{uuid.uuid4().hex[:8]}@localhost",
+                     password_hash=hash_password(PASSWORD), name="Storm check")
+    db.add(user)
+    db.commit()
+    try:
+        check_rehash(db, user)
+
+        print(f"{rate} logins/s for {seconds}s on {threads} request threads, bcrypt cost "
+              f"{settings.BCRYPT_ROUNDS}, {settings.PASSWORD_HASH_WORKERS} hash workers, "
+              f"{settings.PASSWORD_HASH_MAX_PENDING} pending max")
+        _, baseline = storm(user.email, threads, 3, 1)
+        report("quiet (1 login/s)", baseline)
+
+        def unbounded(plain, hashed):
+            return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
+
+        with mock.patch("auth_login.check_password", unbounded):
+            old_statuses, old_probe_ms = storm(user.email, threads, seconds, rate)
+        report("checkpw on the request thread", old_probe_ms, old_statuses)
+
+        statuses, probe_ms = storm(user.email, threads, seconds, rate)
+        report("bounded bcrypt pool", probe_ms, statuses)
+
+        assert set(statuses) <= {401, 429, "not answered"}, f"❌ Unexpected login statuses {statuses}"
+        assert statuses[429], "❌ Saturated pool never answered 429"
+        assert not statuses["not answered"], "❌ Logins left unanswered with the pool"
+        assert percentile(probe_ms, 0.95) < percentile(old_probe_ms, 0.95) / 4, \
+            "❌ Other requests aren't clearly faster with the pool"
+        print("✅ Logins beyond the pool get fast 429s and other requests keep being served")
+    finally:
+        db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    check_login_storm(*[int(arg) for arg in sys.argv[1:4]])
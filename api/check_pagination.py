@@ -0,0 +1,95 @@
+"""Check keyset cursors and that bad cursor requests are rejected before counting
+
+The cursor checks need no database. The request checks call the list
+handlers through the pipeline against DATABASE_URL (from .env): invalid
+cursor requests must fail with 400 without querying the listed table.
+
+    python check_pagination.py
+"""
+import base64
+import json
+import re
+from datetime import datetime
+import azure.functions as func
+from models import Property
+from pagination import encode_cursor, decode_cursor, InvalidCursor, build_pagination
+from sql_profiler import profile
+from utils import create_access_token
+import properties
+import enquiries
+
+
+def check_cursors():
+    created_at = datetime(2026, 3, 14, 9, 26, 53, 589793)
+    cursor = encode_cursor(created_at, "abc")
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor, "❌ Cursor is not URL-safe"
+    assert decode_cursor(cursor, Property.created_at) == (created_at, "abc"), "❌ datetime cursor round trip"
+    assert decode_cursor(encode_cursor(1250000.5, "id-1"), Property.price) == (1250000.5, "id-1"), \
+        "❌ numeric cursor round trip"
+    print("✅ Cursors round-trip datetime and numeric sort keys")
+
+    def raw(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+    invalid = {
+        "not base64": "***",
+        "not json": base64.urlsafe_b64encode(b"nope").decode(),
+        "wrong shape": raw([1, 2, 3]),
+        "id not a string": raw(["2026-01-01T00:00:00", 5]),
+        "bad timestamp": raw(["yesterday", "abc"]),
+    }
+    for label, bad in invalid.items():
+        try:
+            decode_cursor(bad, Property.created_at)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f"❌ Accepted a cursor with {label}")
+
+    for wrong in (raw(["2026-01-01T00:00:00", "abc"]), raw([True, "abc"])):
+        try:
+            decode_cursor(wrong, Property.price)
+        except InvalidCursor:
+            continue
+        raise AssertionError("❌ Accepted a cursor for a different sort column")
+    print("✅ Malformed and mismatched cursors raise InvalidCursor")
+
+    pagination = build_pagination(10, total_items=21, page=2)
+    assert pagination == {"itemsPerPage": 10, "currentPage": 2, "totalItems": 21, "totalPages": 3}, \
+        "❌ Page-number pagination block changed"
+    pagination = build_pagination(10, next_cursor=None, keyset=True)
+    assert pagination == {"itemsPerPage": 10, "nextCursor": None, "hasMore": False}, "❌ Last cursor page"
+    print("✅ Pagination blocks for page and cursor clients")
+
+
+def get(module, params, headers=None):
+    """Call a list handler; returns (response, statements that read its table)"""
+    request = func.HttpRequest(method="GET", url="http://localhost/api/v1", headers=headers or {},
+                               params=params, body=b"")
+    with profile() as queries:
+        response = module.main(request)
+    table = re.compile(rf"\b{module.__name__}\b")
+    return response, [sql for sql in queries.statements if table.search(sql)]
+
+
+def check_rejected_before_queries():
+    cursor = encode_cursor(datetime(2026, 1, 1), "abc")
+    admin = {"Authorization": "Bearer " + create_access_token(
+        {"sub": "check", "email": "check@localhost", "role": "admin", "name": "Check"}
+    )}
+    cases = [
+        (properties, {"cursor": cursor, "search": "plot"}, None),
+        (properties, {"cursor": cursor, "sort": "price_per_sqft"}, None),
+        (properties, {"cursor": "***", "includeTotal": "true"}, None),
+        (properties, {"cursor": cursor, "sort": "price_asc", "includeTotal": "true"}, None),
+        (enquiries, {"cursor": "***", "includeTotal": "true"}, admin),
+    ]
+    for module, params, headers in cases:
+        response, statements = get(module, params, headers)
+        assert response.status_code == 400, f"❌ {params}: expected 400, got {response.status_code}"
+        assert not statements, f"❌ {params}: queried {module.__name__} before rejecting: {statements}"
+    print(f"✅ {len(cases)} invalid cursor requests rejected with 400 before querying the table")
+
+
+if __name__ == "__main__":
+    check_cursors()
+    check_rejected_before_queries()
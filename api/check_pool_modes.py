@@ -0,0 +1,81 @@
+"""Compare the DB_POOL_MODE settings under concurrent load
+
+Builds an engine per mode against DATABASE_URL (from .env) and runs the
+same burst of short transactions through it from many threads, the way a
+busy worker would. Reports throughput, latency, checkout waits and how
+many server connections each mode opened, and checks that no checkout
+timed out and every connection was returned.
+
+The pgbouncer mode only differs in how the statement timeout is applied;
+against plain Postgres it measures the pool itself.
+
+    python check_pool_modes.py [threads] [transactions per thread]
+"""
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import event, text
+from config import settings
+import db_pool
+
+
+def run_transaction(engine) -> float:
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT value FROM stat_counters WHERE key = 'enquiries'")).first()
+    return time.perf_counter() - started
+
+
+def load(mode: str, threads: int, per_thread: int) -> dict:
+    settings.DB_POOL_MODE = mode
+    engine = db_pool.build_engine()
+    connections = [0]
+    event.listen(engine, "connect", lambda *args: connections.__setitem__(0, connections[0] + 1))
+
+    with db_pool._stats_lock:
+        db_pool._stats.update({key: 0 for key in db_pool._stats})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(lambda _: run_transaction(engine), range(threads * per_thread)))
+    elapsed = time.perf_counter() - started
+
+    stats = db_pool.pool_stats(engine)
+    engine.dispose()
+    latencies.sort()
+    return {
+        "tx_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "connections": connections[0],
+        **stats
+    }
+
+
+def check_pool_modes(threads=20, per_thread=50):
+    original_mode = settings.DB_POOL_MODE
+    pool_limit = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    print(f"{threads} threads x {per_thread} transactions, pool {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW}")
+    print(f"{'mode':<10} {'tx/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'avg wait':>9} {'max wait':>9} "
+          f"{'peak':>5} {'conns':>6} {'timeouts':>8}")
+    try:
+        for mode in db_pool.POOL_MODES:
+            result = load(mode, threads, per_thread)
+            print(f"{mode:<10} {result['tx_per_s']:8.0f} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} "
+                  f"{result['avg_wait_ms']:9.2f} {result['max_wait_ms']:9.2f} {result['peak_in_use']:5} "
+                  f"{result['connections']:6} {result['timeouts']:8}")
+
+            assert result["timeouts"] == 0, f"❌ {mode}: {result['timeouts']} checkouts timed out"
+            assert result["in_use"] == 0, f"❌ {mode}: {result['in_use']} connections not returned"
+            if mode != "null":
+                assert result["connections"] <= pool_limit, \
+                    f"❌ {mode}: opened {result['connections']} connections (limit {pool_limit})"
+                assert result["peak_in_use"] <= pool_limit, f"❌ {mode}: pool exceeded its limit"
+    finally:
+        settings.DB_POOL_MODE = original_mode
+    print("✅ No checkout timeouts, pooled modes stayed within DB_POOL_SIZE + DB_MAX_OVERFLOW connections")
+
+
+if __name__ == "__main__":
+    check_pool_modes(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,125 @@
+"""Benchmark property search against the old ilike path at 10k and 100k properties
+
+Seeds generated properties with listing-length descriptions into
+DATABASE_URL (from .env), then times the first page plus the match count
+for a few searches two ways: the indexed full-text search in search.py,
+and the three ilike('%term%') predicates it replaced. Also checks that
+prefix and whole-word searches find the same seeded listings as ilike.
+The seeded rows are deleted afterwards.
+
+    python upgrade_db.py                # search_vector, its GIN index and pg_trgm indexes
+    python check_property_search.py [runs]
+"""
+import statistics
+import sys
+import time
+from sqlalchemy import func, or_, text
+from models import engine, SessionLocal, Property
+from search import apply_property_search, trigram_available
+
+SEED_PREFIX = "chksrch-"
+SIZES = (10000, 100000)
+PAGE_SIZE = 20
+# (search text, what it exercises)
+SEARCHES = [
+    ("garden", "rare title word"),
+    ("river", "common description word"),
+    ("town 17", "location, two terms"),
+    ("agri", "prefix"),
+]
+
+
+def seed(start, end):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO properties (id, title, slug, description, price, area, location, type, status,
+                                    featured, images, created_at, updated_at)
+            SELECT :prefix || n, 'Plot ' || n || (CASE WHEN n % 500 = 0 THEN ' garden view' ELSE '' END),
+                   :prefix || n,
+                   'Generated listing ' || n || ' near the '
+                   || (ARRAY['highway', 'river', 'temple', 'school', 'market'])[1 + n % 5]
+                   || (CASE WHEN n % 7 = 0 THEN ', suited to agriculture. ' ELSE '. ' END)
+                   || repeat('Clear title, approved layout, water and power connections available. ', 8),
+                   100000 + (n * 7919) % 10000000, ((n * 13) % 20000) || ' sqft', 'Town ' || (n % 200),
+                   (ARRAY['RESIDENTIAL', 'AGRICULTURAL', 'COMMERCIAL'])[1 + n % 3]::propertytype,
+                   'AVAILABLE'::propertystatus, false, '[]', now() - n * interval '10 minutes', now()
+            FROM generate_series(:start, :end) AS n
+        """), {"prefix": SEED_PREFIX, "start": start, "end": end})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE properties"))
+
+
+def unseed():
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM properties WHERE id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE properties"))
+
+
+def full_text(db, search):
+    return apply_property_search(db, db.query(Property.id), search)
+
+
+def ilike(db, search):
+    """The search the full-text path replaced"""
+    pattern = f"%{search}%"
+    return db.query(Property.id).filter(or_(
+        Property.title.ilike(pattern),
+        Property.description.ilike(pattern),
+        Property.location.ilike(pattern)
+    )).order_by(Property.created_at.desc())
+
+
+def timed_ms(db, query, runs):
+    """Median time for the first page plus the total, as the listing asks for them"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        query.limit(PAGE_SIZE).all()
+        db.query(func.count()).select_from(query.order_by(None).subquery()).scalar()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def seeded_ids(query):
+    return {id_ for id_, in query if id_.startswith(SEED_PREFIX)}
+
+
+def check_matches(db):
+    garden = seeded_ids(full_text(db, "garden"))
+    assert garden and garden == seeded_ids(ilike(db, "garden")), "❌ Full-text and ilike disagree on 'garden'"
+    assert seeded_ids(full_text(db, "gard")) >= garden, "❌ Prefix search missed whole-word matches"
+    river = seeded_ids(full_text(db, "river"))
+    assert river == seeded_ids(ilike(db, "river")), "❌ Full-text and ilike disagree on a description word"
+    print(f"✅ Full-text search finds the same listings as ilike ({len(garden)} garden, {len(river)} river)")
+
+    if trigram_available(db):
+        assert seeded_ids(full_text(db, "gardne")) >= garden, "❌ Typo search missed 'garden'"
+        print("✅ Misspelt search still finds its listings (pg_trgm)")
+    else:
+        print("⚠ pg_trgm not installed: typo tolerance not checked")
+
+
+def check_property_search(runs=5):
+    db = SessionLocal()
+    seeded = 0
+    try:
+        for size in SIZES:
+            seed(seeded + 1, size)
+            seeded = size
+            if size == SIZES[0]:
+                check_matches(db)
+
+            print(f"{size} seeded properties, median of {runs} (first {PAGE_SIZE} + count):")
+            for search, label in SEARCHES:
+                old = timed_ms(db, ilike(db, search), runs)
+                new = timed_ms(db, full_text(db, search), runs)
+                print(f"  {search!r:10} {label:24} ilike {old:8.1f} ms   full-text {new:8.1f} ms   "
+                      f"{old / new:5.1f}x")
+    finally:
+        db.close()
+        unseed()
+
+
+if __name__ == "__main__":
+    check_property_search(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,41 @@
+"""Check the enquiry token-bucket limiter (no database needed)
+
+    python check_rate_limit.py
+"""
+from unittest import mock
+from rate_limit import TokenBucketLimiter, MAX_RETRY_AFTER_SECONDS
+
+
+def check_rate_limit():
+    clock = [1000.0]
+    with mock.patch("rate_limit.time.monotonic", lambda: clock[0]):
+        limiter = TokenBucketLimiter(per_minute=6, burst=3)
+        assert [limiter.acquire("a") for _ in range(3)] == [0, 0, 0], "❌ Burst not allowed"
+        assert limiter.acquire("a") == 10, "❌ Empty bucket should wait 60/6 seconds"
+        assert limiter.acquire("b") == 0, "❌ Keys share a bucket"
+
+        clock[0] += 10
+        assert limiter.acquire("a") == 0, "❌ Bucket did not refill one token after 10s"
+        assert limiter.acquire("a") > 0, "❌ Refill gave more than one token"
+
+        clock[0] += 3600
+        assert [limiter.acquire("a") for _ in range(4)][:3] == [0, 0, 0], "❌ Refill exceeded or missed the burst"
+        print("✅ Burst, refill and per-key buckets")
+
+        disabled = TokenBucketLimiter(per_minute=0, burst=5)
+        assert all(disabled.acquire("a") == 0 for _ in range(100)), "❌ per_minute=0 should disable the limiter"
+        print("✅ per_minute=0 disables the limiter")
+
+        slow = TokenBucketLimiter(per_minute=0.001, burst=0)
+        assert slow.acquire("a") == MAX_RETRY_AFTER_SECONDS, "❌ Retry-After not capped"
+        print(f"✅ Retry-After capped at {MAX_RETRY_AFTER_SECONDS}s")
+
+        small = TokenBucketLimiter(per_minute=60, burst=1, max_keys=2)
+        for key in "abc":
+            small.acquire(key)
+        assert len(small._buckets) == 2 and "a" not in small._buckets, "❌ Buckets not capped at max_keys"
+        print("✅ Buckets capped at max_keys")
+
+
+if __name__ == "__main__":
+    check_rate_limit()
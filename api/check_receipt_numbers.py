@@ -0,0 +1,62 @@
+"""Check that concurrent receipt number allocations are unique and gap-free
+
+Runs against DATABASE_URL (from .env). Uses a far-future month and removes
+its counter row afterwards, so real receipt numbering is untouched.
+
+    python check_receipt_numbers.py [transactions] [threads]
+"""
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from models import SessionLocal, ReceiptSequence
+from receipt_numbers import allocate_receipt_numbers, receipt_period, format_receipt_number
+
+TEST_MONTH = datetime(2099, 12, 1)
+
+
+def allocate(i):
+    """One transaction; every 5th one allocates a batch, every 7th rolls back"""
+    db = SessionLocal()
+    try:
+        numbers = allocate_receipt_numbers(db, 3 if i % 5 == 0 else 1, TEST_MONTH)
+        if i % 7 == 0:
+            db.rollback()
+            return []
+        db.commit()
+        return numbers
+    finally:
+        db.close()
+
+
+def clear_test_period():
+    db = SessionLocal()
+    try:
+        db.query(ReceiptSequence).filter(ReceiptSequence.period == receipt_period(TEST_MONTH)).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def check_receipt_numbers(transactions=50, threads=8):
+    clear_test_period()
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(allocate, range(transactions)))
+
+        numbers = [number for batch in results for number in batch]
+        period = receipt_period(TEST_MONTH)
+        expected = [format_receipt_number(period, n) for n in range(1, len(numbers) + 1)]
+
+        assert len(set(numbers)) == len(numbers), "❌ Duplicate receipt numbers"
+        assert sorted(numbers) == expected, "❌ Receipt numbers are not contiguous"
+        for batch in results:
+            assert batch == sorted(batch), "❌ Batch numbers are out of order"
+
+        print(f"✅ {transactions} concurrent transactions committed {len(numbers)} unique, contiguous numbers")
+        print(f"   {expected[0]} .. {expected[-1]}")
+    finally:
+        clear_test_period()
+
+
+if __name__ == "__main__":
+    check_receipt_numbers(*[int(arg) for arg in sys.argv[1:3]])
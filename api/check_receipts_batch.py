@@ -0,0 +1,126 @@
+"""Check that concurrent and retried receipt batches issue one receipt per transaction
+
+Seeds income transactions into DATABASE_URL (from .env) and sends
+overlapping batches for them from several threads at once, each batch
+twice, the way a double-clicked or retried request would arrive. Numbers
+come from a far-future month so real receipt numbering is untouched; the
+seeded transactions, their receipts and the month's counter row are
+removed afterwards.
+
+    python check_receipts_batch.py [transactions] [threads]
+"""
+import json
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+import azure.functions as func
+from sqlalchemy import text
+from models import engine, SessionLocal, AdminUser
+from receipt_numbers import allocate_receipt_numbers, receipt_period, format_receipt_number
+from utils import create_access_token
+import receipts
+import receipts_batch
+
+SEED_PREFIX = "chkrcb-"
+TEST_MONTH = datetime(2099, 11, 1)
+BATCH_SIZE = 60
+
+
+def seed(count):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO transactions (id, type, category, amount, description, payment_method,
+                                      customer_name, transaction_date, created_at, updated_at)
+            SELECT :prefix || lpad(n::text, 5, '0'), 'INCOME'::transactiontype,
+                   'PROPERTY_SALE'::transactioncategory, 1000 + n, 'Generated transaction ' || n,
+                   'UPI'::paymentmethod, 'Customer ' || n, now(), now(), now()
+            FROM generate_series(1, :count) AS n
+        """), {"prefix": SEED_PREFIX, "count": count})
+
+
+def unseed():
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM receipts WHERE transaction_id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+        conn.execute(text("DELETE FROM transactions WHERE id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+        conn.execute(text("DELETE FROM receipt_sequences WHERE period = :period"),
+                     {"period": receipt_period(TEST_MONTH)})
+
+
+def admin_headers():
+    db = SessionLocal()
+    try:
+        admin = db.query(AdminUser).first()
+    finally:
+        db.close()
+    token = create_access_token({
+        "sub": admin.id if admin else "check", "email": "check@localhost", "role": "admin", "name": "Check"
+    })
+    return {"Authorization": f"Bearer {token}"}
+
+
+def post(module, body, headers):
+    request = func.HttpRequest(method="POST", url="http://localhost/api/v1", headers=headers,
+                               params={}, body=json.dumps(body).encode())
+    return module.main(request)
+
+
+def check_receipts_batch(count=200, threads=8):
+    ids = [f"{SEED_PREFIX}{n:05d}" for n in range(1, count + 1)]
+    # Windows overlap by two thirds, and every window is sent twice
+    step = BATCH_SIZE // 3
+    batches = [ids[start:start + BATCH_SIZE] for start in range(0, count, step)] * 2
+    allocations = Counter()
+
+    def allocate(db, n=1):
+        allocations[n] += 1
+        return allocate_receipt_numbers(db, n, TEST_MONTH)
+
+    seed(count)
+    try:
+        headers = admin_headers()
+        with mock.patch("receipts_batch.allocate_receipt_numbers", allocate), \
+                ThreadPoolExecutor(max_workers=threads) as pool:
+            responses = list(pool.map(lambda batch: post(receipts_batch, {"transaction_ids": batch}, headers),
+                                      batches))
+
+        results = []
+        for response in responses:
+            assert response.status_code in (200, 201), f"❌ {response.status_code} {response.get_body()[:200]}"
+            results.extend(json.loads(response.get_body())["results"])
+
+        created = [result for result in results if result["status"] == "created"]
+        skipped = [result for result in results if result["status"] != "created"]
+        assert sorted(result["transaction_id"] for result in created) == ids, \
+            "❌ Transactions were not issued exactly one receipt between them"
+        assert all(result["error"] == "Receipt already issued" for result in skipped), \
+            f"❌ Unexpected skip reasons: {Counter(result['error'] for result in skipped)}"
+
+        period = receipt_period(TEST_MONTH)
+        numbers = sorted(result["receipt_number"] for result in created)
+        assert numbers == [format_receipt_number(period, n) for n in range(1, count + 1)], \
+            "❌ Issued receipt numbers are not contiguous"
+
+        with engine.connect() as conn:
+            stored = conn.execute(text(
+                "SELECT count(*), count(DISTINCT transaction_id) FROM receipts WHERE transaction_id LIKE :prefix"
+            ), {"prefix": SEED_PREFIX + "%"}).one()
+        assert tuple(stored) == (count, count), f"❌ Stored receipts {tuple(stored)}, expected {count} each"
+
+        retries = sum(allocations.values()) - sum(1 for response in responses if response.status_code == 201)
+        print(f"✅ {len(batches)} overlapping batches from {threads} threads issued {count} receipts, "
+              f"one per transaction, numbered without gaps ({retries} conflicting inserts retried)")
+
+        response = post(receipts, {
+            "transaction_id": ids[0], "customer_name": "Customer 1", "amount": 1001,
+            "description": "Duplicate", "issue_date": "2099-11-02T00:00:00"
+        }, headers)
+        assert response.status_code == 409, f"❌ Second receipt for a transaction: {response.status_code}"
+        print("✅ POST /receipts refuses a second receipt for a transaction with 409")
+    finally:
+        unseed()
+
+
+if __name__ == "__main__":
+    check_receipts_batch(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,148 @@
+"""Check the shared serializers and time them against the per-handler code they replaced
+
+Works on in-memory model instances, so it needs no database. The "before"
+functions are the property and enquiry conversions the handlers used to
+carry, followed by stdlib json.dumps.
+
+    python check_serializers.py [rows]
+"""
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+import orjson
+from models import Property, PropertyType, PropertyStatus, Enquiry, EnquiryType, EnquiryStatus
+from serializers import property_serializer, enquiry_serializer, PROPERTY_VIEWS
+from properties import parse_property_fields
+
+
+def _enum_value(value):
+    return value.value if value else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+OLD_PROPERTY_FIELDS = {
+    "id": ("id", None), "title": ("title", None), "slug": ("slug", None),
+    "description": ("description", None), "shortDescription": ("short_description", None),
+    "price": ("price", None), "pricePerSqFt": ("price_per_sqft", None), "area": ("area", None),
+    "areaInSqFt": ("area_in_sqft", None), "location": ("location", None),
+    "fullAddress": ("full_address", None), "googleMapsLink": ("google_maps_link", None),
+    "type": ("type", _enum_value), "status": ("status", _enum_value), "featured": ("featured", None),
+    "images": ("images", lambda v: v or []), "amenities": ("amenities", lambda v: v or []),
+    "highlights": ("highlights", lambda v: v or []), "legalInfo": ("legal_info", lambda v: v or {}),
+    "nearbyPlaces": ("nearby_places", lambda v: v or []),
+    "createdAt": ("created_at", _isoformat), "updatedAt": ("updated_at", _isoformat)
+}
+
+
+def old_property(prop, fields=OLD_PROPERTY_FIELDS):
+    data = {}
+    for field in fields:
+        attr, convert = OLD_PROPERTY_FIELDS[field]
+        value = getattr(prop, attr)
+        data[field] = convert(value) if convert else value
+    return data
+
+
+def old_enquiry(enq):
+    return {
+        "id": enq.id,
+        "type": enq.type.value if hasattr(enq.type, 'value') else str(enq.type) if enq.type else None,
+        "name": enq.name,
+        "email": enq.email,
+        "phone": enq.phone,
+        "message": enq.message,
+        "preferredTime": enq.preferred_time,
+        "propertyId": enq.property_id,
+        "status": enq.status.value if hasattr(enq.status, 'value') else str(enq.status) if enq.status else None,
+        "notes": enq.notes,
+        "createdAt": enq.created_at.isoformat() if enq.created_at else None,
+        "updatedAt": enq.updated_at.isoformat() if enq.updated_at else None
+    }
+
+
+def make_rows(count):
+    started = datetime(2026, 1, 1, 9, 0, 0, 123456)
+    properties = [Property(
+        id=f"prop-{n}", title=f"Plot {n}", slug=f"plot-{n}", description="Clear title, approved layout. " * 10,
+        short_description="Corner plot", price=1500000.0 + n, price_per_sqft=1250.0, area="1200 sqft",
+        area_in_sqft=1200, location="Ranchi", full_address=None, google_maps_link=None,
+        type=PropertyType.RESIDENTIAL, status=PropertyStatus.AVAILABLE, featured=n % 10 == 0,
+        images=["a.jpg", "b.jpg"] if n % 2 else None, amenities=["water"], highlights=None,
+        legal_info={"rera": "approved"}, nearby_places=[], created_at=started + timedelta(minutes=n),
+        updated_at=started + timedelta(minutes=n)
+    ) for n in range(count)]
+    enquiries = [Enquiry(
+        id=f"enq-{n}", type=EnquiryType.CALLBACK, name=f"Name {n}", email=None, phone="9000000000",
+        message="Please call back", preferred_time="Evening", property_id=f"prop-{n}",
+        status=EnquiryStatus.PENDING, notes=None, created_at=started + timedelta(minutes=n),
+        updated_at=None
+    ) for n in range(count)]
+    return properties, enquiries
+
+
+def check_output(properties, enquiries):
+    assert orjson.loads(orjson.dumps(property_serializer.many(properties))) == \
+        json.loads(json.dumps([old_property(prop) for prop in properties])), "❌ Property JSON changed"
+    assert orjson.loads(orjson.dumps(enquiry_serializer.many(enquiries))) == \
+        json.loads(json.dumps([old_enquiry(enq) for enq in enquiries])), "❌ Enquiry JSON changed"
+    print("✅ Shared serializers produce the same JSON as the per-handler code")
+
+
+def check_field_selection(prop):
+    card = property_serializer.only(PROPERTY_VIEWS["card"])
+    assert tuple(card(prop)) == PROPERTY_VIEWS["card"], "❌ Card view keys or order"
+    assert card is property_serializer.only(PROPERTY_VIEWS["card"]), "❌ Selections are not cached"
+    assert property_serializer.only(("id",))(prop) == {"id": prop.id}, "❌ Single-field selection"
+
+    prop.images = None
+    assert property_serializer.only(("images", "price"))(prop) == {"images": [], "price": prop.price}, \
+        "❌ Defaults not applied in a selection"
+
+    assert parse_property_fields("id, price,title", None) == ["id", "price", "title"], "❌ fields= parsing"
+    assert parse_property_fields(None, "card") == list(PROPERTY_VIEWS["card"]), "❌ view= parsing"
+    assert parse_property_fields(None, None) is None, "❌ No selection should mean all fields"
+    for fields, view in (("id,secret", None), (None, "full")):
+        try:
+            parse_property_fields(fields, view)
+        except ValueError:
+            continue
+        raise AssertionError(f"❌ Accepted fields={fields} view={view}")
+    print("✅ Field selection: views, fields=, cached subsets, defaults and unknown names")
+
+
+def per_1k_ms(statement, rows) -> float:
+    number = 20
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number / rows * 1000 * 1000
+
+
+def benchmark(properties, enquiries):
+    rows = len(properties)
+    card_fields = PROPERTY_VIEWS["card"]
+    card = property_serializer.only(card_fields)
+    cases = [
+        ("properties, all fields",
+         lambda: json.dumps([old_property(prop) for prop in properties]),
+         lambda: orjson.dumps(property_serializer.many(properties))),
+        ("properties, card view",
+         lambda: json.dumps([old_property(prop, card_fields) for prop in properties]),
+         lambda: orjson.dumps(card.many(properties))),
+        ("enquiries",
+         lambda: json.dumps([old_enquiry(enq) for enq in enquiries]),
+         lambda: orjson.dumps(enquiry_serializer.many(enquiries))),
+    ]
+    print(f"Serialize + encode, ms per 1k rows ({rows} rows):")
+    for label, before, after in cases:
+        old = per_1k_ms(before, rows)
+        new = per_1k_ms(after, rows)
+        print(f"  {label:24} before {old:6.2f}   after {new:6.2f}   {old / new:4.1f}x")
+
+
+if __name__ == "__main__":
+    properties, enquiries = make_rows(*[int(arg) for arg in sys.argv[1:2]] or [1000])
+    check_output(properties, enquiries)
+    benchmark(properties, enquiries)
+    check_field_selection(properties[0])
@@ -0,0 +1,157 @@
+"""Check /transactions/summary against a client-side sum and time it at scale
+
+Seeds generated transactions dated 2090-2091 into DATABASE_URL (from .env),
+asks the summary function for every period type over that range, and
+compares each breakdown with the same figures added up in Python from the
+raw rows - what the admin frontend used to do after downloading them.
+The seeded rows are deleted afterwards.
+
+    python check_transactions_summary.py [transactions]
+"""
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+import azure.functions as func
+from sqlalchemy import select, text
+from models import engine, SessionLocal, AdminUser, Transaction, TransactionType
+from utils import create_access_token
+from transactions_summary import PERIODS, period_label
+import transactions_summary
+
+SEED_PREFIX = "chksum-"
+RANGE = {"start_date": "2090-01-01T00:00:00", "end_date": "2091-12-31T23:59:59"}
+
+
+def seed(count):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO transactions (id, type, category, amount, payment_method, transaction_date,
+                                      created_at, updated_at)
+            SELECT :prefix || n,
+                   (CASE WHEN n % 3 = 0 THEN 'EXPENSE' ELSE 'INCOME' END)::transactiontype,
+                   (CASE WHEN n % 3 = 0 THEN (ARRAY['MARKETING', 'SALARY', 'MAINTENANCE'])[1 + n % 9 / 3]
+                         ELSE (ARRAY['PROPERTY_SALE', 'COMMISSION'])[1 + n % 2] END)::transactioncategory,
+                   1000 + n % 100000,
+                   (ARRAY['UPI', 'CASH', 'BANK_TRANSFER', NULL])[1 + n % 4]::paymentmethod,
+                   timestamp '2090-01-01' + n * (interval '2 years' / :count), now(), now()
+            FROM generate_series(1, :count) AS n
+        """), {"prefix": SEED_PREFIX, "count": count})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE transactions"))
+
+
+def unseed():
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM transactions WHERE id LIKE :prefix"), {"prefix": SEED_PREFIX + "%"})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE transactions"))
+
+
+def admin_headers():
+    db = SessionLocal()
+    try:
+        admin = db.query(AdminUser).first()
+    finally:
+        db.close()
+    token = create_access_token({
+        "sub": admin.id if admin else "check", "email": "check@localhost", "role": "admin", "name": "Check"
+    })
+    return {"Authorization": f"Bearer {token}"}
+
+
+def check_labels():
+    cases = [
+        ("month", datetime(2026, 3, 1), "2026-03"),
+        ("quarter", datetime(2026, 4, 1), "Q1 FY2026-27"),
+        ("quarter", datetime(2026, 1, 1), "Q4 FY2025-26"),
+        ("fy", datetime(2026, 4, 1), "FY2026-27"),
+        ("fy", datetime(2027, 3, 31), "FY2026-27"),
+        ("fy", datetime(2099, 4, 1), "FY2099-00"),
+    ]
+    for period, start, expected in cases:
+        assert period_label(period, start) == expected, f"❌ {period} {start}: {period_label(period, start)}"
+    print("✅ Month, quarter and April-March financial year labels")
+
+
+def summarize(params, headers):
+    request = func.HttpRequest(method="GET", url="http://localhost/api/v1/transactions/summary",
+                               headers=headers, params=params, body=b"")
+    started = time.perf_counter()
+    response = transactions_summary.main(request)
+    seconds = time.perf_counter() - started
+    assert response.status_code == 200, f"❌ {params}: {response.status_code} {response.get_body()[:200]}"
+    return json.loads(response.get_body()), seconds
+
+
+def client_side(period):
+    """Download the rows and add them up, the way the frontend used to"""
+    start, end = (datetime.fromisoformat(RANGE[key]) for key in ("start_date", "end_date"))
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(
+            Transaction.type, Transaction.category, Transaction.payment_method,
+            Transaction.amount, Transaction.transaction_date
+        ).where(Transaction.transaction_date >= start, Transaction.transaction_date <= end)).all()
+    finally:
+        db.close()
+
+    breakdowns = defaultdict(lambda: defaultdict(lambda: [0.0, 0.0, 0]))
+    for type_, category, payment_method, amount, date in rows:
+        month = date.month if period == "month" else (date.month - 1) // 3 * 3 + 1
+        keys = {
+            "by_period": period_label(period, datetime(date.year, month, 1)),
+            "by_category": category.value,
+            "by_payment_method": payment_method.value if payment_method else None,
+            "totals": None,
+        }
+        for breakdown, key in keys.items():
+            figures = breakdowns[breakdown][key]
+            figures[0 if type_ == TransactionType.INCOME else 1] += amount
+            figures[2] += 1
+    return breakdowns
+
+
+def assert_matches(period, summary, expected):
+    def same(item, figures):
+        income, expense, count = figures
+        return abs(item["income"] - income) < 0.01 and abs(item["expense"] - expense) < 0.01 \
+            and item["count"] == count
+
+    assert same(summary["totals"], expected["totals"][None]), f"❌ {period} totals"
+    for breakdown, key in (("by_period", "period"), ("by_category", "category"),
+                           ("by_payment_method", "payment_method")):
+        items = {item[key]: item for item in summary[breakdown]}
+        assert items.keys() == expected[breakdown].keys(), f"❌ {period} {breakdown} groups differ"
+        for group, figures in expected[breakdown].items():
+            assert same(items[group], figures), f"❌ {period} {breakdown} {group}"
+
+
+def check_transactions_summary(count=1000000, runs=3):
+    check_labels()
+    seed(count)
+    try:
+        headers = admin_headers()
+        print(f"{count} transactions over two years, median of {runs}:")
+        for period in PERIODS:
+            timings = []
+            for _ in range(runs):
+                summary, seconds = summarize({**RANGE, "period": period}, headers)
+                timings.append(seconds)
+
+            started = time.perf_counter()
+            expected = client_side(period)
+            client_seconds = time.perf_counter() - started
+
+            assert_matches(period, summary, expected)
+            print(f"  {period:8} /transactions/summary {statistics.median(timings) * 1000:8.0f} ms   "
+                  f"download and sum {client_seconds * 1000:8.0f} ms   {len(summary['by_period'])} periods")
+        print("✅ Every breakdown matches the client-side sum")
+    finally:
+        unseed()
+
+
+if __name__ == "__main__":
+    check_transactions_summary(*[int(arg) for arg in sys.argv[1:2]])
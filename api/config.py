@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -6,14 +7,59 @@ load_dotenv()
 class Settings:
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/dreamladder")
+    # Connection pool (see db_pool.py): queue | null | pgbouncer (PgBouncer in transaction mode)
+    DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; replace before Azure's idle cut-off
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 = no limit
+    # SQL profiling (see sql_profiler.py): per-request statement counts and time,
+    # sent in Server-Timing; strict budgets fail requests that run too many statements
+    SQL_PROFILING = os.getenv("SQL_PROFILING", "true").lower() == "true"
+    SQL_PROFILE_SLOWEST = int(os.getenv("SQL_PROFILE_SLOWEST", "3"))
+    SQL_PROFILE_STATEMENT_LENGTH = int(os.getenv("SQL_PROFILE_STATEMENT_LENGTH", "300"))
+    SQL_SLOW_REQUEST_MS = int(os.getenv("SQL_SLOW_REQUEST_MS", "500"))  # log the profile of requests slower than this in the database
+    SQL_QUERY_BUDGET_STRICT = os.getenv("SQL_QUERY_BUDGET_STRICT", "false").lower() == "true"
     
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-this-secret-key")
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
+    JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "1024"))  # verified tokens kept in memory
+    REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "5"))  # how stale another instance's logout may be
+    ADMIN_PROFILE_CACHE_SECONDS = int(os.getenv("ADMIN_PROFILE_CACHE_SECONDS", "60"))  # /auth/me profile cache
+    
+    # Password hashing (bcrypt cost; checks run on a bounded pool, extra logins get 429)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "8"))
     
     # CORS
     ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
+    CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", "86400"))  # seconds browsers may cache a preflight
+    
+    # HTTP caching (seconds shared caches/CDNs may serve public responses)
+    PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "60"))
+    
+    # Public enquiries: queue locally and batch-insert instead of committing per request
+    ENQUIRY_WRITE_BEHIND = os.getenv("ENQUIRY_WRITE_BEHIND", "false").lower() == "true"
+    ENQUIRY_QUEUE_PATH = os.getenv("ENQUIRY_QUEUE_PATH", os.path.join(tempfile.gettempdir(), "enquiry-queue.sqlite3"))
+    ENQUIRY_FLUSH_INTERVAL_MS = int(os.getenv("ENQUIRY_FLUSH_INTERVAL_MS", "500"))
+    ENQUIRY_FLUSH_BATCH_SIZE = int(os.getenv("ENQUIRY_FLUSH_BATCH_SIZE", "200"))
+    
+    # Public enquiries: repeats from the same phone/property within the window
+    # return the existing enquiry; submissions are rate limited per connecting
+    # address (the X-Forwarded-For hop appended by the platform front end)
+    ENQUIRY_DUPLICATE_WINDOW_MINUTES = int(os.getenv("ENQUIRY_DUPLICATE_WINDOW_MINUTES", "30"))
+    ENQUIRY_RATE_LIMIT_PER_MINUTE = int(os.getenv("ENQUIRY_RATE_LIMIT_PER_MINUTE", "10"))  # 0 disables the limiter
+    ENQUIRY_RATE_LIMIT_BURST = int(os.getenv("ENQUIRY_RATE_LIMIT_BURST", "5"))
+    
+    # Receipt PDFs (render cache directory and render worker processes)
+    RECEIPT_PDF_CACHE_DIR = os.getenv("RECEIPT_PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "receipt-pdfs"))
+    PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "2"))
+    RECEIPT_PDF_CACHE_MAX_MB = int(os.getenv("RECEIPT_PDF_CACHE_MAX_MB", "200"))  # least recently used PDFs are pruned past this
     
     # Admin
     ADMIN_EMAIL = os.getenv("ADMIN_EMAIL", "admin@dreamladder.com")
@@ -25,5 +71,16 @@ class Settings:
     SMTP_USER = os.getenv("SMTP_USER", "")
     SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
     EMAIL_FROM = os.getenv("EMAIL_FROM", "noreply@dreamladder.com")
+    SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+    
+    # Enquiry notifications: queued in email_outbox with the enquiry, sent by the email_sender function
+    EMAIL_NOTIFICATIONS = os.getenv("EMAIL_NOTIFICATIONS", "false").lower() == "true"
+    NOTIFICATION_EMAIL = os.getenv("NOTIFICATION_EMAIL", ADMIN_EMAIL)
+    # Customer acknowledgements go to an address typed into the anonymous form; off unless opted in
+    ENQUIRY_ACKNOWLEDGEMENT_EMAILS = os.getenv("ENQUIRY_ACKNOWLEDGEMENT_EMAILS", "false").lower() == "true"
+    EMAIL_SEND_BATCH_SIZE = int(os.getenv("EMAIL_SEND_BATCH_SIZE", "50"))
+    EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "6"))
+    EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+    EMAIL_PER_RECIPIENT_HOURLY = int(os.getenv("EMAIL_PER_RECIPIENT_HOURLY", "20"))
 
 settings = Settings()
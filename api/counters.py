@@ -0,0 +1,179 @@
+"""Incrementally maintained counters for the admin dashboard
+
+Every flush that inserts, updates or deletes a Property or Enquiry through
+an ORM session adds the matching deltas to `stat_counters` in the same
+transaction, so the dashboard reads a handful of rows instead of counting
+whole tables. Keys look like:
+
+    properties, properties:status:sold, properties:type:commercial
+    enquiries, enquiries:status:pending, enquiries:type:callback,
+    enquiries:month:2026-03
+
+properties:version is not a count: it goes up by one in the transaction
+of every property write, so readers on any instance can use it (and its
+updated_at) as the listing's validator. reconcile() leaves it alone.
+
+Bulk UPDATE/DELETE statements bypass the session hooks and must call
+apply_deltas() themselves. reconcile() (run via reconcile_counters.py)
+rebuilds the table from scratch.
+"""
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, inspect, select, func as sql_func, text
+from sqlalchemy.dialects.postgresql import insert
+from models import SessionLocal, Property, PropertyStatus, Enquiry, EnquiryStatus, StatCounter
+
+LISTING_VERSION_KEY = "properties:version"
+
+
+def _value(value):
+    # Enum members, their values and their names all normalise to the value
+    return str(getattr(value, "value", value)).lower()
+
+
+def property_keys(status, type_) -> list:
+    return [
+        "properties",
+        f"properties:status:{_value(status)}",
+        f"properties:type:{_value(type_)}"
+    ]
+
+
+def enquiry_keys(status, type_, created_at) -> list:
+    return [
+        "enquiries",
+        f"enquiries:status:{_value(status)}",
+        f"enquiries:type:{_value(type_)}",
+        f"enquiries:month:{created_at:%Y-%m}"
+    ]
+
+
+def type_key(type_) -> str:
+    return f"enquiries:type:{_value(type_)}"
+
+
+def month_key(month_start: datetime) -> str:
+    return f"enquiries:month:{month_start:%Y-%m}"
+
+
+def _keys_for(obj, old: bool = False) -> list:
+    """Counter keys for an object's current (or pre-flush) state"""
+    state = inspect(obj)
+
+    def attr(name, default=None):
+        value = getattr(obj, name)
+        if old:
+            history = state.attrs[name].history
+            if history.deleted:
+                value = history.deleted[0]
+        return value if value is not None else default
+
+    if isinstance(obj, Property):
+        return property_keys(attr("status", PropertyStatus.AVAILABLE), attr("type"))
+    return enquiry_keys(attr("status", EnquiryStatus.PENDING), attr("type"), attr("created_at", datetime.utcnow()))
+
+
+def _track_counter_changes(session, flush_context, instances):
+    deltas = Counter()
+
+    listing_changed = False
+
+    for obj in session.new:
+        if isinstance(obj, (Property, Enquiry)):
+            deltas.update(_keys_for(obj))
+            listing_changed |= isinstance(obj, Property)
+
+    for obj in session.dirty:
+        if isinstance(obj, (Property, Enquiry)) and session.is_modified(obj):
+            deltas.subtract(_keys_for(obj, old=True))
+            deltas.update(_keys_for(obj))
+            listing_changed |= isinstance(obj, Property)
+
+    for obj in session.deleted:
+        if isinstance(obj, (Property, Enquiry)):
+            deltas.subtract(_keys_for(obj, old=True))
+            listing_changed |= isinstance(obj, Property)
+
+    if listing_changed:
+        deltas[LISTING_VERSION_KEY] += 1
+
+    apply_deltas(session.connection(), deltas)
+
+
+event.listen(SessionLocal, "before_flush", _track_counter_changes)
+
+
+def apply_deltas(connection, deltas: dict):
+    """Add deltas to their counters in one upsert (keys sorted to avoid deadlocks)"""
+    rows = [
+        {"key": key, "value": delta, "updated_at": datetime.utcnow()}
+        for key, delta in sorted(deltas.items()) if delta
+    ]
+    if not rows:
+        return
+
+    stmt = insert(StatCounter).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StatCounter.key],
+        set_={"value": StatCounter.value + stmt.excluded.value, "updated_at": stmt.excluded.updated_at}
+    )
+    connection.execute(stmt)
+
+
+def read_counters(db, keys) -> dict:
+    """Read counters by key; missing keys read as 0"""
+    rows = db.execute(select(StatCounter.key, StatCounter.value).where(StatCounter.key.in_(list(keys))))
+    values = {key: 0 for key in keys}
+    values.update(dict(rows.all()))
+    return values
+
+
+def count_from_source(db) -> Counter:
+    """Recount every counter from the properties and enquiries tables"""
+    actual = Counter()
+
+    for status, type_, count in db.execute(
+        select(Property.status, Property.type, sql_func.count()).group_by(Property.status, Property.type)
+    ):
+        for key in property_keys(status, type_):
+            actual[key] += count
+
+    month = sql_func.date_trunc("month", Enquiry.created_at)
+    for status, type_, month_start, count in db.execute(
+        select(Enquiry.status, Enquiry.type, month, sql_func.count()).group_by(Enquiry.status, Enquiry.type, month)
+    ):
+        for key in enquiry_keys(status, type_, month_start):
+            actual[key] += count
+
+    return actual
+
+
+def reconcile(db) -> dict:
+    """
+    Rebuild stat_counters from scratch and return {key: (stored, actual)} drift.
+
+    Holds an exclusive lock on stat_counters while recounting, so writers
+    wait and then apply their deltas on top of the rebuilt totals.
+    """
+    db.execute(text("LOCK TABLE stat_counters IN EXCLUSIVE MODE"))
+
+    stored = dict(db.execute(
+        select(StatCounter.key, StatCounter.value).where(StatCounter.key != LISTING_VERSION_KEY)
+    ).all())
+    actual = count_from_source(db)
+
+    drift = {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in set(stored) | set(actual)
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+    db.execute(StatCounter.__table__.delete().where(StatCounter.key != LISTING_VERSION_KEY))
+    if actual:
+        now = datetime.utcnow()
+        db.execute(StatCounter.__table__.insert(), [
+            {"key": key, "value": value, "updated_at": now} for key, value in sorted(actual.items())
+        ])
+    db.commit()
+    return drift
+
@@ -1,95 +1,118 @@
 import azure.functions as func
-import json
-from models import SessionLocal, Property, Enquiry, EnquiryStatus
-from utils import get_current_user, create_response, create_error_response
-from datetime import datetime, timedelta
-from sqlalchemy import func as sql_func
+from models import Enquiry, EnquiryType
+from counters import read_counters, month_key, type_key
+from utils import create_response
+from pipeline import http_function, RequestContext
+from serializers import recent_enquiry_serializer, encode_response
+from datetime import datetime
+from sqlalchemy import select, and_, func as sql_func
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+DEFAULT_MONTHS = 6
+MAX_MONTHS = 24
+
+# granularity -> chart label format
+GRANULARITIES = {
+    "month": "%b %Y",
+    "week": "%d %b %Y"
+}
+
+COUNTER_KEYS = {
+    "totalProperties": "properties",
+    "availableProperties": "properties:status:available",
+    "soldProperties": "properties:status:sold",
+    "totalEnquiries": "enquiries",
+    "pendingEnquiries": "enquiries:status:pending"
+}
+
+def calendar_month_starts(now: datetime, months: int) -> list:
+    """First day of each of the last `months` calendar months, oldest first"""
+    current = now.year * 12 + now.month - 1
+    return [datetime(index // 12, index % 12 + 1, 1) for index in range(current - months + 1, current + 1)]
+
+def build_week_buckets_query(window_start: datetime, now: datetime):
+    """
+    Enquiry counts per calendar week from window_start to now.
+
+    Weeks come from generate_series, left-joined to enquiries on a
+    created_at range so empty weeks still report zero and the
+    (created_at, id) index serves each bucket.
+    """
+    step = sql_func.make_interval(0, 0, 1)
+    series = sql_func.generate_series(
+        sql_func.date_trunc("week", window_start), sql_func.date_trunc("week", now), step
+    ).table_valued("bucket").render_derived(name="series")
+
+    return select(
+        series.c.bucket,
+        sql_func.count(Enquiry.id)
+    ).select_from(
+        series.outerjoin(Enquiry, and_(
+            Enquiry.created_at >= series.c.bucket,
+            Enquiry.created_at < series.c.bucket + step
+        ))
+    ).group_by(series.c.bucket).order_by(series.c.bucket)
+
+@http_function(methods=("GET",), auth=True, query_budget=5)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
     """Get dashboard statistics for admin"""
     
-    if req.method == "OPTIONS":
-        return func.HttpResponse(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization"
-            }
-        )
-    
+    granularity = req.params.get('granularity', 'month')
     try:
-        # Verify admin authentication
-        authorization = req.headers.get('Authorization', '')
-        user_payload = get_current_user(authorization)
-        
-        if not user_payload:
-            response, status = create_error_response("UNAUTHORIZED", "Authentication required", 401)
-            return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
-        
-        db = SessionLocal()
-        
-        # Get property statistics
-        total_properties = db.query(Property).count()
-        available_properties = db.query(Property).filter(Property.status == "available").count()
-        sold_properties = db.query(Property).filter(Property.status == "sold").count()
-        
-        # Get enquiry statistics
-        total_enquiries = db.query(Enquiry).count()
-        pending_enquiries = db.query(Enquiry).filter(Enquiry.status == EnquiryStatus.PENDING).count()
-        
-        # This month enquiries
-        first_day_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        this_month_enquiries = db.query(Enquiry).filter(Enquiry.created_at >= first_day_of_month).count()
-        
-        # Recent enquiries
-        recent = db.query(Enquiry).order_by(Enquiry.created_at.desc()).limit(5).all()
-        recent_enquiries = []
-        for enq in recent:
-            recent_enquiries.append({
-                "id": enq.id,
-                "name": enq.name,
-                "type": enq.type.value if enq.type else None,
-                "createdAt": enq.created_at.isoformat() if enq.created_at else None
-            })
-        
-        # Enquiries by month (last 6 months)
-        enquiries_by_month = []
-        for i in range(5, -1, -1):
-            month_start = (datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(days=i * 30))
-            month_end = month_start + timedelta(days=30)
-            count = db.query(Enquiry).filter(
-                Enquiry.created_at >= month_start,
-                Enquiry.created_at < month_end
-            ).count()
-            enquiries_by_month.append({
-                "month": month_start.strftime("%b %Y"),
-                "count": count
-            })
-        
-        response = create_response(
-            data={
-                "totalProperties": total_properties,
-                "availableProperties": available_properties,
-                "soldProperties": sold_properties,
-                "totalEnquiries": total_enquiries,
-                "pendingEnquiries": pending_enquiries,
-                "thisMonthEnquiries": this_month_enquiries,
-                "recentEnquiries": recent_enquiries,
-                "enquiriesByMonth": enquiries_by_month
-            }
-        )
-        
-        db.close()
-        return func.HttpResponse(
-            json.dumps(response),
-            status_code=200,
-            mimetype="application/json",
-            headers={"Access-Control-Allow-Origin": "*"}
+        months = int(req.params.get('months', DEFAULT_MONTHS))
+    except ValueError:
+        months = 0
+    
+    if granularity not in GRANULARITIES or not 1 <= months <= MAX_MONTHS:
+        return ctx.error(
+            "VALIDATION_ERROR",
+            f"granularity must be 'month' or 'week' and months between 1 and {MAX_MONTHS}",
+            400
         )
-        
-    except Exception as e:
-        if 'db' in locals():
-            db.close()
-        response, status = create_error_response("INTERNAL_ERROR", str(e), 500)
-        return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
+    
+    db = ctx.db
+    
+    # Totals and monthly counts come from the maintained counters table
+    now = datetime.utcnow()
+    month_starts = calendar_month_starts(now, months)
+    counters = read_counters(
+        db,
+        list(COUNTER_KEYS.values())
+        + [type_key(enquiry_type) for enquiry_type in EnquiryType]
+        + [month_key(m) for m in month_starts]
+    )
+    
+    # Recent enquiries
+    recent = db.query(Enquiry).order_by(Enquiry.created_at.desc()).limit(5).all()
+    recent_enquiries = recent_enquiry_serializer.many(recent)
+    
+    # Enquiries per calendar month (or week) in the window
+    if granularity == "month":
+        buckets = [(start, counters[month_key(start)]) for start in month_starts]
+    else:
+        buckets = db.execute(build_week_buckets_query(month_starts[0], now)).all()
+    
+    label_format = GRANULARITIES[granularity]
+    enquiries_by_period = [
+        {granularity: start.strftime(label_format), "start": start.date().isoformat(), "count": count}
+        for start, count in buckets
+    ]
+    
+    response = create_response(
+        data={
+            **{field: counters[key] for field, key in COUNTER_KEYS.items()},
+            "thisMonthEnquiries": counters[month_key(month_starts[-1])],
+            "enquiriesByType": {
+                enquiry_type.value: counters[type_key(enquiry_type)] for enquiry_type in EnquiryType
+            },
+            "recentEnquiries": recent_enquiries,
+            "enquiriesByMonth" if granularity == "month" else "enquiriesByWeek": enquiries_by_period
+        }
+    )
+    
+    return encode_response(
+        req,
+        response,
+        status_code=200,
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
+
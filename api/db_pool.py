@@ -0,0 +1,121 @@
+"""Engine construction from the DB_POOL_* settings, plus pool telemetry
+
+Modes:
+
+- queue: a QueuePool of DB_POOL_SIZE (+ DB_MAX_OVERFLOW) connections per
+  process, recycled after DB_POOL_RECYCLE seconds and pinged on checkout
+  so connections Azure dropped while idle are replaced instead of failing
+  the request.
+- null: no pooling, a new connection per checkout (for very spiky, mostly
+  idle apps where held connections cost more than connecting).
+- pgbouncer: a small queue pool in front of PgBouncer in transaction
+  mode. Session state doesn't survive between transactions there, so the
+  statement timeout is applied with SET LOCAL at the start of each
+  transaction instead of as a connection option.
+
+pool_stats() reports checkouts, connections in use (and the peak) and
+how long checkouts waited for a connection.
+"""
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, NullPool
+from config import settings
+from sql_profiler import instrument
+
+POOL_MODES = ("queue", "null", "pgbouncer")
+
+_stats = {"checkouts": 0, "in_use": 0, "peak_in_use": 0, "timeouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+class _TimedCheckout:
+    """Pool mixin timing how long each checkout waits for (or opens) a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with _stats_lock:
+                _stats["timeouts"] += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with _stats_lock:
+                _stats["wait_seconds"] += waited
+                _stats["max_wait_seconds"] = max(_stats["max_wait_seconds"], waited)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    with _stats_lock:
+        _stats["checkouts"] += 1
+        _stats["in_use"] += 1
+        _stats["peak_in_use"] = max(_stats["peak_in_use"], _stats["in_use"])
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    with _stats_lock:
+        _stats["in_use"] -= 1
+
+
+def build_engine(url: str = None):
+    url = url or settings.DATABASE_URL
+    mode = settings.DB_POOL_MODE
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of: {', '.join(POOL_MODES)}")
+
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if mode == "null":
+        options["poolclass"] = TimedNullPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE
+        )
+
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if timeout_ms and mode != "pgbouncer":
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+
+    engine = create_engine(url, **options)
+
+    if timeout_ms and mode == "pgbouncer":
+        @event.listens_for(engine, "begin")
+        def _statement_timeout(connection):
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+    event.listen(engine.pool, "checkout", _on_checkout)
+    event.listen(engine.pool, "checkin", _on_checkin)
+    instrument(engine)
+    return engine
+
+
+def pool_stats(engine) -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    checkouts = stats.pop("checkouts")
+    wait_seconds = stats.pop("wait_seconds")
+    return {
+        "mode": settings.DB_POOL_MODE,
+        "size": settings.DB_POOL_SIZE if settings.DB_POOL_MODE != "null" else None,
+        "idle": engine.pool.checkedin() if isinstance(engine.pool, QueuePool) else 0,
+        "in_use": stats["in_use"],
+        "peak_in_use": stats["peak_in_use"],
+        "checkouts": checkouts,
+        "timeouts": stats["timeouts"],
+        "avg_wait_ms": round(wait_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_wait_ms": round(stats["max_wait_seconds"] * 1000, 3)
+    }
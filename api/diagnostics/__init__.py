@@ -0,0 +1,21 @@
+import azure.functions as func
+import json
+from models import engine
+from db_pool import pool_stats
+from utils import create_response
+from pipeline import http_function, RequestContext
+
+@http_function(methods=("GET",), auth=True)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    """Connection pool telemetry for this worker (Admin only)"""
+    if ctx.user.get('role') != 'admin':
+        return ctx.error("UNAUTHORIZED", "Admin authentication required", 401)
+    
+    response = create_response(data={"databasePool": pool_stats(engine)})
+    
+    return func.HttpResponse(
+        json.dumps(response),
+        status_code=200,
+        mimetype="application/json",
+        headers={"Access-Control-Allow-Origin": "*"}
+    )
@@ -0,0 +1,223 @@
+"""Transactional outbox for notification emails
+
+queue_enquiry_notifications() adds email_outbox rows in the caller's
+session, so an email exists exactly when the enquiry it reports was
+committed and submissions never wait on SMTP. send_pending() (run by the
+email_sender timer function) claims due messages with FOR UPDATE SKIP
+LOCKED, sends them over one SMTP connection per run and records the
+outcome:
+
+- a failed send is retried with exponential backoff, then marked failed
+  after EMAIL_MAX_ATTEMPTS;
+- a recipient refused by the server is failed at once;
+- a recipient already sent EMAIL_PER_RECIPIENT_HOURLY messages in the last
+  hour is deferred, so the public form can't be used to flood someone's
+  inbox (our own NOTIFICATION_EMAIL is exempt);
+- admin notifications switched off in the notifications setting are
+  skipped.
+
+Delivery is at-least-once: a crash between the SMTP send and the commit
+resends that batch.
+"""
+import logging
+import smtplib
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from sqlalchemy import func as sql_func
+from config import settings
+from models import SessionLocal, OutboxEmail, Setting, EnquiryType
+
+# kind -> notifications setting that switches it off
+NOTIFICATION_TOGGLES = {
+    "enquiry": "emailOnEnquiry",
+    "callback": "emailOnCallback"
+}
+
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+def queue_email(db, kind: str, recipient: str, subject: str, body: str):
+    db.add(OutboxEmail(
+        id=str(uuid.uuid4()),
+        kind=kind,
+        recipient=recipient,
+        subject=subject,
+        body=body
+    ))
+
+
+def queue_enquiry_notifications(db, record: dict):
+    """Queue the admin notification and, if enabled and the customer gave an email, an acknowledgement"""
+    enquiry_type = EnquiryType(getattr(record["type"], "value", record["type"]))
+    reference = record["id"][:8].upper()
+    label = enquiry_type.value.replace("_", " ")
+
+    details = [
+        f"Name: {record['name']}",
+        f"Phone: {record['phone']}",
+        f"Email: {record.get('email') or '-'}",
+        f"Preferred time: {record.get('preferred_time') or '-'}",
+        f"Property: {record.get('property_id') or '-'}",
+        f"Reference: {reference}"
+    ]
+    if record.get("message"):
+        details += ["", record["message"]]
+
+    queue_email(
+        db,
+        "callback" if enquiry_type == EnquiryType.CALLBACK else "enquiry",
+        settings.NOTIFICATION_EMAIL,
+        f"New {label} from {record['name']} ({reference})",
+        "\n".join(details)
+    )
+
+    if settings.ENQUIRY_ACKNOWLEDGEMENT_EMAILS and record.get("email"):
+        queue_email(
+            db,
+            "acknowledgement",
+            record["email"],
+            f"We've received your enquiry ({reference})",
+            f"Dear {record['name']},\n\n"
+            f"Thank you for contacting DreamLadder. We've received your {label} "
+            f"(reference {reference}) and will get back to you shortly.\n\n"
+            "DreamLadder - Real Estate Solutions"
+        )
+
+
+def _connect() -> smtplib.SMTP:
+    smtp = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+    if settings.SMTP_USE_TLS:
+        smtp.starttls()
+    if settings.SMTP_USER:
+        smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+    return smtp
+
+
+def _disconnect(smtp):
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+def _to_message(email: OutboxEmail) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_FROM
+    message["To"] = email.recipient
+    message["Subject"] = email.subject
+    message.set_content(email.body)
+    return message
+
+
+def _disabled_kinds(db) -> set:
+    setting = db.query(Setting).filter(Setting.key == "notifications").first()
+    toggles = setting.value if setting and isinstance(setting.value, dict) else {}
+    return {kind for kind, key in NOTIFICATION_TOGGLES.items() if toggles.get(key) is False}
+
+
+def _retry(email: OutboxEmail, error: str, now: datetime) -> str:
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        email.status = "failed"
+        return "failed"
+    delay = timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1))
+    email.next_attempt_at = now + min(delay, MAX_RETRY_DELAY)
+    return "retried"
+
+
+def send_pending(max_seconds: float = None) -> dict:
+    """
+    Send due outbox messages batch by batch until none are left (or
+    max_seconds has passed); returns counts plus throughput and queue lag.
+    """
+    started = time.monotonic()
+    stats = Counter()
+    max_lag = 0.0
+    smtp = None
+    throttle_delay = timedelta(hours=1) / max(settings.EMAIL_PER_RECIPIENT_HOURLY, 1)
+
+    try:
+        while max_seconds is None or time.monotonic() - started < max_seconds:
+            db = SessionLocal()
+            try:
+                now = datetime.utcnow()
+                batch = db.query(OutboxEmail).filter(
+                    OutboxEmail.status == "pending",
+                    OutboxEmail.next_attempt_at <= now
+                ).order_by(OutboxEmail.next_attempt_at).limit(
+                    settings.EMAIL_SEND_BATCH_SIZE
+                ).with_for_update(skip_locked=True).all()
+                if not batch:
+                    break
+
+                max_lag = max(max_lag, (now - min(email.created_at for email in batch)).total_seconds())
+                disabled = _disabled_kinds(db)
+                recipients = {email.recipient for email in batch}
+                sent_last_hour = Counter(dict(
+                    db.query(OutboxEmail.recipient, sql_func.count()).filter(
+                        OutboxEmail.recipient.in_(recipients),
+                        OutboxEmail.sent_at >= now - timedelta(hours=1)
+                    ).group_by(OutboxEmail.recipient).all()
+                ))
+
+                for email in batch:
+                    if email.kind in disabled:
+                        email.status = "skipped"
+                        stats["skipped"] += 1
+                        continue
+                    if (email.recipient != settings.NOTIFICATION_EMAIL
+                            and sent_last_hour[email.recipient] >= settings.EMAIL_PER_RECIPIENT_HOURLY):
+                        email.next_attempt_at = now + throttle_delay
+                        stats["throttled"] += 1
+                        continue
+
+                    if smtp is None:
+                        try:
+                            smtp = _connect()
+                        except (smtplib.SMTPException, OSError) as e:
+                            # Server unreachable: keep what's done, the rest waits for the next run
+                            logging.error(f"SMTP connection failed, outbox left pending: {e}")
+                            db.commit()
+                            return _report(stats, started, max_lag)
+
+                    try:
+                        smtp.send_message(_to_message(email))
+                    except smtplib.SMTPRecipientsRefused as e:
+                        email.status = "failed"
+                        email.last_error = str(e.recipients)
+                        stats["failed"] += 1
+                    except (smtplib.SMTPException, OSError) as e:
+                        stats[_retry(email, str(e), now)] += 1
+                        _disconnect(smtp)
+                        smtp = None
+                    else:
+                        email.status = "sent"
+                        email.sent_at = datetime.utcnow()
+                        sent_last_hour[email.recipient] += 1
+                        stats["sent"] += 1
+
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+    finally:
+        if smtp is not None:
+            _disconnect(smtp)
+
+    return _report(stats, started, max_lag)
+
+
+def _report(stats: Counter, started: float, max_lag: float) -> dict:
+    elapsed = time.monotonic() - started
+    return {
+        **stats,
+        "seconds": round(elapsed, 3),
+        "per_second": round(stats["sent"] / elapsed, 1) if elapsed else 0.0,
+        "max_lag_seconds": round(max_lag, 3)
+    }
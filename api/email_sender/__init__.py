@@ -0,0 +1,18 @@
+import azure.functions as func
+import logging
+from config import settings
+from email_outbox import send_pending
+
+# Stop claiming new batches after this long; the next tick picks up the rest
+RUN_SECONDS = 60
+
+def main(timer: func.TimerRequest) -> None:
+    """Send queued notification emails from the outbox"""
+    # Nothing is queued while notifications are off; don't wake the database
+    if not settings.EMAIL_NOTIFICATIONS:
+        return
+    
+    stats = send_pending(max_seconds=RUN_SECONDS)
+    
+    if stats.get("sent") or stats.get("failed") or stats.get("retried"):
+        logging.info(f"Email outbox run: {stats}")
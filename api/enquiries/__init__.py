@@ -1,138 +1,277 @@
 import azure.functions as func
 import json
-from models import SessionLocal, Enquiry
-from utils import create_response, create_error_response, get_current_user
+import math
 import uuid
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import select, update, delete, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from models import Enquiry, EnquiryType, EnquiryStatus
+from utils import create_response, normalize_phone, client_ip
+from pipeline import http_function, RequestContext
+from serializers import enquiry_serializer, encode_response
+from list_filters import enquiry_filters
+from pagination import parse_limit, parse_bool, decode_cursor, fetch_keyset_page, order_by_keyset, cached_count, build_pagination
+from rate_limit import TokenBucketLimiter
+from config import settings
+import counters
+import email_outbox
+import enquiry_queue
+import enquiry_dedupe
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+ENQUIRY_TYPES = [enquiry_type.value for enquiry_type in EnquiryType]
+
+MAX_BULK_IDS = 1000
+
+enquiry_limiter = TokenBucketLimiter(settings.ENQUIRY_RATE_LIMIT_PER_MINUTE, settings.ENQUIRY_RATE_LIMIT_BURST)
+
+# Drain anything a previous process queued but didn't flush
+if settings.ENQUIRY_WRITE_BEHIND:
+    enquiry_queue.start_flusher()
+
+def bulk_criteria(body: dict) -> list:
+    """WHERE criteria for a bulk request: {"ids": [...]} or {"filter": {status, type, start_date, end_date}}"""
+    if not isinstance(body, dict) or ('ids' in body) == ('filter' in body):
+        raise ValueError("Provide either ids or filter")
+    
+    if 'ids' in body:
+        ids = body['ids']
+        if not isinstance(ids, list) or not ids or not all(isinstance(id_, str) for id_ in ids):
+            raise ValueError("ids must be a non-empty list of enquiry ids")
+        if len(ids) > MAX_BULK_IDS:
+            raise ValueError(f"At most {MAX_BULK_IDS} ids per request")
+        # One array parameter however many ids there are
+        return [Enquiry.id == any_(bindparam('ids', ids, type_=ARRAY(String)))]
+    
+    criteria = enquiry_filters(body['filter'] if isinstance(body['filter'], dict) else {})
+    if not criteria:
+        raise ValueError("filter must set at least one of status, type, start_date, end_date")
+    return criteria
+
+def bulk_changes(body: dict) -> dict:
+    """Column values for a bulk PATCH (status and/or notes)"""
+    changes = {}
+    if 'status' in body:
+        changes['status'] = EnquiryStatus(body['status'])
+    if 'notes' in body:
+        if body['notes'] is not None and not isinstance(body['notes'], str):
+            raise ValueError("notes must be a string or null")
+        changes['notes'] = body['notes']
+    if not changes:
+        raise ValueError("Provide status and/or notes to change")
+    return changes
+
+def status_deltas(rows, new_status=None) -> Counter:
+    """Counter deltas for (old status, type, created_at) rows moving to new_status (None = deleted)"""
+    deltas = Counter()
+    for old_status, type_, created_at in rows:
+        deltas.subtract(counters.enquiry_keys(old_status, type_, created_at))
+        if new_status is not None:
+            deltas.update(counters.enquiry_keys(new_status, type_, created_at))
+    return deltas
+
+def bulk_update(db, criteria: list, changes: dict) -> list:
+    """
+    One UPDATE for every matching enquiry; returns (old status, type, created_at) per row.
+    
+    The FOR UPDATE subquery reads each row's old status inside the same
+    statement, so the counter deltas match exactly what was changed.
+    """
+    old = select(Enquiry.id, Enquiry.status.label('old_status')).where(*criteria).with_for_update().subquery()
+    rows = db.execute(
+        update(Enquiry)
+        .where(Enquiry.id == old.c.id)
+        .values(**changes, updated_at=datetime.utcnow())
+        .returning(old.c.old_status, Enquiry.type, Enquiry.created_at)
+    ).all()
+    if 'status' in changes:
+        counters.apply_deltas(db.connection(), status_deltas(rows, changes['status']))
+    return rows
+
+def bulk_delete(db, criteria: list) -> list:
+    rows = db.execute(
+        delete(Enquiry).where(*criteria).returning(Enquiry.status, Enquiry.type, Enquiry.created_at)
+    ).all()
+    counters.apply_deltas(db.connection(), status_deltas(rows))
+    return rows
+
+def status_breakdown(rows) -> dict:
+    """{previous status: rows}"""
+    return dict(Counter(status.value for status, *_ in rows))
+
+@http_function(methods=("GET", "POST", "PATCH", "DELETE"), auth=("GET", "PATCH", "DELETE"), query_budget=5)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
     """Submit enquiry or get all enquiries (admin)"""
     
-    if req.method == "OPTIONS":
-        return func.HttpResponse(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization"
-            }
-        )
+    # Turn floods away before touching the database
+    if req.method == "POST":
+        retry_after = enquiry_limiter.acquire(client_ip(req))
+        if retry_after:
+            return ctx.error(
+                "RATE_LIMITED",
+                "Too many enquiries, please try again shortly",
+                429,
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+    
+    # Write-behind submissions are answered without a database session
+    db = None if req.method == "POST" and settings.ENQUIRY_WRITE_BEHIND else ctx.db
     
-    try:
-        db = SessionLocal()
+    if req.method == "POST":
+        # Public endpoint - submit enquiry
+        req_body = req.get_json()
         
-        if req.method == "POST":
-            # Public endpoint - submit enquiry
-            req_body = req.get_json()
-            
-            # Validation
-            if not req_body.get('name') or not req_body.get('phone') or not req_body.get('type'):
-                response, status = create_error_response(
-                    "VALIDATION_ERROR",
-                    "Name, phone, and type are required",
-                    400
-                )
-                db.close()
-                return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
-            
-            enquiry_id = str(uuid.uuid4())
-            new_enquiry = Enquiry(
-                id=enquiry_id,
-                type=req_body.get('type'),
-                name=req_body.get('name'),
-                email=req_body.get('email'),
-                phone=req_body.get('phone'),
-                message=req_body.get('message'),
-                preferred_time=req_body.get('preferredTime'),
-                property_id=req_body.get('propertyId')
+        # Validation
+        if not req_body.get('name') or not req_body.get('phone') or not req_body.get('type'):
+            return ctx.error(
+                "VALIDATION_ERROR",
+                "Name, phone, and type are required",
+                400
             )
-            
-            db.add(new_enquiry)
-            db.commit()
-            
-            response = create_response(
-                message="Enquiry submitted successfully",
-                data={"id": enquiry_id, "referenceNumber": enquiry_id[:8].upper()}
-            )
-            
-            db.close()
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=201,
-                mimetype="application/json",
-                headers={"Access-Control-Allow-Origin": "*"}
+        
+        if req_body.get('type') not in ENQUIRY_TYPES:
+            return ctx.error(
+                "VALIDATION_ERROR",
+                f"type must be one of: {', '.join(ENQUIRY_TYPES)}",
+                400
             )
         
-        elif req.method == "GET":
-            # Admin endpoint - get all enquiries
-            authorization = req.headers.get('Authorization', '')
-            user_payload = get_current_user(authorization)
-            
-            if not user_payload:
-                response, status = create_error_response("UNAUTHORIZED", "Authentication required", 401)
-                db.close()
-                return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
-            
-            page = int(req.params.get('page', 1))
-            limit = int(req.params.get('limit', 10))
-            status_filter = req.params.get('status')
-            type_filter = req.params.get('type')
-            
-            query = db.query(Enquiry)
-            
-            if status_filter:
-                query = query.filter(Enquiry.status == status_filter)
-            if type_filter:
-                query = query.filter(Enquiry.type == type_filter)
-            
-            total_items = query.count()
-            total_pages = (total_items + limit - 1) // limit
-            
-            offset = (page - 1) * limit
-            enquiries = query.order_by(Enquiry.created_at.desc()).offset(offset).limit(limit).all()
-            
-            enquiries_data = []
-            for enq in enquiries:
-                try:
-                    enquiries_data.append({
-                        "id": enq.id,
-                        "type": enq.type.value if hasattr(enq.type, 'value') else str(enq.type) if enq.type else None,
-                        "name": enq.name,
-                        "email": enq.email,
-                        "phone": enq.phone,
-                        "message": enq.message,
-                        "preferredTime": enq.preferred_time,
-                        "propertyId": enq.property_id,
-                        "status": enq.status.value if hasattr(enq.status, 'value') else str(enq.status) if enq.status else None,
-                        "notes": enq.notes,
-                        "createdAt": enq.created_at.isoformat() if enq.created_at else None,
-                        "updatedAt": enq.updated_at.isoformat() if enq.updated_at else None
-                    })
-                except Exception as e:
-                    # Log error but continue processing other enquiries
-                    print(f"Error processing enquiry {enq.id}: {str(e)}")
-                    continue
-            
+        phone = normalize_phone(req_body.get('phone'))
+        if not 7 <= len(phone) <= 15:
+            return ctx.error("VALIDATION_ERROR", "phone must be a valid phone number", 400)
+        
+        property_id = req_body.get('propertyId') or None
+        
+        duplicate_id = enquiry_dedupe.find_duplicate(db, phone, property_id)
+        if duplicate_id:
             response = create_response(
-                data={
-                    "enquiries": enquiries_data,
-                    "pagination": {
-                        "currentPage": page,
-                        "totalPages": total_pages,
-                        "totalItems": total_items
-                    }
-                }
+                message="Enquiry already received",
+                data={"id": duplicate_id, "referenceNumber": duplicate_id[:8].upper(), "duplicate": True}
             )
-            
-            db.close()
             return func.HttpResponse(
                 json.dumps(response),
                 status_code=200,
                 mimetype="application/json",
                 headers={"Access-Control-Allow-Origin": "*"}
             )
-            
-    except Exception as e:
-        if 'db' in locals():
-            db.close()
-        response, status = create_error_response("INTERNAL_ERROR", str(e), 500)
-        return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
+        
+        enquiry_id = str(uuid.uuid4())
+        record = dict(
+            id=enquiry_id,
+            type=req_body.get('type'),
+            name=req_body.get('name'),
+            email=req_body.get('email'),
+            phone=phone,
+            message=req_body.get('message'),
+            preferred_time=req_body.get('preferredTime'),
+            property_id=property_id
+        )
+        
+        if settings.ENQUIRY_WRITE_BEHIND:
+            # Acknowledge once it's in the local journal; the flusher inserts it
+            enquiry_queue.enqueue(record)
+            status_code = 202
+        else:
+            db.add(Enquiry(**record))
+            if settings.EMAIL_NOTIFICATIONS:
+                email_outbox.queue_enquiry_notifications(db, record)
+            db.commit()
+            status_code = 201
+        enquiry_dedupe.remember(phone, property_id, enquiry_id)
+        
+        response = create_response(
+            message="Enquiry submitted successfully",
+            data={"id": enquiry_id, "referenceNumber": enquiry_id[:8].upper()}
+        )
+        
+        return func.HttpResponse(
+            json.dumps(response),
+            status_code=status_code,
+            mimetype="application/json",
+            headers={"Access-Control-Allow-Origin": "*"}
+        )
+    
+    elif req.method == "GET":
+        # Admin endpoint - get all enquiries
+        page = int(req.params.get('page', 1))
+        limit = parse_limit(req.params.get('limit'))
+        cursor = req.params.get('cursor')
+        status_filter = req.params.get('status')
+        type_filter = req.params.get('type')
+        
+        # Cursor clients page without totals unless they ask for one
+        include_total = parse_bool(req.params.get('includeTotal'), default=not cursor)
+        
+        try:
+            query = db.query(Enquiry).filter(*enquiry_filters(req.params))
+            # Reject a bad cursor before counting
+            if cursor:
+                decode_cursor(cursor, Enquiry.created_at)
+        except ValueError as e:
+            return ctx.error("VALIDATION_ERROR", str(e), 400)
+        
+        total_items = None
+        if include_total and cursor:
+            total_items = cached_count(query, (
+                'enquiries', status_filter, type_filter,
+                req.params.get('start_date'), req.params.get('end_date')
+            ))
+        elif include_total:
+            total_items = query.count()
+        
+        keyset = bool(cursor) or 'page' not in req.params
+        next_cursor = None
+        if keyset:
+            enquiries, next_cursor = fetch_keyset_page(
+                query, Enquiry.created_at, Enquiry.id, limit, cursor
+            )
+        else:
+            offset = (page - 1) * limit
+            enquiries = order_by_keyset(query, Enquiry.created_at, Enquiry.id).offset(offset).limit(limit).all()
+        
+        enquiries_data = enquiry_serializer.many(enquiries)
+        
+        response = create_response(
+            data={
+                "enquiries": enquiries_data,
+                "pagination": build_pagination(
+                    limit, total_items, None if cursor else page, next_cursor, keyset
+                )
+            }
+        )
+        
+        return encode_response(
+            req,
+            response,
+            status_code=200,
+            headers={"Access-Control-Allow-Origin": "*"}
+        )
+    
+    elif req.method in ("PATCH", "DELETE"):
+        # Admin endpoint - bulk status/notes change or delete
+        try:
+            req_body = req.get_json()
+            criteria = bulk_criteria(req_body)
+            changes = bulk_changes(req_body) if req.method == "PATCH" else None
+        except ValueError as e:
+            return ctx.error("VALIDATION_ERROR", str(e), 400)
+        
+        if req.method == "PATCH":
+            rows = bulk_update(db, criteria, changes)
+            data = {"updated": len(rows), "previousStatus": status_breakdown(rows)}
+            message = f"{len(rows)} enquiries updated"
+        else:
+            rows = bulk_delete(db, criteria)
+            data = {"deleted": len(rows), "previousStatus": status_breakdown(rows)}
+            message = f"{len(rows)} enquiries deleted"
+        db.commit()
+        
+        response = create_response(message=message, data=data)
+        
+        return func.HttpResponse(
+            json.dumps(response),
+            status_code=200,
+            mimetype="application/json",
+            headers={"Access-Control-Allow-Origin": "*"}
+        )
+        
@@ -0,0 +1,67 @@
+"""Collapse repeated enquiries from the same phone about the same property
+
+A submission matching an enquiry from the same normalized phone and
+property within ENQUIRY_DUPLICATE_WINDOW_MINUTES returns that enquiry
+instead of creating a new one. Recent submissions are remembered in a
+per-process LRU, so a bot resubmitting to the same worker never touches
+the database; misses fall back to an indexed lookup on
+(phone, property_id, created_at).
+
+In write-behind mode the hot path opens no session: misses are checked
+against the local journal instead, and the flusher drops duplicates that
+only show up once they reach Postgres.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from config import settings
+from models import Enquiry
+import enquiry_queue
+
+RECENT_CACHE_SIZE = 10000
+
+_recent = OrderedDict()
+_lock = threading.Lock()
+
+
+def _window_start() -> datetime:
+    return datetime.utcnow() - timedelta(minutes=settings.ENQUIRY_DUPLICATE_WINDOW_MINUTES)
+
+
+def remember(phone: str, property_id, enquiry_id: str, created_at: datetime = None):
+    """Record a submission so repeats within the window are caught in memory"""
+    with _lock:
+        _recent[(phone, property_id)] = (enquiry_id, created_at or datetime.utcnow())
+        _recent.move_to_end((phone, property_id))
+        if len(_recent) > RECENT_CACHE_SIZE:
+            _recent.popitem(last=False)
+
+
+def find_duplicate(db, phone: str, property_id):
+    """Id of an enquiry from `phone` about `property_id` inside the window, or None
+
+    With db None only memory and the write-behind journal are checked.
+    """
+    since = _window_start()
+
+    with _lock:
+        cached = _recent.get((phone, property_id))
+    if cached and cached[1] >= since:
+        return cached[0]
+    if db is None:
+        return enquiry_queue.find_queued(phone, property_id, since)
+
+    query = db.query(Enquiry.id, Enquiry.created_at).filter(
+        Enquiry.phone == phone,
+        Enquiry.created_at >= since
+    )
+    if property_id:
+        query = query.filter(Enquiry.property_id == property_id)
+    else:
+        query = query.filter(Enquiry.property_id.is_(None))
+    match = query.order_by(Enquiry.created_at.desc()).first()
+
+    if match is None:
+        return None
+    remember(phone, property_id, match.id, match.created_at)
+    return match.id
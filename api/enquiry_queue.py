@@ -0,0 +1,192 @@
+"""Write-behind queue for public enquiry submissions
+
+With ENQUIRY_WRITE_BEHIND on, POST /enquiries appends the validated
+enquiry to a local SQLite journal (WAL, synchronous=FULL, so an
+acknowledged submission survives a process crash) and returns 202. A
+background thread moves queued rows into Postgres in batches every
+ENQUIRY_FLUSH_INTERVAL_MS or as soon as ENQUIRY_FLUSH_BATCH_SIZE rows are
+waiting, through an ORM session so the dashboard counters stay in step
+and notification emails land in the outbox with their enquiry.
+
+Flushing is idempotent: ids already in Postgres are skipped, so a crash
+between the Postgres commit and the journal delete only replays no-ops.
+Enquiries repeating one from the same phone about the same property
+within ENQUIRY_DUPLICATE_WINDOW_MINUTES (e.g. submitted to another
+instance) are dropped, as POST /enquiries would have done.
+Rows Postgres rejects are moved to a dead-letter table instead of
+blocking the queue.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError, DataError
+from config import settings
+import email_outbox
+from models import SessionLocal, Enquiry, EnquiryType
+
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_connection = None
+_flusher = None
+
+
+def _journal() -> sqlite3.Connection:
+    global _connection
+    if _connection is None:
+        os.makedirs(os.path.dirname(settings.ENQUIRY_QUEUE_PATH) or ".", exist_ok=True)
+        connection = sqlite3.connect(settings.ENQUIRY_QUEUE_PATH, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS queued_enquiries (id TEXT PRIMARY KEY, payload TEXT NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS dead_enquiries (id TEXT PRIMARY KEY, payload TEXT NOT NULL, error TEXT)"
+        )
+        _connection = connection
+    return _connection
+
+
+def enqueue(record: dict):
+    """Durably queue one enquiry (Enquiry column names -> values)"""
+    record = {**record, "created_at": record.get("created_at") or datetime.utcnow()}
+    payload = json.dumps(record, default=lambda value: value.isoformat())
+
+    with _lock:
+        connection = _journal()
+        connection.execute("INSERT INTO queued_enquiries (id, payload) VALUES (?, ?)", (record["id"], payload))
+        pending = connection.execute("SELECT count(*) FROM queued_enquiries").fetchone()[0]
+
+    start_flusher()
+    if pending >= settings.ENQUIRY_FLUSH_BATCH_SIZE:
+        _wakeup.set()
+
+
+def pending_count() -> int:
+    with _lock:
+        return _journal().execute("SELECT count(*) FROM queued_enquiries").fetchone()[0]
+
+
+def find_queued(phone: str, property_id, since: datetime):
+    """Id of the latest queued enquiry from `phone` about `property_id` created after `since`"""
+    with _lock:
+        row = _journal().execute(
+            "SELECT id FROM queued_enquiries"
+            " WHERE json_extract(payload, '$.phone') = ? AND json_extract(payload, '$.property_id') IS ?"
+            " AND json_extract(payload, '$.created_at') >= ? ORDER BY rowid DESC LIMIT 1",
+            (phone, property_id, since.isoformat())
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _to_record(payload: str) -> dict:
+    record = json.loads(payload)
+    record["type"] = EnquiryType(record["type"])
+    record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return record
+
+
+def _drop_duplicates(db, records: list) -> list:
+    """Records not repeating an enquiry (stored or earlier in the batch) within the window"""
+    if not records:
+        return records
+    window = timedelta(minutes=settings.ENQUIRY_DUPLICATE_WINDOW_MINUTES)
+    records = sorted(records, key=lambda record: record["created_at"])
+
+    seen = {}
+    for phone, property_id, created_at in db.query(Enquiry.phone, Enquiry.property_id, Enquiry.created_at).filter(
+        Enquiry.phone.in_({record["phone"] for record in records}),
+        Enquiry.created_at >= records[0]["created_at"] - window,
+        Enquiry.created_at <= records[-1]["created_at"] + window
+    ):
+        seen.setdefault((phone, property_id), []).append(created_at)
+
+    kept = []
+    for record in records:
+        previous = seen.setdefault((record["phone"], record.get("property_id")), [])
+        if not any(abs(record["created_at"] - created_at) <= window for created_at in previous):
+            previous.append(record["created_at"])
+            kept.append(record)
+    return kept
+
+
+def _insert(rows: list):
+    """Insert (id, payload) rows not already in Postgres in one transaction"""
+    db = SessionLocal()
+    try:
+        ids = [row_id for row_id, _ in rows]
+        existing = {row_id for (row_id,) in db.query(Enquiry.id).filter(Enquiry.id.in_(ids))}
+        records = _drop_duplicates(db, [_to_record(payload) for row_id, payload in rows if row_id not in existing])
+        db.add_all([Enquiry(**record) for record in records])
+        if settings.EMAIL_NOTIFICATIONS:
+            for record in records:
+                email_outbox.queue_enquiry_notifications(db, record)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def flush(limit: int = None) -> int:
+    """Move up to `limit` queued enquiries into Postgres; returns rows handled"""
+    limit = limit or settings.ENQUIRY_FLUSH_BATCH_SIZE
+    with _lock:
+        rows = _journal().execute(
+            "SELECT id, payload FROM queued_enquiries ORDER BY rowid LIMIT ?", (limit,)
+        ).fetchall()
+    if not rows:
+        return 0
+
+    try:
+        _insert(rows)
+        done, dead = rows, []
+    except (IntegrityError, DataError) as e:
+        # Isolate the bad rows so one rejected enquiry can't block the rest;
+        # anything else (e.g. Postgres unreachable) leaves the batch queued
+        logging.warning(f"Enquiry batch insert failed, retrying rows one by one: {e}")
+        done, dead = [], []
+        for row in rows:
+            try:
+                _insert([row])
+                done.append(row)
+            except (IntegrityError, DataError) as row_error:
+                dead.append((*row, str(row_error)))
+
+    with _lock:
+        connection = _journal()
+        connection.execute("BEGIN")
+        connection.executemany("DELETE FROM queued_enquiries WHERE id = ?", [(row[0],) for row in done + dead])
+        connection.executemany("INSERT OR REPLACE INTO dead_enquiries (id, payload, error) VALUES (?, ?, ?)", dead)
+        connection.execute("COMMIT")
+
+    if dead:
+        logging.error(f"{len(dead)} queued enquiries could not be inserted; see dead_enquiries")
+    return len(rows)
+
+
+def _run_flusher():
+    interval = settings.ENQUIRY_FLUSH_INTERVAL_MS / 1000
+    while True:
+        _wakeup.wait(interval)
+        _wakeup.clear()
+        try:
+            # Keep going while full batches are waiting
+            while flush() >= settings.ENQUIRY_FLUSH_BATCH_SIZE:
+                pass
+        except Exception as e:
+            logging.error(f"Enquiry flush failed, will retry: {e}")
+
+
+def start_flusher():
+    """Start the background flusher once per process (drains leftovers after a crash)"""
+    global _flusher
+    if _flusher is None:
+        with _lock:
+            if _flusher is None:
+                _flusher = threading.Thread(target=_run_flusher, name="enquiry-flusher", daemon=True)
+                _flusher.start()
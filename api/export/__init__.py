@@ -0,0 +1,155 @@
+import azure.functions as func
+import csv
+import enum
+import gzip
+import io
+import json
+import logging
+import tempfile
+from datetime import datetime
+import orjson
+from sqlalchemy import select
+from models import Transaction, Receipt, Enquiry
+from pipeline import http_function, RequestContext
+from serializers import transaction_serializer, receipt_serializer, enquiry_serializer, GZIP_LEVEL
+from list_filters import transaction_filters, receipt_filters, enquiry_filters
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # optional: XLSX exports
+    Workbook = None
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+# entity -> (model, serializer, filter builder, date column exports are ordered by)
+ENTITIES = {
+    "transactions": (Transaction, transaction_serializer, transaction_filters, Transaction.transaction_date),
+    "receipts": (Receipt, receipt_serializer, receipt_filters, Receipt.issue_date),
+    "enquiries": (Enquiry, enquiry_serializer, enquiry_filters, Enquiry.created_at)
+}
+
+def build_export_query(model, serializer, criteria: list, sort_column):
+    """
+    Select just the serialized columns (in serializer field order), oldest first.
+
+    yield_per streams rows through a server-side cursor in batches, and
+    plain rows (no ORM identity map) are dropped as soon as they're written.
+    """
+    columns = [getattr(model, attr) for attr, _ in serializer.fields.values()]
+    return select(*columns).where(*criteria).order_by(sort_column, model.id).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+
+def cell(value):
+    """Flatten a serialized value for a spreadsheet cell"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode("utf-8")
+    return value
+
+def write_csv(sink, keys: tuple, records):
+    text = io.TextIOWrapper(sink, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(keys)
+    for record in records:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else cell(value)
+            for value in record.values()
+        ])
+    text.flush()
+    text.detach()
+
+def write_ndjson(sink, keys: tuple, records):
+    for record in records:
+        sink.write(orjson.dumps(record))
+        sink.write(b"\n")
+
+def write_xlsx(sink, keys: tuple, records):
+    # write_only workbooks spool rows to a temp file instead of keeping cells in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(keys)
+    for record in records:
+        sheet.append([cell(value) for value in record.values()])
+    workbook.save(sink)
+
+# format -> (content type, writer, compressible)
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", write_csv, True),
+    "ndjson": ("application/x-ndjson", write_ndjson, True),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", write_xlsx, False)
+}
+
+@http_function(methods=("GET",), auth=True, envelope="plain")
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    logging.info('Export API triggered')
+    
+    # Response headers
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Content-Type": "application/json"
+    }
+    
+    entity = req.route_params.get("entity")
+    if entity not in ENTITIES:
+        return func.HttpResponse(
+            json.dumps({"error": f"Unknown export: {entity}"}),
+            status_code=404,
+            headers=headers
+        )
+    
+    export_format = req.params.get("format", "csv")
+    if export_format not in FORMATS:
+        return func.HttpResponse(
+            json.dumps({"error": "format must be one of: csv, ndjson, xlsx"}),
+            status_code=400,
+            headers=headers
+        )
+    if export_format == "xlsx" and Workbook is None:
+        return func.HttpResponse(
+            json.dumps({"error": "XLSX export is not available (openpyxl is not installed)"}),
+            status_code=501,
+            headers=headers
+        )
+    
+    model, serializer, build_filters, sort_column = ENTITIES[entity]
+    try:
+        criteria = build_filters(req.params)
+    except ValueError as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            headers=headers
+        )
+    
+    content_type, write, compressible = FORMATS[export_format]
+    gzip_body = compressible and "gzip" in req.headers.get("Accept-Encoding", "")
+    
+    # Rows are encoded (and gzipped) into a file on disk as they stream in,
+    # so memory doesn't grow with the row count. The Functions HTTP binding
+    # can't stream a response, so the finished file is read back once: the
+    # body is the only thing held in full, at its encoded size
+    db = ctx.db
+    with tempfile.TemporaryFile() as export_file:
+        sink = gzip.GzipFile(fileobj=export_file, mode="wb", compresslevel=GZIP_LEVEL) if gzip_body else export_file
+        rows = db.execute(build_export_query(model, serializer, criteria, sort_column))
+        write(sink, serializer.keys, (serializer.from_values(row) for row in rows))
+        if gzip_body:
+            sink.close()
+        
+        export_file.seek(0)
+        body = export_file.read()
+    
+    filename = f"{entity}-{datetime.utcnow():%Y%m%d}.{export_format}"
+    response_headers = {
+        **headers,
+        "Content-Type": content_type,
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Vary": "Accept-Encoding"
+    }
+    if gzip_body:
+        response_headers["Content-Encoding"] = "gzip"
+    
+    return func.HttpResponse(body, status_code=200, headers=response_headers)
@@ -1,8 +1,10 @@
 import azure.functions as func
 import json
 from datetime import datetime
+from pipeline import http_function, RequestContext
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+@http_function(methods=("GET",))
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
     """Health check endpoint"""
     
     return func.HttpResponse(
@@ -14,9 +16,5 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         }),
         status_code=200,
         mimetype="application/json",
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type"
-        }
+        headers={"Access-Control-Allow-Origin": "*"}
     )
@@ -0,0 +1,78 @@
+"""Conditional GET (ETag / Last-Modified) support for public read endpoints"""
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import azure.functions as func
+from sqlalchemy import select
+from config import settings
+from models import StatCounter
+from counters import LISTING_VERSION_KEY
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify a representation"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def http_date(value) -> str:
+    """Format a naive UTC datetime as an HTTP date"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(req: func.HttpRequest, etag: str, last_modified=None) -> bool:
+    """Check the request's validators; If-None-Match wins over If-Modified-Since"""
+    if_none_match = req.headers.get("If-None-Match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = req.headers.get("If-Modified-Since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+    return False
+
+
+def cache_headers(etag: str, last_modified=None) -> dict:
+    """
+    Validator and Cache-Control headers for a public representation.
+
+    Browsers revalidate on every use (cheap 304s) so admins see edits right
+    away, while shared caches/CDNs may serve it for PUBLIC_CACHE_MAX_AGE.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age=0, s-maxage={settings.PUBLIC_CACHE_MAX_AGE}, must-revalidate"
+    }
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified_response(headers: dict) -> func.HttpResponse:
+    """Build a 304 response carrying the same validators as the 200"""
+    return func.HttpResponse(
+        status_code=304,
+        headers={**headers, "Access-Control-Allow-Origin": "*"}
+    )
+
+
+def get_listing_version(db):
+    """
+    Return (version, last_modified) of the property listing.
+
+    The version row is bumped in the same transaction as every property
+    write (see counters.py), so all instances see a new version as soon
+    as the write commits.
+    """
+    row = db.execute(
+        select(StatCounter.value, StatCounter.updated_at).where(StatCounter.key == LISTING_VERSION_KEY)
+    ).first()
+    if row is None:
+        return "0", None
+    return str(row.value), row.updated_at
@@ -0,0 +1,60 @@
+"""Query-string filters shared by the list and export endpoints
+
+Each builder turns request params into SQLAlchemy criteria, so a filter
+added here applies to both the paginated list and its bulk export. Invalid
+values raise ValueError.
+"""
+from datetime import datetime
+from sqlalchemy import or_
+from models import (
+    Transaction, TransactionType, TransactionCategory,
+    Receipt, Enquiry, EnquiryStatus, EnquiryType
+)
+
+
+def transaction_filters(params) -> list:
+    """type, category, start_date, end_date"""
+    criteria = []
+    if params.get("type"):
+        criteria.append(Transaction.type == TransactionType(params["type"]))
+    if params.get("category"):
+        criteria.append(Transaction.category == TransactionCategory(params["category"]))
+    if params.get("start_date"):
+        criteria.append(Transaction.transaction_date >= datetime.fromisoformat(params["start_date"]))
+    if params.get("end_date"):
+        criteria.append(Transaction.transaction_date <= datetime.fromisoformat(params["end_date"]))
+    return criteria
+
+
+def receipt_filters(params) -> list:
+    """start_date, end_date, customer (name or phone), min_amount, max_amount"""
+    criteria = []
+    if params.get("start_date"):
+        criteria.append(Receipt.issue_date >= datetime.fromisoformat(params["start_date"]))
+    if params.get("end_date"):
+        criteria.append(Receipt.issue_date <= datetime.fromisoformat(params["end_date"]))
+    if params.get("customer"):
+        customer = params["customer"]
+        criteria.append(or_(
+            Receipt.customer_name.ilike(f"%{customer}%"),
+            Receipt.customer_phone.ilike(f"%{customer}%")
+        ))
+    if params.get("min_amount"):
+        criteria.append(Receipt.amount >= float(params["min_amount"]))
+    if params.get("max_amount"):
+        criteria.append(Receipt.amount <= float(params["max_amount"]))
+    return criteria
+
+
+def enquiry_filters(params) -> list:
+    """status, type, start_date, end_date (created_at)"""
+    criteria = []
+    if params.get("status"):
+        criteria.append(Enquiry.status == EnquiryStatus(params["status"]))
+    if params.get("type"):
+        criteria.append(Enquiry.type == EnquiryType(params["type"]))
+    if params.get("start_date"):
+        criteria.append(Enquiry.created_at >= datetime.fromisoformat(params["start_date"]))
+    if params.get("end_date"):
+        criteria.append(Enquiry.created_at <= datetime.fromisoformat(params["end_date"]))
+    return criteria
@@ -1,12 +1,13 @@
-from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Text, DateTime, JSON, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, BigInteger, Float, Boolean, Text, DateTime, JSON, ForeignKey, Index, Computed, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
 from datetime import datetime
 import enum
-from config import settings
+from db_pool import build_engine
 
 Base = declarative_base()
-engine = create_engine(settings.DATABASE_URL)
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class PropertyType(str, enum.Enum):
@@ -58,6 +59,16 @@ class PaymentMethod(str, enum.Enum):
     CARD = "card"
     OTHER = "other"
 
+# Weighted full-text document for property search: title ranks above
+# location, which ranks above the long description. Postgres keeps the
+# generated column in sync on every INSERT/UPDATE.
+PROPERTY_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(location, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(short_description, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+)
+
 class Property(Base):
     __tablename__ = "properties"
     
@@ -83,8 +94,26 @@ class Property(Base):
     nearby_places = Column(JSON, default=list)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, Computed(PROPERTY_SEARCH_VECTOR_SQL, persisted=True)))
     
     enquiries = relationship("Enquiry", back_populates="property")
+    
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first
+        Index("ix_properties_created_at_id", "created_at", "id"),
+        Index("ix_properties_search_vector", "search_vector", postgresql_using="gin"),
+        # max(updated_at) is the listing's cache version stamp
+        Index("ix_properties_updated_at", "updated_at"),
+        # Catalog filters (status/type/featured) in the default newest-first order;
+        # the leading status column also serves the dashboard's counts by status
+        Index("ix_properties_status_type_created_at", "status", "type", "created_at"),
+        Index("ix_properties_type_created_at", "type", "created_at"),
+        Index("ix_properties_featured_created_at", "featured", "created_at"),
+        # Price/area range filters and sort= options
+        Index("ix_properties_price_id", "price", "id"),
+        Index("ix_properties_price_per_sqft_id", "price_per_sqft", "id"),
+        Index("ix_properties_area_in_sqft", "area_in_sqft"),
+    )
 
 class Enquiry(Base):
     __tablename__ = "enquiries"
@@ -103,6 +132,16 @@ class Enquiry(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     property = relationship("Property", back_populates="enquiries")
+    
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest-first
+        Index("ix_enquiries_created_at_id", "created_at", "id"),
+        # Duplicate-submission lookup (phones are stored normalized)
+        Index("ix_enquiries_phone_property_created_at", "phone", "property_id", "created_at"),
+        # Inbox status/type filters (and their totals) in newest-first order
+        Index("ix_enquiries_status_created_at", "status", "created_at"),
+        Index("ix_enquiries_type_created_at", "type", "created_at"),
+    )
 
 class AdminUser(Base):
     __tablename__ = "admin_users"
@@ -146,6 +185,15 @@ class Transaction(Base):
     
     property = relationship("Property", foreign_keys=[property_id])
     creator = relationship("AdminUser", foreign_keys=[created_by])
+    
+    __table_args__ = (
+        # Keyset pagination walks (transaction_date, id) newest-first; also
+        # serves date-range scans for /transactions/summary
+        Index("ix_transactions_transaction_date_id", "transaction_date", "id"),
+        # type= / category= filters within a date range
+        Index("ix_transactions_type_transaction_date", "type", "transaction_date"),
+        Index("ix_transactions_category_transaction_date", "category", "transaction_date"),
+    )
 
 class Receipt(Base):
     __tablename__ = "receipts"
@@ -170,6 +218,68 @@ class Receipt(Base):
     
     transaction = relationship("Transaction", foreign_keys=[transaction_id])
     creator = relationship("AdminUser", foreign_keys=[created_by])
+    
+    __table_args__ = (
+        # Keyset pagination walks (issue_date, id) newest-first
+        Index("ix_receipts_issue_date_id", "issue_date", "id"),
+        # min_amount / max_amount filters
+        Index("ix_receipts_amount", "amount"),
+        # One receipt per transaction; receipts without a transaction are unrestricted
+        Index("uq_receipts_transaction_id", "transaction_id", unique=True),
+    )
+
+class StatCounter(Base):
+    """Running totals behind the dashboard, maintained by counters.py"""
+    __tablename__ = "stat_counters"
+    
+    key = Column(String(100), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ReceiptSequence(Base):
+    """Last receipt number issued per month, handed out by receipt_numbers.py"""
+    __tablename__ = "receipt_sequences"
+    
+    period = Column(String(7), primary_key=True)  # YYYY/MM
+    last_number = Column(Integer, nullable=False, default=0)
+
+class TokenRevocation(Base):
+    """A revoked token (jti) or all of a user's tokens issued before revoked_at; see revocations.py"""
+    __tablename__ = "token_revocations"
+    
+    id = Column(String, primary_key=True)
+    jti = Column(String(64))
+    user_id = Column(String)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime)  # when the revoked token would have expired anyway
+    
+    __table_args__ = (
+        # Each process syncs rows newer than its last read
+        Index("ix_token_revocations_revoked_at", "revoked_at"),
+    )
+
+class OutboxEmail(Base):
+    """Email waiting to be sent; written with the change it reports, sent by email_outbox.py"""
+    __tablename__ = "email_outbox"
+    
+    id = Column(String, primary_key=True)
+    kind = Column(String(50), nullable=False)  # enquiry | callback | acknowledgement
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending | sent | failed | skipped
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
+    
+    __table_args__ = (
+        # The sender claims due pending messages oldest first
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        # Per-recipient throttling counts recent sends
+        Index("ix_email_outbox_recipient_sent_at", "recipient", "sent_at"),
+    )
 
 def get_db():
     db = SessionLocal()
@@ -181,3 +291,8 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     Base.metadata.create_all(bind=engine)
+
+# Keep stat_counters in step with every ORM write (registers session hooks)
+import counters  # noqa: E402,F401
+# Drop cached /auth/me profiles when an admin user changes (registers session hooks)
+import admin_profiles  # noqa: E402,F401
@@ -0,0 +1,139 @@
+"""Keyset (cursor) pagination helpers shared by the list endpoints"""
+import base64
+import json
+import time
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+# Admin ledgers (transactions, receipts) show more rows per page
+LEDGER_PAGE_SIZE = 50
+COUNT_CACHE_TTL_SECONDS = 30
+COUNT_CACHE_MAX_ENTRIES = 256
+
+# cache_key -> (total, expires_at)
+_count_cache = {}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor parameter cannot be decoded"""
+
+
+def parse_limit(value, default: int = DEFAULT_PAGE_SIZE, maximum: int = MAX_PAGE_SIZE) -> int:
+    """Parse the `limit` query parameter and clamp it to [1, maximum]"""
+    return max(1, min(int(value or default), maximum))
+
+
+def parse_bool(value, default: bool = False) -> bool:
+    """Parse a boolean query parameter ('true'/'false', '1'/'0')"""
+    if value is None or value == "":
+        return default
+    return value.lower() in ("true", "1", "yes")
+
+
+def encode_cursor(sort_value, row_id: str) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column):
+    """Decode a cursor into (sort value, id), typed for `sort_column`"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        python_type = sort_column.type.python_type
+        if python_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        elif python_type in (int, float) and (
+            isinstance(sort_value, bool) or not isinstance(sort_value, (int, float))
+        ):
+            raise TypeError("cursor does not match the sort order")
+        if not isinstance(row_id, str):
+            raise TypeError("cursor id must be a string")
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    return sort_value, row_id
+
+
+def order_by_keyset(query, sort_column, id_column, descending: bool = True):
+    """Order on (sort_column, id) - the order cursors walk"""
+    if descending:
+        return query.order_by(sort_column.desc(), id_column.desc())
+    return query.order_by(sort_column.asc(), id_column.asc())
+
+
+def fetch_keyset_page(query, sort_column, id_column, limit: int, cursor: str = None,
+                      descending: bool = True):
+    """
+    Fetch one page of `query` in (sort_column, id) order (newest-first by default).
+
+    Rows after `cursor` are selected with an index-friendly range predicate
+    instead of OFFSET, so every page costs the same regardless of depth.
+    sort_column must be NOT NULL. Returns (rows, next_cursor); next_cursor
+    is None on the last page.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        if descending:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > row_id)
+            ))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = order_by_keyset(query, sort_column, id_column, descending).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
+
+
+def cached_count(query, cache_key, ttl: int = COUNT_CACHE_TTL_SECONDS) -> int:
+    """
+    Return query.count(), reusing a recent result for the same cache_key.
+
+    Totals only need to be approximately fresh, so clients that ask for
+    them on every cursor page pay for one COUNT per key per TTL window.
+    """
+    now = time.monotonic()
+    cached = _count_cache.get(cache_key)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    total = query.count()
+    if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+        _count_cache.clear()
+    _count_cache[cache_key] = (total, now + ttl)
+    return total
+
+
+def build_pagination(limit: int, total_items: int = None, page: int = None,
+                     next_cursor: str = None, keyset: bool = False) -> dict:
+    """Build the `pagination` block for both page- and cursor-based clients"""
+    pagination = {"itemsPerPage": limit}
+
+    if page is not None:
+        pagination["currentPage"] = page
+
+    if total_items is not None:
+        pagination["totalItems"] = total_items
+        pagination["totalPages"] = (total_items + limit - 1) // limit
+
+    if keyset:
+        pagination["nextCursor"] = next_cursor
+        pagination["hasMore"] = next_cursor is not None
+
+    return pagination
@@ -0,0 +1,52 @@
+"""bcrypt hashing on a small bounded thread pool
+
+bcrypt releases the GIL, so PASSWORD_HASH_WORKERS threads run hashes in
+parallel with the rest of the worker. At most PASSWORD_HASH_MAX_PENDING
+checks may be running or waiting; beyond that PasswordHashingBusy is
+raised at once so a login storm is answered with 429s instead of tying up
+every request thread. New hashes use BCRYPT_ROUNDS, and needs_rehash()
+spots stored hashes made with a different cost.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from config import settings
+
+_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHashingBusy(Exception):
+    """Too many password checks already in flight"""
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        future = _pool.submit(fn, *args)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future.result()
+
+
+def _hash(password: bytes) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS))
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return _run(bcrypt.checkpw, plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password.encode('utf-8')).decode('utf-8')
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash's cost factor ($2b$<cost>$...) isn't BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split('$')[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
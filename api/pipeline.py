@@ -0,0 +1,178 @@
+"""Shared request pipeline for the HTTP functions
+
+Decorate a handler taking (req, ctx) with @http_function(...) and expose it
+as the function's `main`:
+
+    @http_function(methods=("GET", "POST"), auth=("POST",))
+    def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+        ...
+
+The pipeline answers CORS preflights itself (with Access-Control-Max-Age,
+before any auth or database work), rejects unsupported methods, verifies
+the bearer token for the methods listed in `auth` (ctx.user), opens a
+database session only when the handler first touches ctx.db and always
+closes it, turns uncaught exceptions into a 500 in the endpoint's error
+envelope, and adds CORS headers to every response.
+
+Endpoints keep their existing envelope: "standard" is create_error_response's
+{"success": false, "error": {code, message}}; "plain" is {"error": message}
+as used by the finance endpoints.
+
+Per-stage timings (auth, handler and anything wrapped in ctx.stage()) are
+kept in ctx.timings. Together with the request's SQL profile (statement
+count and database time, see sql_profiler.py) they are sent in a
+Server-Timing header and logged as one JSON line: at warning level when
+the request went over its query budget or spent more than
+SQL_SLOW_REQUEST_MS in the database, at debug level otherwise.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+import azure.functions as func
+from config import settings
+from models import SessionLocal
+from utils import get_current_user, create_error_response
+from sql_profiler import profile, QueryBudgetExceeded
+
+
+class RequestContext:
+    def __init__(self, req: func.HttpRequest, envelope: str):
+        self.req = req
+        self.envelope = envelope
+        self.user = None
+        self.timings = {}
+        self.sql = None
+        self._db = None
+
+    @property
+    def db(self):
+        """Session opened on first use and closed by the pipeline"""
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    def error(self, code: str, message: str, status_code: int, headers: dict = None) -> func.HttpResponse:
+        """Error response in this endpoint's envelope"""
+        if self.envelope == "plain":
+            body = {"error": message}
+        else:
+            body, status_code = create_error_response(code, message, status_code)
+        return func.HttpResponse(
+            json.dumps(body),
+            status_code=status_code,
+            mimetype="application/json",
+            headers=headers
+        )
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def cors_headers(methods) -> dict:
+    return {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": ", ".join((*methods, "OPTIONS")),
+        "Access-Control-Allow-Headers": "Content-Type, Authorization"
+    }
+
+
+def http_function(methods=("GET",), auth=(), envelope: str = "standard", query_budget: int = None):
+    """
+    Wrap a (req, ctx) handler as an Azure Functions `main(req)`.
+
+    auth: methods that need a valid bearer token (True for all of them).
+    query_budget: most SQL statements one request should run.
+    """
+    methods = tuple(method.upper() for method in methods)
+    auth_methods = set(methods) if auth is True else {method.upper() for method in auth}
+    headers = cors_headers(methods)
+    preflight_headers = {**headers, "Access-Control-Max-Age": str(settings.CORS_MAX_AGE)}
+
+    def decorator(handler):
+        name = handler.__module__
+
+        def main(req: func.HttpRequest) -> func.HttpResponse:
+            if req.method == "OPTIONS":
+                return func.HttpResponse(status_code=204, headers=preflight_headers)
+
+            ctx = RequestContext(req, envelope)
+            started = time.perf_counter()
+            with profile(query_budget, strict=settings.SQL_QUERY_BUDGET_STRICT) as ctx.sql:
+                try:
+                    if req.method not in methods:
+                        response = ctx.error("METHOD_NOT_ALLOWED", f"Method {req.method} not allowed", 405)
+                    elif req.method in auth_methods and not _authenticate(ctx):
+                        response = ctx.error(
+                            "UNAUTHORIZED",
+                            "Unauthorized" if envelope == "plain" else "Authentication required",
+                            401
+                        )
+                    else:
+                        with ctx.stage("handler"):
+                            response = handler(req, ctx)
+                except QueryBudgetExceeded as e:
+                    if e.profile is not ctx.sql:
+                        # An enclosing max_queries() block's budget; let the caller see it
+                        raise
+                    response = ctx.error("QUERY_BUDGET_EXCEEDED", str(e), 500)
+                except Exception as e:
+                    logging.exception(f"Unhandled error in {name}")
+                    response = ctx.error("INTERNAL_ERROR", str(e), 500)
+                finally:
+                    # Closing rolls back anything the handler didn't commit
+                    ctx.close()
+            ctx.timings["total"] = time.perf_counter() - started
+
+            for header, value in headers.items():
+                if header not in response.headers:
+                    response.headers[header] = value
+            response.headers["Server-Timing"] = _server_timing(ctx)
+            response.headers["Timing-Allow-Origin"] = "*"
+
+            _log_profile(ctx, name, response.status_code)
+            return response
+
+        main.__doc__ = handler.__doc__
+        return main
+
+    return decorator
+
+
+def _server_timing(ctx: RequestContext) -> str:
+    metrics = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in ctx.timings.items() if stage != "total"]
+    if settings.SQL_PROFILING:
+        queries = f"{ctx.sql.count} {'query' if ctx.sql.count == 1 else 'queries'}"
+        metrics.append(f'db;dur={ctx.sql.seconds * 1000:.1f};desc="{queries}"')
+    metrics.append(f"total;dur={ctx.timings['total'] * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+def _log_profile(ctx: RequestContext, name: str, status_code: int):
+    slow = ctx.sql.over_budget or ctx.sql.seconds * 1000 > settings.SQL_SLOW_REQUEST_MS
+    level = logging.WARNING if slow else logging.DEBUG
+    if not logging.getLogger().isEnabledFor(level):
+        return
+    logging.log(level, json.dumps({
+        "function": name,
+        "method": ctx.req.method,
+        "status": status_code,
+        "timings_ms": {stage: round(seconds * 1000, 3) for stage, seconds in ctx.timings.items()},
+        **ctx.sql.summary()
+    }))
+
+
+def _authenticate(ctx: RequestContext) -> bool:
+    with ctx.stage("auth"):
+        ctx.user = get_current_user(ctx.req.headers.get("Authorization", ""))
+    return ctx.user is not None
@@ -1,174 +1,223 @@
 import azure.functions as func
 import json
 import uuid
-from models import SessionLocal, Property
-from utils import get_current_user, create_response, create_error_response, slugify
+from models import Property
+from utils import create_response, slugify
+from pipeline import http_function, RequestContext
+from search import apply_property_search
+from http_cache import get_listing_version, make_etag, cache_headers, is_not_modified, not_modified_response
+from pagination import parse_limit, parse_bool, decode_cursor, fetch_keyset_page, order_by_keyset, cached_count, build_pagination
+from serializers import PROPERTY_FIELDS, PROPERTY_VIEWS, property_serializer, negotiate, encode_response
+from sqlalchemy.orm import load_only
 from datetime import datetime
 
-def main(req: func.HttpRequest) -> func.HttpResponse:
+def parse_property_fields(fields_param, view):
+    """Resolve `fields=`/`view=` into API field names; None means all fields"""
+    if fields_param:
+        fields = [f.strip() for f in fields_param.split(',') if f.strip()]
+        unknown = [f for f in fields if f not in PROPERTY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+    if view:
+        if view not in PROPERTY_VIEWS:
+            raise ValueError(f"Unknown view: {view}")
+        return list(PROPERTY_VIEWS[view])
+    return None
+
+# sort= option -> (column, descending, supports cursors)
+PROPERTY_SORTS = {
+    "newest": (Property.created_at, True, True),
+    "price_asc": (Property.price, False, True),
+    "price_desc": (Property.price, True, True),
+    # price_per_sqft is optional, so it pages by number with unpriced rows last
+    "price_per_sqft": (Property.price_per_sqft, False, False)
+}
+
+def parse_number(value, cast, name):
+    """Parse an optional numeric query parameter"""
+    if value is None or value == '':
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+@http_function(methods=("GET", "POST"), auth=("POST",), query_budget=6)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
     """Get all properties or create new property"""
+    db = ctx.db
     
-    # Handle OPTIONS for CORS
-    if req.method == "OPTIONS":
-        return func.HttpResponse(
+    if req.method == "GET":
+        # Get query parameters
+        page = int(req.params.get('page', 1))
+        limit = parse_limit(req.params.get('limit'))
+        cursor = req.params.get('cursor')
+        status_filter = req.params.get('status')
+        type_filter = req.params.get('type')
+        featured = req.params.get('featured')
+        location = req.params.get('location')
+        search = req.params.get('search')
+        fields_param = req.params.get('fields')
+        view = req.params.get('view')
+        sort = req.params.get('sort', 'newest')
+        
+        try:
+            selected_fields = parse_property_fields(fields_param, view)
+            if sort not in PROPERTY_SORTS:
+                raise ValueError(f"Unknown sort: {sort}")
+            min_price = parse_number(req.params.get('minPrice'), float, 'minPrice')
+            max_price = parse_number(req.params.get('maxPrice'), float, 'maxPrice')
+            min_area = parse_number(req.params.get('minArea'), int, 'minArea')
+            max_area = parse_number(req.params.get('maxArea'), int, 'maxArea')
+            # Reject bad cursors before any query (search results are ranked, so they page by number)
+            if cursor:
+                sort_column, _, sort_supports_cursor = PROPERTY_SORTS[sort]
+                if search or not sort_supports_cursor:
+                    raise ValueError("cursor cannot be combined with search or this sort")
+                decode_cursor(cursor, sort_column)
+        except ValueError as e:
+            return ctx.error("VALIDATION_ERROR", str(e), 400)
+        serializer = property_serializer.only(selected_fields) if selected_fields else property_serializer
+        
+        # Cursor clients page without totals unless they ask for one
+        include_total = parse_bool(req.params.get('includeTotal'), default=not cursor)
+        
+        # Answer revalidations from the listing version before querying rows
+        version, last_modified = get_listing_version(db)
+        etag = make_etag("properties", version, sorted(req.params.items()), *negotiate(req))
+        caching_headers = cache_headers(etag, last_modified)
+        
+        if is_not_modified(req, etag, last_modified):
+            return not_modified_response(caching_headers)
+        
+        # Build query
+        query = db.query(Property)
+        
+        sort_column, descending, sort_supports_cursor = PROPERTY_SORTS[sort]
+        
+        # Only load the selected columns (plus the keyset sort key)
+        if selected_fields:
+            columns = {PROPERTY_FIELDS[f][0] for f in selected_fields} | {"id", sort_column.key}
+            query = query.options(load_only(*[getattr(Property, c) for c in columns]))
+        
+        if status_filter:
+            query = query.filter(Property.status == status_filter)
+        if type_filter:
+            query = query.filter(Property.type == type_filter)
+        if featured is not None:
+            query = query.filter(Property.featured == (featured.lower() == 'true'))
+        if location:
+            query = query.filter(Property.location.ilike(f'%{location}%'))
+        if min_price is not None:
+            query = query.filter(Property.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Property.price <= max_price)
+        if min_area is not None:
+            query = query.filter(Property.area_in_sqft >= min_area)
+        if max_area is not None:
+            query = query.filter(Property.area_in_sqft <= max_area)
+        if search:
+            query = apply_property_search(db, query, search)
+        
+        # Count total (cursor pages reuse a recent count for the same filters)
+        total_items = None
+        if include_total and cursor:
+            total_items = cached_count(query, (
+                'properties', status_filter, type_filter, featured, location, search,
+                min_price, max_price, min_area, max_area
+            ))
+        elif include_total:
+            total_items = query.count()
+        
+        # Paginate (search results are ranked, so they page by number)
+        keyset = not search and sort_supports_cursor and (bool(cursor) or 'page' not in req.params)
+        next_cursor = None
+        if keyset:
+            properties, next_cursor = fetch_keyset_page(
+                query, sort_column, Property.id, limit, cursor, descending
+            )
+        else:
+            offset = (page - 1) * limit
+            if sort_supports_cursor:
+                query = order_by_keyset(query, sort_column, Property.id, descending)
+            else:
+                query = query.order_by(sort_column.asc().nullslast(), Property.id.asc())
+            properties = query.offset(offset).limit(limit).all()
+        
+        # Convert to dict
+        properties_data = serializer.many(properties)
+        
+        # Cards only show a cover image
+        if view == 'card' and not fields_param:
+            for prop_data in properties_data:
+                prop_data["images"] = prop_data["images"][:1]
+        
+        response = create_response(
+            data={
+                "properties": properties_data,
+                "pagination": build_pagination(
+                    limit, total_items, None if cursor else page, next_cursor, keyset
+                )
+            }
+        )
+        
+        return encode_response(
+            req,
+            response,
             status_code=200,
             headers={
                 "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, Authorization"
+                **caching_headers
             }
         )
     
-    try:
-        db = SessionLocal()
-        
-        if req.method == "GET":
-            # Get query parameters
-            page = int(req.params.get('page', 1))
-            limit = int(req.params.get('limit', 10))
-            status_filter = req.params.get('status')
-            type_filter = req.params.get('type')
-            featured = req.params.get('featured')
-            location = req.params.get('location')
-            search = req.params.get('search')
-            
-            # Build query
-            query = db.query(Property)
-            
-            if status_filter:
-                query = query.filter(Property.status == status_filter)
-            if type_filter:
-                query = query.filter(Property.type == type_filter)
-            if featured is not None:
-                query = query.filter(Property.featured == (featured.lower() == 'true'))
-            if location:
-                query = query.filter(Property.location.ilike(f'%{location}%'))
-            if search:
-                query = query.filter(
-                    (Property.title.ilike(f'%{search}%')) |
-                    (Property.description.ilike(f'%{search}%')) |
-                    (Property.location.ilike(f'%{search}%'))
-                )
-            
-            # Count total
-            total_items = query.count()
-            total_pages = (total_items + limit - 1) // limit
-            
-            # Paginate
-            offset = (page - 1) * limit
-            properties = query.offset(offset).limit(limit).all()
-            
-            # Convert to dict
-            properties_data = []
-            for prop in properties:
-                properties_data.append({
-                    "id": prop.id,
-                    "title": prop.title,
-                    "slug": prop.slug,
-                    "description": prop.description,
-                    "shortDescription": prop.short_description,
-                    "price": prop.price,
-                    "pricePerSqFt": prop.price_per_sqft,
-                    "area": prop.area,
-                    "areaInSqFt": prop.area_in_sqft,
-                    "location": prop.location,
-                    "fullAddress": prop.full_address,
-                    "googleMapsLink": prop.google_maps_link,
-                    "type": prop.type.value if prop.type else None,
-                    "status": prop.status.value if prop.status else None,
-                    "featured": prop.featured,
-                    "images": prop.images or [],
-                    "amenities": prop.amenities or [],
-                    "highlights": prop.highlights or [],
-                    "legalInfo": prop.legal_info or {},
-                    "nearbyPlaces": prop.nearby_places or [],
-                    "createdAt": prop.created_at.isoformat() if prop.created_at else None,
-                    "updatedAt": prop.updated_at.isoformat() if prop.updated_at else None
-                })
-            
-            response = create_response(
-                data={
-                    "properties": properties_data,
-                    "pagination": {
-                        "currentPage": page,
-                        "totalPages": total_pages,
-                        "totalItems": total_items,
-                        "itemsPerPage": limit
-                    }
-                }
-            )
-            
-            db.close()
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=200,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*"
-                }
-            )
+    elif req.method == "POST":
+        # Parse request body
+        req_body = req.get_json()
+        
+        # Create new property
+        property_id = str(uuid.uuid4())
+        slug = slugify(req_body.get('title', ''))
+        
+        new_property = Property(
+            id=property_id,
+            title=req_body.get('title'),
+            slug=slug,
+            description=req_body.get('description'),
+            short_description=req_body.get('shortDescription'),
+            price=req_body.get('price'),
+            price_per_sqft=req_body.get('pricePerSqFt'),
+            area=req_body.get('area'),
+            area_in_sqft=req_body.get('areaInSqFt'),
+            location=req_body.get('location'),
+            full_address=req_body.get('fullAddress'),
+            google_maps_link=req_body.get('googleMapsLink'),
+            type=req_body.get('type'),
+            status=req_body.get('status', 'available'),
+            featured=req_body.get('featured', False),
+            images=req_body.get('images', []),
+            amenities=req_body.get('amenities', []),
+            highlights=req_body.get('highlights', []),
+            legal_info=req_body.get('legalInfo', {}),
+            nearby_places=req_body.get('nearbyPlaces', [])
+        )
+        
+        db.add(new_property)
+        db.commit()
+        db.refresh(new_property)
+        
+        response = create_response(
+            data={"id": new_property.id},
+            message="Property created successfully"
+        )
+        
+        return func.HttpResponse(
+            json.dumps(response),
+            status_code=201,
+            mimetype="application/json",
+            headers={
+                "Access-Control-Allow-Origin": "*"
+            }
+        )
         
-        elif req.method == "POST":
-            # Verify admin authentication
-            authorization = req.headers.get('Authorization', '')
-            user_payload = get_current_user(authorization)
-            
-            if not user_payload:
-                response, status = create_error_response("UNAUTHORIZED", "Authentication required", 401)
-                db.close()
-                return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
-            
-            # Parse request body
-            req_body = req.get_json()
-            
-            # Create new property
-            property_id = str(uuid.uuid4())
-            slug = slugify(req_body.get('title', ''))
-            
-            new_property = Property(
-                id=property_id,
-                title=req_body.get('title'),
-                slug=slug,
-                description=req_body.get('description'),
-                short_description=req_body.get('shortDescription'),
-                price=req_body.get('price'),
-                price_per_sqft=req_body.get('pricePerSqFt'),
-                area=req_body.get('area'),
-                area_in_sqft=req_body.get('areaInSqFt'),
-                location=req_body.get('location'),
-                full_address=req_body.get('fullAddress'),
-                google_maps_link=req_body.get('googleMapsLink'),
-                type=req_body.get('type'),
-                status=req_body.get('status', 'available'),
-                featured=req_body.get('featured', False),
-                images=req_body.get('images', []),
-                amenities=req_body.get('amenities', []),
-                highlights=req_body.get('highlights', []),
-                legal_info=req_body.get('legalInfo', {}),
-                nearby_places=req_body.get('nearbyPlaces', [])
-            )
-            
-            db.add(new_property)
-            db.commit()
-            db.refresh(new_property)
-            
-            response = create_response(
-                data={"id": new_property.id},
-                message="Property created successfully"
-            )
-            
-            db.close()
-            return func.HttpResponse(
-                json.dumps(response),
-                status_code=201,
-                mimetype="application/json",
-                headers={
-                    "Access-Control-Allow-Origin": "*"
-                }
-            )
-            
-    except Exception as e:
-        if 'db' in locals():
-            db.close()
-        response, status = create_error_response("INTERNAL_ERROR", str(e), 500)
-        return func.HttpResponse(json.dumps(response), status_code=status, mimetype="application/json")
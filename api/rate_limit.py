@@ -0,0 +1,42 @@
+"""In-process token-bucket rate limiting keyed by client
+
+Each key gets a bucket of `burst` tokens refilled at `per_minute` tokens a
+minute; a request spends one token or is rejected. Buckets live in an LRU
+capped at `max_keys`, so a flood of distinct IPs can't grow memory without
+bound. Limits are per worker process, which is enough to stop floods before
+they reach the database. A `per_minute` of 0 disables the limiter.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+MAX_RETRY_AFTER_SECONDS = 3600
+
+
+class TokenBucketLimiter:
+    def __init__(self, per_minute: int, burst: int, max_keys: int = 10000):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Spend a token for `key`; returns 0 if allowed, else seconds until one is available"""
+        if not self.rate:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+            if tokens >= 1:
+                retry_after = 0
+                tokens -= 1
+            else:
+                retry_after = min((1 - tokens) / self.rate, MAX_RETRY_AFTER_SECONDS)
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
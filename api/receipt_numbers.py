@@ -0,0 +1,39 @@
+"""Gap-free RCP/YYYY/MM/NNNN receipt numbers from a per-month counter row
+
+Numbers are allocated with a single upsert on receipt_sequences. The row
+stays locked until the caller's transaction ends, so concurrent creates
+queue behind each other instead of racing to the same number, and a
+rolled-back receipt also rolls back its number (no gaps).
+"""
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert
+from models import ReceiptSequence
+
+RECEIPT_PREFIX = "RCP"
+
+
+def receipt_period(when: datetime = None) -> str:
+    when = when or datetime.now()
+    return f"{when.year}/{when.month:02d}"
+
+
+def format_receipt_number(period: str, number: int) -> str:
+    return f"{RECEIPT_PREFIX}/{period}/{number:04d}"
+
+
+def allocate_receipt_numbers(db, count: int = 1, when: datetime = None) -> list:
+    """
+    Reserve `count` consecutive receipt numbers for the month of `when`.
+
+    Call it as late as possible before committing: the month's counter row
+    is locked until db commits or rolls back.
+    """
+    period = receipt_period(when)
+    stmt = insert(ReceiptSequence).values(period=period, last_number=count)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ReceiptSequence.period],
+        set_={"last_number": ReceiptSequence.last_number + stmt.excluded.last_number}
+    ).returning(ReceiptSequence.last_number)
+
+    last = db.execute(stmt).scalar_one()
+    return [format_receipt_number(period, number) for number in range(last - count + 1, last + 1)]
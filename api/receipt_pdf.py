@@ -0,0 +1,216 @@
+"""Server-side receipt PDFs with an on-disk, content-addressed render cache
+
+A receipt's PDF is cached under a hash of everything printed on it (plus
+updated_at and LAYOUT_VERSION), so an edit produces a new key and stale
+files are simply never read again. Misses are rendered in a process pool:
+reportlab is CPU-bound and would otherwise stall the worker's other
+requests. Workers write the file themselves so PDFs never cross processes.
+
+Superseded and rarely used files are evicted by prune_cache(), which keeps
+the directory under RECEIPT_PDF_CACHE_MAX_MB by deleting the least
+recently used PDFs (hits refresh a file's mtime).
+"""
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import orjson
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+from config import settings
+from serializers import receipt_serializer
+
+# Bump when the layout below changes so cached PDFs are re-rendered
+LAYOUT_VERSION = 1
+
+COMPANY_NAME = "DreamLadder"
+COMPANY_TAGLINE = "Real Estate Solutions"
+COMPANY_CONTACT = "Contact: info@dreamladder.com | Phone: +91-XXXXXXXXXX"
+
+# Files used this recently are never pruned, so a request can't lose the
+# PDF it is about to read
+PRUNE_MIN_AGE_SECONDS = 600
+PRUNE_INTERVAL_SECONDS = 300
+
+_pool = None
+_next_prune = 0.0
+
+
+def receipt_content(receipt) -> dict:
+    """JSON-native snapshot of a receipt: the render input and the cache key source"""
+    content = receipt_serializer(receipt)
+    content["updated_at"] = receipt.updated_at
+    return orjson.loads(orjson.dumps(content))
+
+
+def cache_path(content: dict) -> str:
+    digest = hashlib.sha256(
+        orjson.dumps(content, option=orjson.OPT_SORT_KEYS) + f"|v{LAYOUT_VERSION}".encode("ascii")
+    ).hexdigest()
+    return os.path.join(settings.RECEIPT_PDF_CACHE_DIR, digest[:2], f"{digest}.pdf")
+
+
+def format_inr(amount: float) -> str:
+    """Rs. 12,34,567.00 (Indian digit grouping)"""
+    whole, fraction = f"{amount:.2f}".split(".")
+    sign = "-" if whole.startswith("-") else ""
+    whole = whole.lstrip("-")
+    if len(whole) > 3:
+        head, tail = whole[:-3], whole[-3:]
+        groups = []
+        while len(head) > 2:
+            groups.insert(0, head[-2:])
+            head = head[:-2]
+        whole = ",".join(([head] if head else []) + groups + [tail])
+    return f"Rs. {sign}{whole}.{fraction}"
+
+
+def render_to_file(content: dict, path: str) -> str:
+    """Render one receipt to `path` (runs in a pool worker)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    pdf = canvas.Canvas(tmp_path, pagesize=A4)
+    pdf.setTitle(f"Receipt {content['receipt_number']}")
+    width, height = A4
+    left, right = 20 * mm, width - 20 * mm
+    y = height - 25 * mm
+
+    pdf.setFont("Helvetica-Bold", 20)
+    pdf.drawCentredString(width / 2, y, COMPANY_NAME)
+    pdf.setFont("Helvetica", 10)
+    pdf.drawCentredString(width / 2, y - 14, COMPANY_TAGLINE)
+    pdf.setFont("Helvetica", 8)
+    pdf.drawCentredString(width / 2, y - 26, COMPANY_CONTACT)
+    y -= 38
+    pdf.line(left, y, right, y)
+
+    y -= 22
+    pdf.setFont("Helvetica", 9)
+    pdf.drawString(left, y, "Receipt No.")
+    pdf.drawRightString(right, y, "Date")
+    pdf.setFont("Helvetica-Bold", 12)
+    pdf.drawString(left, y - 15, content["receipt_number"])
+    pdf.drawRightString(right, y - 15, content["issue_date"][:10])
+
+    y -= 45
+    pdf.setFont("Helvetica-Bold", 11)
+    pdf.drawString(left, y, "Customer Details")
+    pdf.setFont("Helvetica", 10)
+    customer_lines = [
+        content["customer_name"],
+        content.get("customer_address"),
+        f"Phone: {content['customer_phone']}" if content.get("customer_phone") else None,
+        f"Email: {content['customer_email']}" if content.get("customer_email") else None
+    ]
+    for line in filter(None, customer_lines):
+        y -= 14
+        pdf.drawString(left, y, line)
+
+    y -= 30
+    payment_method = (content.get("payment_method") or "-").replace("_", " ").title()
+    for label, value in (("Description:", content["description"]), ("Payment Method:", payment_method)):
+        pdf.setFont("Helvetica", 10)
+        pdf.drawString(left, y, label)
+        pdf.drawRightString(right, y, value)
+        y -= 18
+
+    pdf.setDash(3, 3)
+    pdf.line(left, y + 6, right, y + 6)
+    pdf.setDash()
+    y -= 14
+    pdf.setFont("Helvetica-Bold", 13)
+    pdf.drawString(left, y, "Amount Paid:")
+    pdf.drawRightString(right, y, format_inr(content["amount"]))
+    y -= 20
+    pdf.setFont("Helvetica", 9)
+    pdf.drawString(left, y, "In Words:")
+    pdf.drawRightString(right, y, content.get("amount_in_words") or "")
+
+    if content.get("notes"):
+        y -= 30
+        pdf.setFont("Helvetica", 9)
+        pdf.drawString(left, y, "Notes:")
+        pdf.drawString(left, y - 12, content["notes"])
+        y -= 12
+
+    y -= 30
+    pdf.line(left, y, right, y)
+    pdf.setFont("Helvetica", 8)
+    pdf.drawCentredString(width / 2, y - 14, "This is a computer-generated receipt and does not require a signature.")
+    pdf.drawCentredString(width / 2, y - 26, "Thank you for your business!")
+
+    pdf.showPage()
+    pdf.save()
+    os.replace(tmp_path, path)
+    return path
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the Functions worker is multi-threaded
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def receipt_pdf_paths(receipts) -> list:
+    """Cached PDF path for each receipt, rendering any misses in the pool"""
+    contents = [receipt_content(receipt) for receipt in receipts]
+    paths = [cache_path(content) for content in contents]
+
+    misses = {}
+    for path, content in zip(paths, contents):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            misses[path] = content
+
+    if misses:
+        pool = _get_pool()
+        for future in [pool.submit(render_to_file, content, path) for path, content in misses.items()]:
+            future.result()
+        _maybe_prune()
+
+    return paths
+
+
+def _maybe_prune():
+    global _next_prune
+    if time.monotonic() >= _next_prune:
+        _next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+        prune_cache()
+
+
+def prune_cache(max_bytes: int = None) -> int:
+    """Delete least recently used PDFs until the cache fits; returns files removed"""
+    max_bytes = settings.RECEIPT_PDF_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    files = []
+    total = 0
+    for root, _, names in os.walk(settings.RECEIPT_PDF_CACHE_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    cutoff = time.time() - PRUNE_MIN_AGE_SECONDS
+    for mtime, size, path in sorted(files):
+        if total <= max_bytes or mtime > cutoff:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
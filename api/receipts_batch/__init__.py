@@ -0,0 +1,176 @@
+import azure.functions as func
+import json
+import logging
+from datetime import datetime
+import uuid
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from models import Receipt, Transaction, TransactionType
+from utils import number_to_words
+from pipeline import http_function, RequestContext
+from list_filters import transaction_filters
+from receipt_numbers import allocate_receipt_numbers
+
+MAX_BATCH_SIZE = 500
+
+TRANSACTION_COLUMNS = (
+    Transaction.id,
+    Transaction.type,
+    Transaction.category,
+    Transaction.amount,
+    Transaction.description,
+    Transaction.payment_method,
+    Transaction.customer_name,
+    Transaction.customer_phone,
+    Transaction.customer_email,
+    Transaction.transaction_date
+)
+
+def load_transactions(db, data: dict) -> list:
+    """Requested transactions in request order (ids) or date order (filter)"""
+    if "transaction_ids" in data:
+        ids = data["transaction_ids"]
+        if not isinstance(ids, list) or not ids or not all(isinstance(id_, str) for id_ in ids):
+            raise ValueError("transaction_ids must be a non-empty list of ids")
+        if len(ids) > MAX_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_BATCH_SIZE} transactions per batch")
+        ids = list(dict.fromkeys(ids))
+        rows = {row.id: row for row in db.execute(select(*TRANSACTION_COLUMNS).where(Transaction.id.in_(ids)))}
+        return [(id_, rows.get(id_)) for id_ in ids]
+
+    # Receipts are only issued for money received
+    criteria = transaction_filters(data["filter"]) + [Transaction.type == TransactionType.INCOME]
+    rows = db.execute(
+        select(*TRANSACTION_COLUMNS).where(*criteria)
+        .order_by(Transaction.transaction_date, Transaction.id)
+        .limit(MAX_BATCH_SIZE + 1)
+    ).all()
+    if len(rows) > MAX_BATCH_SIZE:
+        raise ValueError(f"Filter matches more than {MAX_BATCH_SIZE} transactions; narrow the date range")
+    return [(row.id, row) for row in rows]
+
+def skip_reason(transaction, existing: set):
+    if transaction is None:
+        return "Transaction not found"
+    if transaction.id in existing:
+        return "Receipt already issued"
+    if transaction.type != TransactionType.INCOME:
+        return "Not an income transaction"
+    if not transaction.customer_name:
+        return "Transaction has no customer name"
+    return None
+
+@http_function(methods=("POST",), auth=True, envelope="plain", query_budget=8)
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    logging.info('Receipts batch API triggered')
+    
+    # Response headers
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Content-Type": "application/json"
+    }
+    
+    try:
+        data = req.get_json()
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps({"error": "Invalid JSON"}),
+            status_code=400,
+            headers=headers
+        )
+    
+    if not isinstance(data, dict) or ("transaction_ids" in data) == ("filter" in data):
+        return func.HttpResponse(
+            json.dumps({"error": "Provide either transaction_ids or filter"}),
+            status_code=400,
+            headers=headers
+        )
+    
+    db = ctx.db
+    
+    try:
+        transactions = load_transactions(db, data)
+        issue_date = datetime.fromisoformat(data["issue_date"]) if data.get("issue_date") else None
+    except (ValueError, TypeError, AttributeError) as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e)}),
+            status_code=400,
+            headers=headers
+        )
+    
+    found_ids = [id_ for id_, transaction in transactions if transaction is not None]
+    existing = set(db.execute(
+        select(Receipt.transaction_id).where(Receipt.transaction_id.in_(found_ids))
+    ).scalars())
+    
+    results = []
+    eligible = []
+    for transaction_id, transaction in transactions:
+        reason = skip_reason(transaction, existing)
+        if reason:
+            results.append({"transaction_id": transaction_id, "status": "skipped", "error": reason})
+        else:
+            result = {"transaction_id": transaction_id, "status": "created"}
+            results.append(result)
+            eligible.append((transaction, result))
+    
+    if eligible:
+        # One block of consecutive numbers, one multi-row INSERT, one commit
+        now = datetime.utcnow()
+        while eligible:
+            savepoint = db.begin_nested()
+            numbers = allocate_receipt_numbers(db, len(eligible))
+            rows = []
+            for (transaction, result), receipt_number in zip(eligible, numbers):
+                rows.append({
+                    "id": str(uuid.uuid4()),
+                    "receipt_number": receipt_number,
+                    "transaction_id": transaction.id,
+                    "customer_name": transaction.customer_name,
+                    "customer_phone": transaction.customer_phone,
+                    "customer_email": transaction.customer_email,
+                    "amount": transaction.amount,
+                    "amount_in_words": number_to_words(int(transaction.amount)),
+                    "description": transaction.description or transaction.category.value.replace("_", " ").title(),
+                    "payment_method": transaction.payment_method,
+                    "issue_date": issue_date or transaction.transaction_date,
+                    "notes": data.get("notes"),
+                    "created_by": ctx.user.get("sub"),
+                    "created_at": now,
+                    "updated_at": now
+                })
+            
+            inserted = set(db.execute(
+                insert(Receipt).values(rows)
+                .on_conflict_do_nothing(index_elements=[Receipt.transaction_id])
+                .returning(Receipt.transaction_id)
+            ).scalars())
+            if len(inserted) == len(rows):
+                savepoint.commit()
+                for (transaction, result), row in zip(eligible, rows):
+                    result.update({
+                        "receipt_id": row["id"],
+                        "receipt_number": row["receipt_number"],
+                        "amount": transaction.amount
+                    })
+                break
+            
+            # Another request issued some of these since the check above. Give the
+            # numbers back so none are lost, and retry without those transactions
+            savepoint.rollback()
+            for transaction, result in eligible:
+                if transaction.id not in inserted:
+                    result.update({"status": "skipped", "error": "Receipt already issued"})
+            eligible = [(transaction, result) for transaction, result in eligible if transaction.id in inserted]
+        
+        db.commit()
+    
+    return func.HttpResponse(
+        json.dumps({
+            "created": len(eligible),
+            "skipped": len(results) - len(eligible),
+            "results": results
+        }),
+        status_code=201 if eligible else 200,
+        headers=headers
+    )
@@ -0,0 +1,55 @@
+import azure.functions as func
+import json
+import logging
+import os
+from models import Receipt
+from pipeline import http_function, RequestContext
+from http_cache import is_not_modified, not_modified_response
+from receipt_pdf import receipt_pdf_paths, receipt_content, cache_path
+
+@http_function(methods=("GET",), auth=True, envelope="plain")
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    logging.info('Receipt PDF API triggered')
+    
+    # Response headers
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Content-Type": "application/json"
+    }
+    
+    db = ctx.db
+    
+    receipt = db.query(Receipt).filter(Receipt.id == req.route_params.get("id")).first()
+    if not receipt:
+        return func.HttpResponse(
+            json.dumps({"error": "Receipt not found"}),
+            status_code=404,
+            headers=headers
+        )
+    
+    filename = f"{receipt.receipt_number.replace('/', '-')}.pdf"
+    # The cache file name is a hash of the receipt's content, so revalidations
+    # are answered without rendering (or even having) the PDF
+    digest = os.path.splitext(os.path.basename(cache_path(receipt_content(receipt))))[0]
+    pdf_headers = {
+        "ETag": f'"{digest[:32]}"',
+        "Cache-Control": "private, no-cache"
+    }
+    if is_not_modified(req, pdf_headers["ETag"]):
+        return not_modified_response(pdf_headers)
+    
+    path = receipt_pdf_paths([receipt])[0]
+    
+    with open(path, "rb") as pdf_file:
+        body = pdf_file.read()
+    
+    return func.HttpResponse(
+        body,
+        status_code=200,
+        headers={
+            **headers,
+            **pdf_headers,
+            "Content-Type": "application/pdf",
+            "Content-Disposition": f'inline; filename="{filename}"'
+        }
+    )
@@ -0,0 +1,75 @@
+import azure.functions as func
+import json
+import logging
+import tempfile
+import zipfile
+from datetime import datetime
+from sqlalchemy import select
+from models import Receipt
+from pipeline import http_function, RequestContext
+from receipt_pdf import receipt_pdf_paths
+
+# Receipts loaded and rendered per round; bounds memory and keeps the pool busy
+BUNDLE_BATCH_SIZE = 50
+
+def month_range(month: str):
+    """'YYYY-MM' -> [start, end) datetimes"""
+    start = datetime.strptime(month, "%Y-%m")
+    end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+@http_function(methods=("GET",), auth=True, envelope="plain")
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    logging.info('Receipts PDF bundle API triggered')
+    
+    # Response headers
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Content-Type": "application/json"
+    }
+    
+    month = req.params.get("month", "")
+    try:
+        start, end = month_range(month)
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps({"error": "month must be given as YYYY-MM"}),
+            status_code=400,
+            headers=headers
+        )
+    
+    db = ctx.db
+    
+    # PDFs are copied one at a time from the render cache into a zip on
+    # disk; only the finished archive is read back for the response
+    with tempfile.TemporaryFile() as archive_file:
+        query = select(Receipt).where(
+            Receipt.issue_date >= start, Receipt.issue_date < end
+        ).order_by(Receipt.issue_date, Receipt.id).execution_options(yield_per=BUNDLE_BATCH_SIZE)
+        
+        count = 0
+        # PDFs are already compressed; store them as-is
+        with zipfile.ZipFile(archive_file, "w", zipfile.ZIP_STORED) as archive:
+            for receipts in db.execute(query).scalars().partitions():
+                for receipt, path in zip(receipts, receipt_pdf_paths(receipts)):
+                    archive.write(path, arcname=f"{receipt.receipt_number.replace('/', '-')}.pdf")
+                    count += 1
+        if not count:
+            return func.HttpResponse(
+                json.dumps({"error": f"No receipts issued in {month}"}),
+                status_code=404,
+                headers=headers
+            )
+        
+        archive_file.seek(0)
+        body = archive_file.read()
+    
+    return func.HttpResponse(
+        body,
+        status_code=200,
+        headers={
+            **headers,
+            "Content-Type": "application/zip",
+            "Content-Disposition": f'attachment; filename="receipts-{month}.zip"'
+        }
+    )
@@ -0,0 +1,16 @@
+"""Rebuild the dashboard counters from the source tables and report drift"""
+from models import SessionLocal
+from counters import reconcile
+
+db = SessionLocal()
+try:
+    print("Reconciling dashboard counters...")
+    drift = reconcile(db)
+    if drift:
+        print(f"⚠ {len(drift)} counter(s) had drifted:")
+        for key, (stored, actual) in sorted(drift.items()):
+            print(f"  {key}: stored {stored}, actual {actual}")
+    else:
+        print("✓ No drift")
+finally:
+    db.close()
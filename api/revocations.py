@@ -0,0 +1,101 @@
+"""Revoked tokens, checked in memory on every authenticated request
+
+A revocation is a token_revocations row naming either one token (its
+jti) or a user (every token issued to them before revoked_at). Each
+process mirrors the table as a set of jtis plus a revoked-before time per
+user, so is_revoked() is a set/dict lookup. The mirror is topped up with
+rows newer than the last sync at most every REVOCATION_SYNC_SECONDS
+(one indexed query per process, not per request); revocations made by
+this process apply immediately.
+"""
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from config import settings
+from models import SessionLocal, TokenRevocation
+
+# Re-read this far behind the last sync so rows committed late by other
+# instances (or with a skewed clock) aren't missed
+SYNC_OVERLAP = timedelta(minutes=1)
+
+_revoked_jtis = {}     # jti -> token exp (unix seconds), for pruning
+_revoked_users = {}    # user id -> revoked-before (unix seconds)
+_synced_until = None
+_next_sync = 0.0
+_lock = threading.Lock()
+
+
+def _unix(value: datetime) -> float:
+    # Columns hold naive UTC, like the token's exp/iat
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _remember(jti, user_id, revoked_at: datetime, expires_at: datetime):
+    if jti:
+        _revoked_jtis[jti] = _unix(expires_at) if expires_at else float("inf")
+    else:
+        _revoked_users[user_id] = max(_revoked_users.get(user_id, 0), _unix(revoked_at))
+
+
+def _sync():
+    global _synced_until, _next_sync
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        query = db.query(TokenRevocation)
+        if _synced_until is None:
+            # Revocations older than the longest token lifetime can't match a live token
+            query = query.filter(TokenRevocation.revoked_at >= now - timedelta(hours=settings.JWT_EXPIRATION_HOURS))
+        else:
+            query = query.filter(TokenRevocation.revoked_at >= _synced_until - SYNC_OVERLAP)
+        rows = query.all()
+    finally:
+        db.close()
+
+    for row in rows:
+        _remember(row.jti, row.user_id, row.revoked_at, row.expires_at)
+
+    expired = [jti for jti, exp in _revoked_jtis.items() if exp < time.time()]
+    for jti in expired:
+        del _revoked_jtis[jti]
+
+    _synced_until = now
+    _next_sync = time.monotonic() + settings.REVOCATION_SYNC_SECONDS
+
+
+def is_revoked(claims: dict) -> bool:
+    global _next_sync
+    if time.monotonic() >= _next_sync:
+        with _lock:
+            if time.monotonic() >= _next_sync:
+                try:
+                    _sync()
+                except Exception as e:
+                    # Keep answering from the last good mirror rather than failing every request
+                    logging.warning(f"Token revocation sync failed: {e}")
+                    _next_sync = time.monotonic() + settings.REVOCATION_SYNC_SECONDS
+
+    jti = claims.get("jti")
+    if jti and jti in _revoked_jtis:
+        return True
+    revoked_before = _revoked_users.get(claims.get("sub"))
+    # Tokens carry a fractional iat; one issued after the revocation (even in
+    # the same second, e.g. logging in again after "log out everywhere") is valid
+    return revoked_before is not None and claims.get("iat", 0) < revoked_before
+
+
+def revoke(db, jti: str = None, user_id: str = None, expires_at: datetime = None):
+    """Revoke one token (jti) or every token issued to user_id so far; caller commits"""
+    revocation = TokenRevocation(
+        id=str(uuid.uuid4()),
+        jti=jti,
+        user_id=user_id,
+        revoked_at=datetime.utcnow(),
+        expires_at=expires_at
+    )
+    db.add(revocation)
+    with _lock:
+        _remember(jti, user_id, revocation.revoked_at, expires_at)
+    return revocation
@@ -0,0 +1,62 @@
+"""Full-text property search over the weighted `search_vector` column"""
+import re
+from sqlalchemy import func, literal, or_, text
+from models import Property
+
+SEARCH_CONFIG = "english"
+MAX_SEARCH_TERMS = 8
+
+# Letters and digits only - everything else would be tsquery syntax
+_TERM_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+# Whether pg_trgm is installed; checked once per worker process
+_trigram_available = None
+
+
+def build_prefix_tsquery(search: str):
+    """Turn free text into a prefix tsquery ('gree park' -> 'gree:* & park:*')"""
+    terms = _TERM_RE.findall(search.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def trigram_available(db) -> bool:
+    """Check (once) whether the pg_trgm extension is installed"""
+    global _trigram_available
+    if _trigram_available is None:
+        row = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        _trigram_available = row is not None
+    return _trigram_available
+
+
+def apply_property_search(db, query, search: str):
+    """
+    Filter `query` to properties matching `search`, best matches first.
+
+    Matches the indexed tsvector with prefix terms, so partial words like
+    "agri" find "agricultural". When pg_trgm is installed, titles and
+    locations that are trigram-similar to the search also match, which
+    tolerates typos ("ranchii", "comercial").
+    """
+    tsquery_text = build_prefix_tsquery(search)
+    if not tsquery_text:
+        return query
+
+    tsquery = func.to_tsquery(SEARCH_CONFIG, tsquery_text)
+    condition = Property.search_vector.op("@@")(tsquery)
+    rank = func.ts_rank_cd(Property.search_vector, tsquery)
+
+    if trigram_available(db):
+        term = literal(search)
+        condition = or_(
+            condition,
+            term.op("<%")(Property.title),
+            term.op("<%")(Property.location)
+        )
+        rank = rank + func.greatest(
+            func.word_similarity(term, Property.title),
+            func.word_similarity(term, Property.location)
+        )
+
+    return query.filter(condition).order_by(rank.desc())
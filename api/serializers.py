@@ -0,0 +1,214 @@
+"""Shared row serializers and response encoding for all handlers
+
+Each model gets a serializer built once at import time from a field table
+(API key -> (model attribute, default for None)). Payloads are encoded with
+orjson, which handles datetimes and enums natively, so handlers no longer
+call .isoformat()/.value per row.
+"""
+import enum
+import gzip
+from datetime import date, datetime
+from functools import lru_cache
+from operator import attrgetter
+import azure.functions as func
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack responses
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional: br content-encoding
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+MSGPACK_MIME_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+class ModelSerializer:
+    """Converts ORM rows to dicts using a precompiled attribute getter"""
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self.keys = tuple(fields)
+        attrs = [attr for attr, _ in fields.values()]
+        getter = attrgetter(*attrs)
+        # attrgetter returns a bare value (not a tuple) for a single attribute
+        self._get = getter if len(attrs) > 1 else (lambda row: (getter(row),))
+        self._defaults = tuple((key, default) for key, (_, default) in fields.items() if default is not None)
+
+    def __call__(self, row) -> dict:
+        return self.from_values(self._get(row))
+
+    def from_values(self, values) -> dict:
+        """Build the dict from values already in field order, e.g. a select() row"""
+        data = dict(zip(self.keys, values))
+        for key, default in self._defaults:
+            if data[key] is None:
+                data[key] = default()
+        return data
+
+    def many(self, rows) -> list:
+        return [self(row) for row in rows]
+
+    def only(self, keys) -> "ModelSerializer":
+        """Serializer restricted to `keys` (cached per selection)"""
+        return _subset(self, tuple(keys))
+
+
+@lru_cache(maxsize=64)
+def _subset(serializer: ModelSerializer, keys: tuple) -> ModelSerializer:
+    return ModelSerializer({key: serializer.fields[key] for key in keys})
+
+
+# API field name -> (model attribute, default factory when None)
+PROPERTY_FIELDS = {
+    "id": ("id", None),
+    "title": ("title", None),
+    "slug": ("slug", None),
+    "description": ("description", None),
+    "shortDescription": ("short_description", None),
+    "price": ("price", None),
+    "pricePerSqFt": ("price_per_sqft", None),
+    "area": ("area", None),
+    "areaInSqFt": ("area_in_sqft", None),
+    "location": ("location", None),
+    "fullAddress": ("full_address", None),
+    "googleMapsLink": ("google_maps_link", None),
+    "type": ("type", None),
+    "status": ("status", None),
+    "featured": ("featured", None),
+    "images": ("images", list),
+    "amenities": ("amenities", list),
+    "highlights": ("highlights", list),
+    "legalInfo": ("legal_info", dict),
+    "nearbyPlaces": ("nearby_places", list),
+    "createdAt": ("created_at", None),
+    "updatedAt": ("updated_at", None)
+}
+
+# Predefined projections for `view=`; "card" is what listing cards render
+PROPERTY_VIEWS = {
+    "card": ("id", "title", "slug", "shortDescription", "price", "area", "location", "type", "status", "featured", "images")
+}
+
+ENQUIRY_FIELDS = {
+    "id": ("id", None),
+    "type": ("type", None),
+    "name": ("name", None),
+    "email": ("email", None),
+    "phone": ("phone", None),
+    "message": ("message", None),
+    "preferredTime": ("preferred_time", None),
+    "propertyId": ("property_id", None),
+    "status": ("status", None),
+    "notes": ("notes", None),
+    "createdAt": ("created_at", None),
+    "updatedAt": ("updated_at", None)
+}
+
+TRANSACTION_FIELDS = {
+    "id": ("id", None),
+    "type": ("type", None),
+    "category": ("category", None),
+    "amount": ("amount", None),
+    "description": ("description", None),
+    "payment_method": ("payment_method", None),
+    "reference_number": ("reference_number", None),
+    "property_id": ("property_id", None),
+    "customer_name": ("customer_name", None),
+    "customer_phone": ("customer_phone", None),
+    "customer_email": ("customer_email", None),
+    "transaction_date": ("transaction_date", None),
+    "notes": ("notes", None),
+    "created_at": ("created_at", None),
+    "updated_at": ("updated_at", None)
+}
+
+RECEIPT_FIELDS = {
+    "id": ("id", None),
+    "receipt_number": ("receipt_number", None),
+    "transaction_id": ("transaction_id", None),
+    "customer_name": ("customer_name", None),
+    "customer_phone": ("customer_phone", None),
+    "customer_email": ("customer_email", None),
+    "customer_address": ("customer_address", None),
+    "amount": ("amount", None),
+    "amount_in_words": ("amount_in_words", None),
+    "description": ("description", None),
+    "payment_method": ("payment_method", None),
+    "property_details": ("property_details", None),
+    "issue_date": ("issue_date", None),
+    "notes": ("notes", None),
+    "created_at": ("created_at", None)
+}
+
+property_serializer = ModelSerializer(PROPERTY_FIELDS)
+enquiry_serializer = ModelSerializer(ENQUIRY_FIELDS)
+recent_enquiry_serializer = enquiry_serializer.only(("id", "name", "type", "createdAt"))
+transaction_serializer = ModelSerializer(TRANSACTION_FIELDS)
+receipt_serializer = ModelSerializer(RECEIPT_FIELDS)
+receipt_summary_serializer = receipt_serializer.only(
+    ("id", "receipt_number", "customer_name", "amount", "description", "issue_date", "created_at")
+)
+
+
+def dumps(payload) -> bytes:
+    """Encode a payload as JSON bytes"""
+    return orjson.dumps(payload)
+
+
+def _msgpack_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def negotiate(req: func.HttpRequest):
+    """Pick (mimetype, content-encoding) for a response from Accept headers"""
+    accept = req.headers.get("Accept", "")
+    if msgpack and any(mime in accept for mime in MSGPACK_MIME_TYPES):
+        mimetype = "application/msgpack"
+    else:
+        mimetype = "application/json"
+
+    accept_encoding = req.headers.get("Accept-Encoding", "")
+    if brotli and "br" in accept_encoding:
+        encoding = "br"
+    elif "gzip" in accept_encoding:
+        encoding = "gzip"
+    else:
+        encoding = None
+
+    return mimetype, encoding
+
+
+def encode_response(req: func.HttpRequest, payload, status_code: int = 200, headers: dict = None) -> func.HttpResponse:
+    """Serialize `payload` in the negotiated format and content-encoding"""
+    mimetype, encoding = negotiate(req)
+
+    if mimetype == "application/json":
+        body = orjson.dumps(payload)
+    else:
+        body = msgpack.packb(payload, default=_msgpack_default)
+
+    response_headers = dict(headers or {})
+    response_headers["Content-Type"] = mimetype
+    response_headers["Vary"] = "Accept, Accept-Encoding"
+
+    if encoding and len(body) >= COMPRESSION_MIN_BYTES:
+        if encoding == "br":
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        response_headers["Content-Encoding"] = encoding
+
+    return func.HttpResponse(body, status_code=status_code, headers=response_headers)
@@ -0,0 +1,153 @@
+"""Per-request SQL statement counts and timings
+
+The pipeline wraps each invocation in profile(); cursor hooks on the
+engine add every statement run inside it to the request's SQLProfile:
+how many statements ran, the total time spent in the database and the
+slowest statements, with literals and bind parameters stripped so the
+same statement groups together. Statements run outside a profile (timer
+functions, background flushers) cost one context lookup.
+
+A query budget turns N+1 regressions into failures:
+
+    with max_queries(3):
+        call_the_endpoint()      # raises QueryBudgetExceeded on a 4th statement
+
+Endpoints declare theirs with @http_function(query_budget=N); going over
+it is logged, and fails the request when SQL_QUERY_BUDGET_STRICT is set.
+Profiles nest, so statements also count against any enclosing profile.
+"""
+import functools
+import heapq
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from config import settings
+
+_current = ContextVar("sql_profile", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\([^)]+\)s|%s|\$\d+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_SELECT_LIST = re.compile(r"^SELECT (?:DISTINCT )?(.+?) FROM ")
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, profile, budget: int):
+        self.profile = profile
+        self.budget = budget
+        statement, times = profile.most_repeated()
+        super().__init__(
+            f"{profile.count} SQL statements (budget {budget}); "
+            f"most repeated ({times}x): {statement}"
+        )
+
+
+# SQLAlchemy reuses compiled statement strings, so most lookups are hits
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """Statement text with literals and parameters replaced by ?"""
+    statement = _STRING.sub("?", statement)
+    statement = _PARAM.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _IN_LIST.sub("(?...)", statement)
+    statement = _SPACE.sub(" ", statement).strip()
+    # Long column lists hide what the statement does; keep FROM onwards
+    select_list = _SELECT_LIST.match(statement)
+    if select_list and len(select_list.group(1)) > 80:
+        statement = statement[:select_list.start(1)] + "..." + statement[select_list.end(1):]
+    return statement[:settings.SQL_PROFILE_STATEMENT_LENGTH]
+
+
+class SQLProfile:
+    def __init__(self, budget: int = None, strict: bool = False, parent=None):
+        self.budget = budget
+        self.strict = strict
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self._slowest = []  # min-heap of (seconds, sequence, statement)
+
+    def record(self, statement: str, seconds: float, normalized: str = None):
+        normalized = normalized or normalize_sql(statement)
+        self.count += 1
+        self.seconds += seconds
+        self.statements[normalized] += 1
+
+        entry = (seconds, self.count, normalized)
+        if len(self._slowest) < settings.SQL_PROFILE_SLOWEST:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+        if self.parent is not None:
+            self.parent.record(statement, seconds, normalized)
+        # Fail at the offending statement so the traceback shows where it ran
+        if self.strict and self.over_budget:
+            raise QueryBudgetExceeded(self, self.budget)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def slowest(self) -> list:
+        return [
+            {"ms": round(seconds * 1000, 3), "sql": statement}
+            for seconds, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+    def most_repeated(self):
+        return self.statements.most_common(1)[0] if self.statements else (None, 0)
+
+    def summary(self) -> dict:
+        statement, times = self.most_repeated()
+        return {
+            "queries": self.count,
+            "db_ms": round(self.seconds * 1000, 3),
+            "budget": self.budget,
+            "most_repeated": {"sql": statement, "count": times} if times > 1 else None,
+            "slowest": self.slowest()
+        }
+
+
+@contextmanager
+def profile(budget: int = None, strict: bool = False):
+    """Collect the statements run inside the block into a new SQLProfile"""
+    current = SQLProfile(budget, strict, parent=_current.get())
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def max_queries(budget: int):
+    """Raise QueryBudgetExceeded if the block runs more than `budget` statements"""
+    return profile(budget, strict=True)
+
+
+def current_profile():
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._sql_profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = _current.get()
+    started = getattr(context, "_sql_profile_started", None)
+    if current is not None and started is not None:
+        current.record(statement, time.perf_counter() - started)
+
+
+def instrument(engine):
+    if settings.SQL_PROFILING:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
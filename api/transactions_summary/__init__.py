@@ -0,0 +1,151 @@
+import azure.functions as func
+import json
+import logging
+from datetime import datetime
+from sqlalchemy import select, literal_column, tuple_, func as sql_func
+from models import Transaction, TransactionType
+from pipeline import http_function, RequestContext
+from serializers import encode_response
+
+# Indian financial years run April to March
+FY_OFFSET = literal_column("interval '3 months'")
+
+PERIODS = ("month", "quarter", "fy")
+
+# grouping(period, category, payment_method, property_id) -> breakdown; a set
+# bit means that column was rolled up in the row's grouping set
+GROUPING_SETS = {
+    0b0111: "by_period",
+    0b1011: "by_category",
+    0b1101: "by_payment_method",
+    0b1110: "by_property",
+    0b1111: "totals"
+}
+
+def period_start(period: str):
+    """SQL expression for the start of the period containing transaction_date"""
+    if period == "fy":
+        shifted = Transaction.transaction_date - FY_OFFSET
+        return sql_func.date_trunc(literal_column("'year'"), shifted) + FY_OFFSET
+    # Literal unit so the SELECT and GROUP BY expressions are textually identical
+    return sql_func.date_trunc(literal_column(f"'{period}'"), Transaction.transaction_date)
+
+def financial_year(start: datetime) -> int:
+    return start.year if start.month >= 4 else start.year - 1
+
+def period_label(period: str, start: datetime) -> str:
+    year = financial_year(start)
+    fy = f"FY{year}-{(year + 1) % 100:02d}"
+    if period == "fy":
+        return fy
+    if period == "quarter":
+        return f"Q{(start.month - 4) % 12 // 3 + 1} {fy}"
+    return start.strftime("%Y-%m")
+
+def build_summary_query(period: str, filters: list):
+    """
+    Income/expense totals for every breakdown in one pass over transactions.
+
+    GROUPING SETS aggregates by period, category, payment method, property
+    and overall in a single scan; grouping() tells the row sets apart since
+    payment_method and property_id may themselves be NULL.
+    """
+    start = period_start(period)
+    income = sql_func.coalesce(sql_func.sum(Transaction.amount).filter(Transaction.type == TransactionType.INCOME), 0)
+    expense = sql_func.coalesce(sql_func.sum(Transaction.amount).filter(Transaction.type == TransactionType.EXPENSE), 0)
+
+    return select(
+        sql_func.grouping(start, Transaction.category, Transaction.payment_method, Transaction.property_id).label("grouping_id"),
+        start.label("start"),
+        Transaction.category,
+        Transaction.payment_method,
+        Transaction.property_id,
+        income.label("income"),
+        expense.label("expense"),
+        sql_func.count(Transaction.id).label("count")
+    ).where(*filters).group_by(
+        sql_func.grouping_sets(
+            tuple_(start),
+            tuple_(Transaction.category),
+            tuple_(Transaction.payment_method),
+            tuple_(Transaction.property_id),
+            tuple_()
+        )
+    )
+
+def figures(row) -> dict:
+    return {
+        "income": round(row.income, 2),
+        "expense": round(row.expense, 2),
+        "net": round(row.income - row.expense, 2),
+        "count": row.count
+    }
+
+@http_function(methods=("GET",), auth=True, envelope="plain")
+def main(req: func.HttpRequest, ctx: RequestContext) -> func.HttpResponse:
+    logging.info('Transactions summary API triggered')
+    
+    # Response headers
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Content-Type": "application/json"
+    }
+    
+    period = req.params.get("period", "month")
+    if period not in PERIODS:
+        return func.HttpResponse(
+            json.dumps({"error": "period must be one of: month, quarter, fy"}),
+            status_code=400,
+            headers=headers
+        )
+    
+    filters = []
+    try:
+        if req.params.get("start_date"):
+            filters.append(Transaction.transaction_date >= datetime.fromisoformat(req.params["start_date"]))
+        if req.params.get("end_date"):
+            filters.append(Transaction.transaction_date <= datetime.fromisoformat(req.params["end_date"]))
+    except ValueError:
+        return func.HttpResponse(
+            json.dumps({"error": "start_date and end_date must be ISO dates"}),
+            status_code=400,
+            headers=headers
+        )
+    if req.params.get("property_id"):
+        filters.append(Transaction.property_id == req.params["property_id"])
+    
+    db = ctx.db
+    
+    rows = db.execute(build_summary_query(period, filters)).all()
+    result = {
+        "period": period,
+        "totals": {"income": 0, "expense": 0, "net": 0, "count": 0},
+        "by_period": [],
+        "by_category": [],
+        "by_payment_method": [],
+        "by_property": []
+    }
+    
+    for row in rows:
+        breakdown = GROUPING_SETS[row.grouping_id]
+        if breakdown == "totals":
+            result["totals"] = figures(row)
+        elif breakdown == "by_period":
+            result["by_period"].append({
+                "period": period_label(period, row.start),
+                "start": row.start.date().isoformat(),
+                **figures(row)
+            })
+        elif breakdown == "by_category":
+            result["by_category"].append({"category": row.category, **figures(row)})
+        elif breakdown == "by_payment_method":
+            result["by_payment_method"].append({"payment_method": row.payment_method, **figures(row)})
+        else:
+            result["by_property"].append({"property_id": row.property_id, **figures(row)})
+    
+    # Chronological periods; every other breakdown largest first
+    result["by_period"].sort(key=lambda item: item["start"])
+    for breakdown in ("by_category", "by_payment_method", "by_property"):
+        result[breakdown].sort(key=lambda item: item["income"] + item["expense"], reverse=True)
+    
+    return encode_response(req, result, status_code=200, headers=headers)
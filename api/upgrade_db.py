@@ -0,0 +1,84 @@
+"""Bring an existing database up to date with models.py
+
+create_all() only creates missing tables, so indexes and columns added to
+existing tables are applied here. Every step is idempotent - run it after
+each deploy that changes models.py.
+"""
+from sqlalchemy import text
+from models import Base, SessionLocal, engine, init_db, PROPERTY_SEARCH_VECTOR_SQL
+from counters import reconcile
+
+# Changes to existing tables that can't be expressed as a missing table/index
+UPGRADE_STATEMENTS = [
+    # Full-text property search
+    "ALTER TABLE properties ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({PROPERTY_SEARCH_VECTOR_SQL}) STORED",
+    # Seed the per-month receipt counters from numbers already issued
+    "INSERT INTO receipt_sequences (period, last_number) "
+    "SELECT substr(receipt_number, 5, 7), max(split_part(receipt_number, '/', 4)::int) "
+    "FROM receipts WHERE receipt_number ~ '^RCP/[0-9]{4}/[0-9]{2}/[0-9]+$' GROUP BY 1 "
+    "ON CONFLICT (period) DO UPDATE SET last_number = "
+    "GREATEST(receipt_sequences.last_number, excluded.last_number)",
+    # Normalize enquiry phones (see utils.normalize_phone) for duplicate detection
+    r"UPDATE enquiries SET phone = regexp_replace(phone, '\D', '', 'g') WHERE phone ~ '\D'",
+    "UPDATE enquiries SET phone = substr(phone, 3) WHERE length(phone) = 12 AND phone LIKE '91%'",
+    "UPDATE enquiries SET phone = substr(phone, 2) WHERE length(phone) = 11 AND phone LIKE '0%'",
+]
+
+# Transactions that already have more than one receipt block the unique index
+DUPLICATE_RECEIPTS_SQL = (
+    "SELECT transaction_id FROM receipts WHERE transaction_id IS NOT NULL "
+    "GROUP BY transaction_id HAVING count(*) > 1 ORDER BY transaction_id LIMIT 20"
+)
+
+# Typo-tolerant search needs pg_trgm (on Azure, allow-list it in the
+# server's azure.extensions parameter first). Search still works without it.
+TRIGRAM_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_properties_title_trgm ON properties USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_properties_location_trgm ON properties USING gin (location gin_trgm_ops)",
+    # customer= filter on the receipts ledger
+    "CREATE INDEX IF NOT EXISTS ix_receipts_customer_name_trgm ON receipts USING gin (customer_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_receipts_customer_phone_trgm ON receipts USING gin (customer_phone gin_trgm_ops)",
+]
+
+
+def upgrade():
+    print("Creating missing tables...")
+    init_db()
+
+    with engine.begin() as conn:
+        for statement in UPGRADE_STATEMENTS:
+            conn.execute(text(statement))
+
+        print("Creating missing indexes...")
+        duplicate_receipts = conn.execute(text(DUPLICATE_RECEIPTS_SQL)).scalars().all()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name == "uq_receipts_transaction_id" and duplicate_receipts:
+                    # Receipts are financial records - leave resolving these to a person
+                    print("⚠ These transactions have more than one receipt, so one receipt per "
+                          f"transaction is not enforced until they are resolved: {', '.join(duplicate_receipts)}")
+                    continue
+                index.create(bind=conn, checkfirst=True)
+
+    print("Enabling typo-tolerant search...")
+    try:
+        with engine.begin() as conn:
+            for statement in TRIGRAM_STATEMENTS:
+                conn.execute(text(statement))
+    except Exception as e:
+        print(f"⚠ pg_trgm unavailable, search will not tolerate typos: {e}")
+
+    print("Rebuilding dashboard counters...")
+    db = SessionLocal()
+    try:
+        reconcile(db)
+    finally:
+        db.close()
+
+    print("\n✅ Database upgrade complete!")
+
+
+if __name__ == "__main__":
+    upgrade()
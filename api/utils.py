@@ -1,8 +1,15 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from config import settings
+import revocations
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
@@ -10,7 +17,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -22,7 +29,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
     
-    to_encode.update({"exp": expire})
+    # Fractional iat, so a token issued just after a revocation in the same
+    # second isn't mistaken for one issued before it
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
@@ -34,26 +43,49 @@ def decode_access_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+# Verified claims by sha256(token), kept until the token's exp
+_token_cache = OrderedDict()
+_token_cache_lock = threading.Lock()
+
 def get_current_user(authorization: str):
     """Extract user from Authorization header"""
-    import logging
-    
     if not authorization or not authorization.startswith("Bearer "):
-        logging.error("No authorization header or invalid format")
+        logging.debug("No authorization header or invalid format")
         return None
     
-    token = authorization.replace("Bearer ", "")
-    logging.info(f"Attempting to decode token: {token[:20]}...")
-    logging.info(f"Using JWT_SECRET_KEY: {settings.JWT_SECRET_KEY[:10]}...")
+    token = authorization[7:]
+    cache_key = hashlib.sha256(token.encode('utf-8')).digest()
+    now = time.time()
     
-    payload = decode_access_token(token)
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+        if cached and cached[1] > now:
+            _token_cache.move_to_end(cache_key)
+            payload = cached[0]
+        else:
+            payload = None
     
-    if not payload:
-        logging.error("Token decode failed")
+    if payload is None:
+        payload = decode_access_token(token)
+        
+        if not payload:
+            logging.debug("Token decode failed")
+            return None
+        
+        # Tokens without an exp are verified every time
+        if isinstance(payload.get("exp"), (int, float)):
+            with _token_cache_lock:
+                _token_cache[cache_key] = (payload, payload["exp"])
+                _token_cache.move_to_end(cache_key)
+                if len(_token_cache) > settings.JWT_CACHE_SIZE:
+                    _token_cache.popitem(last=False)
+    
+    # Checked on every call, cached or not
+    if revocations.is_revoked(payload):
+        logging.debug("Token revoked")
         return None
     
-    logging.info(f"Token decoded successfully: {payload.get('email')}")
-    return payload
+    return dict(payload)
 
 def create_response(success: bool = True, data: any = None, message: str = None, error: dict = None):
     """Create standardized API response"""
@@ -92,3 +124,69 @@ def slugify(text: str) -> str:
     text = re.sub(r'[^a-z0-9]+', '-', text)
     text = text.strip('-')
     return text
+
+def normalize_phone(phone: str) -> str:
+    """Canonical form for matching: digits only, without the +91/0 prefix on Indian numbers"""
+    import re
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) == 12 and digits.startswith('91'):
+        return digits[2:]
+    if len(digits) == 11 and digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+def client_ip(req) -> str:
+    """
+    Connecting address as appended to X-Forwarded-For by the Functions front end.
+
+    Only the right-most hop is trustworthy: the front end appends the peer
+    address to whatever X-Forwarded-For the client sent, so earlier entries
+    are client-controlled. The :port suffix is stripped.
+    """
+    forwarded = req.headers.get('X-Forwarded-For', '').split(',')[-1].strip()
+    if forwarded.startswith('['):
+        return forwarded[1:].split(']')[0]
+    if forwarded.count(':') == 1:
+        return forwarded.split(':')[0]
+    return forwarded or 'unknown'
+
+def number_to_words(n):
+    """Convert number to words (Indian numbering system)"""
+    ones = ["", "One", "Two", "Three", "Four", "Five", "Six", "Seven", "Eight", "Nine"]
+    tens = ["", "", "Twenty", "Thirty", "Forty", "Fifty", "Sixty", "Seventy", "Eighty", "Ninety"]
+    teens = ["Ten", "Eleven", "Twelve", "Thirteen", "Fourteen", "Fifteen", "Sixteen", "Seventeen", "Eighteen", "Nineteen"]
+    
+    def convert_below_thousand(num):
+        if num == 0:
+            return ""
+        elif num < 10:
+            return ones[num]
+        elif num < 20:
+            return teens[num - 10]
+        elif num < 100:
+            return tens[num // 10] + (" " + ones[num % 10] if num % 10 != 0 else "")
+        else:
+            return ones[num // 100] + " Hundred" + (" " + convert_below_thousand(num % 100) if num % 100 != 0 else "")
+    
+    if n == 0:
+        return "Zero Rupees Only"
+    
+    # Split into crores, lakhs, thousands, hundreds
+    crore = n // 10000000
+    n %= 10000000
+    lakh = n // 100000
+    n %= 100000
+    thousand = n // 1000
+    n %= 1000
+    
+    result = []
+    if crore:
+        result.append(convert_below_thousand(crore) + " Crore")
+    if lakh:
+        result.append(convert_below_thousand(lakh) + " Lakh")
+    if thousand:
+        result.append(convert_below_thousand(thousand) + " Thousand")
+    if n:
+        result.append(convert_below_thousand(n))
+    
+    return " ".join(result) + " Rupees Only"
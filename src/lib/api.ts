@@ -60,6 +60,20 @@ const apiFetch = async (endpoint: string, options: RequestInit = {}) => {
   return data;
 };
 
+// Fetch a binary (e.g. PDF) response with auth
+const apiFetchBlob = async (endpoint: string) => {
+  const token = getAuthToken();
+  const response = await fetch(`${API_BASE_URL}${endpoint}`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+
+  if (!response.ok) {
+    throw new Error(`API request failed with status ${response.status}`);
+  }
+
+  return response.blob();
+};
+
 // Auth API
 export const authAPI = {
   login: async (email: string, password: string) => {
@@ -144,6 +158,10 @@ export const propertiesAPI = {
 };
 
 // Enquiries API
+type EnquirySelection =
+  | { ids: string[] }
+  | { filter: { status?: string; type?: string; start_date?: string; end_date?: string } };
+
 export const enquiriesAPI = {
   getAll: async (params?: {
     page?: number;
@@ -179,15 +197,28 @@ export const enquiriesAPI = {
   },
 
   updateStatus: async (id: string, status: string, notes?: string) => {
-    return apiFetch(`/enquiries/${id}/status`, {
+    return enquiriesAPI.bulkUpdate({ ids: [id] }, { status, notes });
+  },
+
+  delete: async (id: string) => {
+    return enquiriesAPI.bulkDelete({ ids: [id] });
+  },
+
+  // Select enquiries by ids, or by a filter (status, type, start_date, end_date)
+  bulkUpdate: async (
+    selection: EnquirySelection,
+    changes: { status?: string; notes?: string | null }
+  ) => {
+    return apiFetch('/enquiries', {
       method: 'PATCH',
-      body: JSON.stringify({ status, notes }),
+      body: JSON.stringify({ ...selection, ...changes }),
     });
   },
 
-  delete: async (id: string) => {
-    return apiFetch(`/enquiries/${id}`, {
+  bulkDelete: async (selection: EnquirySelection) => {
+    return apiFetch('/enquiries', {
       method: 'DELETE',
+      body: JSON.stringify(selection),
     });
   },
 };
@@ -217,14 +248,24 @@ export const settingsAPI = {
 export const financialAPI = {
   // Transactions
   transactions: {
-    list: async (filters?: { type?: string; category?: string; start_date?: string; end_date?: string }) => {
-      const params = new URLSearchParams(filters as Record<string, string>);
+    list: async (filters?: { type?: string; category?: string; start_date?: string; end_date?: string; limit?: number; cursor?: string }) => {
+      const params = new URLSearchParams();
+      Object.entries(filters || {}).forEach(([key, value]) => {
+        if (value !== undefined) {
+          params.append(key, String(value));
+        }
+      });
       const query = params.toString();
       return apiFetch(`/transactions${query ? `?${query}` : ''}`);
     },
     get: async (id: string) => {
       return apiFetch(`/transactions/${id}`);
     },
+    summary: async (filters?: { period?: 'month' | 'quarter' | 'fy'; start_date?: string; end_date?: string; property_id?: string }) => {
+      const params = new URLSearchParams(filters as Record<string, string>);
+      const query = params.toString();
+      return apiFetch(`/transactions/summary${query ? `?${query}` : ''}`);
+    },
     create: async (transaction: any) => {
       return apiFetch('/transactions', {
         method: 'POST',
@@ -246,18 +287,37 @@ export const financialAPI = {
   
   // Receipts
   receipts: {
-    list: async () => {
-      return apiFetch('/receipts');
+    list: async (filters?: { start_date?: string; end_date?: string; customer?: string; min_amount?: number; max_amount?: number; limit?: number; cursor?: string }) => {
+      const params = new URLSearchParams();
+      Object.entries(filters || {}).forEach(([key, value]) => {
+        if (value !== undefined) {
+          params.append(key, String(value));
+        }
+      });
+      const query = params.toString();
+      return apiFetch(`/receipts${query ? `?${query}` : ''}`);
     },
     get: async (id: string) => {
       return apiFetch(`/receipts/${id}`);
     },
+    pdf: async (id: string) => {
+      return apiFetchBlob(`/receipts/${id}/pdf`);
+    },
+    pdfBundle: async (month: string) => {
+      return apiFetchBlob(`/receipts/pdf-bundle?month=${encodeURIComponent(month)}`);
+    },
     create: async (receipt: any) => {
       return apiFetch('/receipts', {
         method: 'POST',
         body: JSON.stringify(receipt),
       });
     },
+    batch: async (request: { transaction_ids?: string[]; filter?: { category?: string; start_date?: string; end_date?: string }; issue_date?: string; notes?: string }) => {
+      return apiFetch('/receipts/batch', {
+        method: 'POST',
+        body: JSON.stringify(request),
+      });
+    },
     update: async (id: string, receipt: any) => {
       return apiFetch(`/receipts/${id}`, {
         method: 'PUT',
@@ -77,7 +77,7 @@ const AdminEnquiries = () => {
 
   const updateStatus = async (id: string, status: Enquiry["status"]) => {
     try {
-      // For now, just update locally since we need to add the endpoint
+      await enquiriesAPI.updateStatus(id, status);
       setEnquiries(
         enquiries.map((e) => (e.id === id ? { ...e, status } : e))
       );
@@ -20,25 +20,17 @@ export default function AdminFinance() {
 
   const loadStats = async () => {
     try {
-      const [transactions, receipts] = await Promise.all([
-        financialAPI.transactions.list(),
-        financialAPI.receipts.list(),
+      const [summary, receipts] = await Promise.all([
+        financialAPI.transactions.summary(),
+        financialAPI.receipts.list({ limit: 1 }),
       ]);
 
-      const income = transactions
-        .filter((t: any) => t.type === "income")
-        .reduce((sum: number, t: any) => sum + t.amount, 0);
-
-      const expense = transactions
-        .filter((t: any) => t.type === "expense")
-        .reduce((sum: number, t: any) => sum + t.amount, 0);
-
       setStats({
-        totalIncome: income,
-        totalExpense: expense,
-        netProfit: income - expense,
-        transactionCount: transactions.length,
-        receiptCount: receipts.length,
+        totalIncome: summary.totals.income,
+        totalExpense: summary.totals.expense,
+        netProfit: summary.totals.net,
+        transactionCount: summary.totals.count,
+        receiptCount: receipts.pagination.totalItems,
       });
     } catch (error) {
       console.error("Failed to load stats:", error);
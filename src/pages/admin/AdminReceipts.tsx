@@ -24,6 +24,7 @@ const PAYMENT_METHODS = [
 export default function AdminReceipts() {
   const [receipts, setReceipts] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [showDialog, setShowDialog] = useState(false);
   const [viewingReceipt, setViewingReceipt] = useState<any>(null);
   
@@ -46,7 +47,8 @@ export default function AdminReceipts() {
   const loadReceipts = async () => {
     try {
       const data = await financialAPI.receipts.list();
-      setReceipts(data);
+      setReceipts(data.receipts);
+      setNextCursor(data.pagination.nextCursor);
     } catch (error) {
       toast.error("Failed to load receipts");
     } finally {
@@ -54,6 +56,17 @@ export default function AdminReceipts() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      const data = await financialAPI.receipts.list({ cursor: nextCursor });
+      setReceipts((current) => [...current, ...data.receipts]);
+      setNextCursor(data.pagination.nextCursor);
+    } catch (error) {
+      toast.error("Failed to load receipts");
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     
@@ -112,154 +125,20 @@ export default function AdminReceipts() {
     window.print();
   };
 
-  const downloadReceipt = () => {
+  const downloadReceipt = async () => {
     if (!viewingReceipt) return;
     
-    // Create a new window for printing
-    const printWindow = window.open('', '_blank');
-    if (!printWindow) return;
-
-    // Generate HTML content
-    const htmlContent = `
-      <!DOCTYPE html>
-      <html>
-        <head>
-          <title>Receipt - ${viewingReceipt.receipt_number}</title>
-          <style>
-            body {
-              font-family: Arial, sans-serif;
-              max-width: 800px;
-              margin: 40px auto;
-              padding: 20px;
-            }
-            .header {
-              text-align: center;
-              margin-bottom: 30px;
-              border-bottom: 2px solid #333;
-              padding-bottom: 20px;
-            }
-            .company-name {
-              font-size: 28px;
-              font-weight: bold;
-              color: #333;
-            }
-            .receipt-info {
-              display: flex;
-              justify-content: space-between;
-              margin-bottom: 30px;
-            }
-            .customer-details {
-              background: #f5f5f5;
-              padding: 15px;
-              border-radius: 5px;
-              margin-bottom: 30px;
-            }
-            .payment-details {
-              margin-bottom: 30px;
-            }
-            .detail-row {
-              display: flex;
-              justify-content: space-between;
-              padding: 10px 0;
-              border-bottom: 1px solid #ddd;
-            }
-            .amount-row {
-              display: flex;
-              justify-content: space-between;
-              padding: 15px 0;
-              border-top: 2px dashed #333;
-              font-size: 18px;
-              font-weight: bold;
-            }
-            .amount-words {
-              background: #f5f5f5;
-              padding: 10px;
-              border-radius: 5px;
-              margin: 10px 0;
-              font-weight: bold;
-            }
-            .footer {
-              margin-top: 40px;
-              text-align: center;
-              color: #666;
-              font-size: 12px;
-              border-top: 1px solid #ddd;
-              padding-top: 20px;
-            }
-            h3 {
-              margin-bottom: 10px;
-              color: #333;
-            }
-          </style>
-        </head>
-        <body>
-          <div class="header">
-            <div class="company-name">DreamLadder</div>
-            <div style="color: #666;">Real Estate Solutions</div>
-          </div>
-
-          <div class="receipt-info">
-            <div>
-              <div style="color: #666; font-size: 14px;">Receipt Number</div>
-              <div style="font-weight: bold; font-size: 18px;">${viewingReceipt.receipt_number}</div>
-            </div>
-            <div style="text-align: right;">
-              <div style="color: #666; font-size: 14px;">Date</div>
-              <div style="font-weight: bold;">${new Date(viewingReceipt.issue_date).toLocaleDateString()}</div>
-            </div>
-          </div>
-
-          <div class="customer-details">
-            <h3>Customer Details</h3>
-            <div style="font-weight: bold; margin-bottom: 5px;">${viewingReceipt.customer_name}</div>
-            ${viewingReceipt.customer_address ? `<div>${viewingReceipt.customer_address}</div>` : ''}
-            ${viewingReceipt.customer_phone ? `<div>Phone: ${viewingReceipt.customer_phone}</div>` : ''}
-            ${viewingReceipt.customer_email ? `<div>Email: ${viewingReceipt.customer_email}</div>` : ''}
-          </div>
-
-          <div class="payment-details">
-            <div class="detail-row">
-              <span style="color: #666;">Description:</span>
-              <span style="font-weight: bold;">${viewingReceipt.description}</span>
-            </div>
-            <div class="detail-row">
-              <span style="color: #666;">Payment Method:</span>
-              <span style="font-weight: bold; text-transform: capitalize;">${(viewingReceipt.payment_method || '').replace('_', ' ')}</span>
-            </div>
-            <div class="amount-row">
-              <span>Amount Paid:</span>
-              <span style="color: #16a34a;">₹${viewingReceipt.amount.toLocaleString('en-IN', { minimumFractionDigits: 2 })}</span>
-            </div>
-            <div class="amount-words">
-              <div style="font-size: 12px; color: #666;">In Words:</div>
-              ${viewingReceipt.amount_in_words}
-            </div>
-          </div>
-
-          ${viewingReceipt.notes ? `
-            <div style="border-top: 1px solid #ddd; padding-top: 20px; margin-bottom: 20px;">
-              <div style="color: #666; font-size: 14px; margin-bottom: 5px;">Notes:</div>
-              <div>${viewingReceipt.notes}</div>
-            </div>
-          ` : ''}
-
-          <div class="footer">
-            <p>This is a computer-generated receipt and does not require a signature.</p>
-            <p style="margin-top: 5px;">Thank you for your business!</p>
-          </div>
-        </body>
-      </html>
-    `;
-
-    printWindow.document.write(htmlContent);
-    printWindow.document.close();
-    printWindow.focus();
-
-    // Trigger print dialog
-    setTimeout(() => {
-      printWindow.print();
-      printWindow.close();
-    }, 250);
+    try {
+      const pdf = await financialAPI.receipts.pdf(viewingReceipt.id);
+      const url = URL.createObjectURL(pdf);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `${viewingReceipt.receipt_number.replace(/\//g, '-')}.pdf`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      toast.error("Failed to download receipt");
+    }
   };
 
   return (
@@ -325,6 +204,13 @@ export default function AdminReceipts() {
               )}
             </TableBody>
           </Table>
+          {nextCursor && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" onClick={loadMore}>
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 
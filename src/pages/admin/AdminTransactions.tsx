@@ -47,6 +47,7 @@ const PAYMENT_METHODS = [
 export default function AdminTransactions() {
   const [transactions, setTransactions] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [showDialog, setShowDialog] = useState(false);
   const [editingId, setEditingId] = useState<string | null>(null);
   const [filters, setFilters] = useState({ type: "all", category: "all" });
@@ -75,7 +76,8 @@ export default function AdminTransactions() {
       if (filters.type && filters.type !== "all") apiFilters.type = filters.type;
       if (filters.category && filters.category !== "all") apiFilters.category = filters.category;
       const data = await financialAPI.transactions.list(apiFilters);
-      setTransactions(data);
+      setTransactions(data.transactions);
+      setNextCursor(data.pagination.nextCursor);
     } catch (error) {
       toast.error("Failed to load transactions");
     } finally {
@@ -83,6 +85,20 @@ export default function AdminTransactions() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      const apiFilters: any = {};
+      if (filters.type && filters.type !== "all") apiFilters.type = filters.type;
+      if (filters.category && filters.category !== "all") apiFilters.category = filters.category;
+      const data = await financialAPI.transactions.list({ ...apiFilters, cursor: nextCursor });
+      setTransactions((current) => [...current, ...data.transactions]);
+      setNextCursor(data.pagination.nextCursor);
+    } catch (error) {
+      toast.error("Failed to load transactions");
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     
@@ -269,6 +285,13 @@ export default function AdminTransactions() {
               )}
             </TableBody>
           </Table>
+          {nextCursor && (
+            <div className="flex justify-center pt-4">
+              <Button variant="outline" onClick={loadMore}>
+                Load more
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
 